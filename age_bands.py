@@ -0,0 +1,93 @@
+import re
+
+import numpy as np
+
+from population import AGE_LABELS, MAX_AGE, cumulative
+
+# 연령 구간 집계: 나이 축 누적합(prefix sum)으로 어떤 구간이든 뺄셈 한 번에 구한다
+#   구간 합(lo~hi) = cum[hi + 1] - cum[lo]
+# 구간(band)은 (이름, 시작 나이, 끝 나이) 튜플. 끝 나이도 포함한다.
+
+
+def _range_bands(step):
+    bands = [(f"{lo}~{lo + step - 1}세", lo, lo + step - 1) for lo in range(0, MAX_AGE, step)]
+    bands.append((f"{MAX_AGE}세 이상", MAX_AGE, MAX_AGE))
+    return bands
+
+
+SINGLE_YEAR = [(AGE_LABELS[age], age, age) for age in range(MAX_AGE + 1)]
+
+BAND_SETS = {
+    "1세 단위": SINGLE_YEAR,
+    "5세 단위": _range_bands(5),
+    "10세 단위": _range_bands(10),
+    "학령기": [
+        ("미취학 (0~5세)", 0, 5),
+        ("초등학생 (6~11세)", 6, 11),
+        ("중학생 (12~14세)", 12, 14),
+        ("고등학생 (15~17세)", 15, 17),
+        ("18세 이상", 18, MAX_AGE),
+    ],
+    "생산가능인구": [
+        ("유소년 (0~14세)", 0, 14),
+        ("생산가능 (15~64세)", 15, 64),
+        ("고령 (65세 이상)", 65, MAX_AGE),
+    ],
+}
+
+_BAND_TEXT_RE = re.compile(r"^\s*(\d+)\s*(?:[-~]\s*(\d*))?\s*$")
+
+
+def parse_bands(text):
+    """'0-19, 20-64, 65-' 같은 입력을 구간 목록으로 바꾼다. '65-' 는 65세 이상."""
+    bands = []
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        match = _BAND_TEXT_RE.match(part)
+        if not match:
+            raise ValueError(f"연령 구간 형식이 잘못되었습니다: '{part.strip()}' (예: 0-19, 20-64, 65-)")
+        lo = int(match.group(1))
+        hi = lo if match.group(2) is None else int(match.group(2) or MAX_AGE)
+        lo, hi = min(lo, MAX_AGE), min(hi, MAX_AGE)
+        if hi < lo:
+            raise ValueError(f"연령 구간의 끝이 시작보다 작습니다: '{part.strip()}'")
+        if lo == hi:
+            label = AGE_LABELS[lo]
+        elif hi == MAX_AGE:
+            label = f"{lo}세 이상"
+        else:
+            label = f"{lo}~{hi}세"
+        bands.append((label, lo, hi))
+    return bands
+
+
+def sums_from_cumulative(cum, bands):
+    """누적합 배열에서 모든 구간 합을 한 번에: (..., 구간 수)"""
+    lo = np.array([band[1] for band in bands], dtype=np.intp)
+    hi = np.array([band[2] for band in bands], dtype=np.intp)
+    return cum[..., hi + 1] - cum[..., lo]
+
+
+def band_sums(counts, bands):
+    return sums_from_cumulative(cumulative(counts), bands)
+
+
+def cube_band_sums(cube, rows, sex, bands):
+    """큐브에서 여러 지역 x 여러 구간 합: (len(rows), 구간 수)"""
+    cum = cube.cumulative[np.asarray(rows, dtype=np.intp), cube.sexes.index(sex)]
+    return sums_from_cumulative(cum, bands)
+
+
+def rollup(cube, codes):
+    """각 지역 아래 말단 지역 행을 더해 상위 지역 인구를 다시 만든다: (len(codes), 성별, 나이)"""
+    tree = cube.tree
+    leaf_rows, group_ids = [], []
+    for group_id, code in enumerate(codes):
+        rows = [row for leaf in tree.leaves(code) for row in tree.rows_of(leaf)]
+        leaf_rows.extend(rows)
+        group_ids.extend([group_id] * len(rows))
+
+    out = np.zeros((len(codes),) + cube.counts.shape[1:], dtype=np.int64)
+    np.add.at(out, np.asarray(group_ids, dtype=np.intp), cube.counts[np.asarray(leaf_rows, dtype=np.intp)])
+    return out
@@ -0,0 +1,410 @@
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import age_bands
+import bookmark_collection
+import change_chart
+import change_rollup
+import columnar_cache
+import marker_layer
+import population
+import pyramid
+import search_index
+import spatial_index
+import weather
+from regions import ROOT, RegionTree, split_label
+
+# 대시보드별 데이터 경로 벤치마크 (브라우저/Streamlit 없이 실행)
+#   python bench.py                    # 1배, 10배 데이터로 실행하고 기준값과 비교 (느려지면 종료 코드 1)
+#   python bench.py --scale 1 10 100   # 100배 복제본까지
+#   python bench.py --only age markers
+#   python bench.py --update-baseline  # 현재 결과를 기준값으로 저장
+#
+# 각 대시보드의 읽기 -> 지역 나누기 -> 선택 -> 집계 -> 그림 만들기(JSON 직렬화까지) 를 단계별로 재고,
+# 단계마다 걸린 시간(반복 중 최솟값)과 최대 메모리(tracemalloc, 따로 한 번 더 실행)를 기록한다.
+# N배 데이터는 번들 CSV 의 지역 행(기상은 지점 행)을 N번 복제해서 만든다.
+
+HERE = Path(__file__).parent
+BASELINE_PATH = HERE / "bench_baseline.json"
+DATA_FILES = {
+    "age": "202506_202506_연령별인구현황_월간.csv",
+    "avg_age": "202506_202506_주민등록인구기타현황(평균연령)_월간.csv",
+    "change": "202506_202506_법정동별 인구증감_월간.csv",
+    "weather": "종관기상_지점별_연·월_통계_20250725133303.csv",
+}
+DEFAULT_SCALES = (1, 10)
+BOOKMARKS_PER_SCALE = 2_000  # 지도 마커 벤치마크의 1배 북마크 수
+
+TIME_TOLERANCE = 0.5  # 기준보다 50% 넘게 느려지면 실패
+MEMORY_TOLERANCE = 0.25  # 기준보다 25% 넘게 메모리를 더 쓰면 실패
+MIN_TIME_DIFF = 0.005  # 5ms 이하 차이는 잡음으로 본다
+MIN_MEMORY_DIFF = 1.0  # MB
+
+
+class Recorder:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        result = {"seconds": time.perf_counter() - start}
+        if self.trace_memory:
+            result["peak_mb"] = (tracemalloc.get_traced_memory()[1] - start_memory) / 1e6
+        self.stages[name] = result
+
+
+# ---------- N배 데이터 ----------
+def scale_rows(data, scale, header_lines=1):
+    """앞의 header_lines 줄은 그대로 두고 나머지 줄을 scale 번 반복"""
+    if scale == 1:
+        return data
+    lines = data.splitlines(keepends=True)
+    body = b"".join(lines[header_lines:])
+    if not body.endswith(b"\n"):
+        body += b"\n"
+    return b"".join(lines[:header_lines]) + body * scale
+
+
+def scale_weather(data, scale):
+    """지점 행을 복제하되 지점 이름이 겹치지 않게 '#2' 처럼 번호를 붙인다."""
+    if scale == 1:
+        return data
+    lines = data.decode("utf-8-sig").splitlines()
+    header, stations = lines[:2], lines[2:]
+    copies = [
+        line if copy == 1 else line.replace('",', f'#{copy}",', 1)
+        for copy in range(1, scale + 1) for line in stations
+    ]
+    return "\n".join(header + copies).encode("utf-8-sig")
+
+
+def synthetic_bookmarks(count, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ["서울", "시청", "강남", "카페", "맛집", "공원", "도서관", "병원", "학교", "역", "부산", "해운대", "시장"]
+    folders = ["기본", "여행", "맛집", "회사", "가족"]
+    icons = ["info-sign", "home", "star", "flag", "cloud", "heart", "gift", "leaf"]
+    lats = rng.uniform(33.2, 38.5, count)
+    lngs = rng.uniform(126.0, 129.5, count)
+    picks = rng.integers(0, len(words), (count, 3))
+    return [
+        {
+            "id": idx + 1,
+            "name": words[a] + words[b] + str(idx),
+            "folder": folders[idx % len(folders)],
+            "description": words[c] + " 근처",
+            "address": f"{words[a]}시 {words[b]}구 {idx % 300}번길",
+            "coords": [float(lats[idx]), float(lngs[idx])],
+            "icon": icons[idx % len(icons)],
+            "color": "blue",
+        }
+        for idx, (a, b, c) in enumerate(picks)
+    ]
+
+
+# ---------- 대시보드별 경로 ----------
+def bench_age(data, rec):
+    """tlrkrghk.py: 도/시/구 하나의 피라미드"""
+    with rec.stage("read_csv"):
+        df = population.read_mois_csv(data)
+    with rec.stage("read_csv_cached"):
+        df = population.read_mois_csv(data)
+    with rec.stage("split_regions"):
+        cube = population.build_age_cube(df)
+    with rec.stage("filter"):
+        tree = cube.tree
+        selected_do = tree.children_of(ROOT)[0]
+        selected_si = (tree.children_of(selected_do) or [selected_do])[0]
+        selected_gu = (tree.children_of(selected_si) or [None])[0]
+        selected_row = tree.rows_of(selected_gu or selected_si)[0]
+    with rec.stage("aggregate"):
+        bands = age_bands.BAND_SETS["5세 단위"]
+        sides = pyramid.sides_from_cube(cube, [selected_row], bands)
+    with rec.stage("figure"):
+        labels = [band[0] for band in bands]
+        fig = pyramid.pyramid_figure(labels, sides, f"{tree.full_name(selected_gu or selected_si)} 인구 피라미드")
+        fig.to_json()
+
+
+def bench_age_compare(data, rec):
+    """tlrkrghk2.py: 여러 지역 비교 (하위 지역 모두 / 선택 지역별 합계 / 압축 모드)"""
+    population.read_mois_csv(data)  # 파싱은 age 벤치마크에서 재므로 여기서는 캐시를 채워 두고 시작
+    with rec.stage("load_cube"):
+        cube = population.load_age_cube(data)
+    with rec.stage("filter"):
+        tree = cube.tree
+        selected_dos = tree.children_of(ROOT)[:1]
+        all_sis, _ = tree.child_options(selected_dos)
+        selected_sis = all_sis[:2]
+        selected_rows = tree.subtree_rows(selected_sis)
+    bands = age_bands.BAND_SETS["5세 단위"]
+    labels = [band[0] for band in bands]
+    with rec.stage("aggregate"):
+        sides = pyramid.sides_from_cube(cube, selected_rows, bands)
+        rolled = pyramid.sides_from_counts(age_bands.rollup(cube, selected_sis), cube.sexes, bands)
+    with rec.stage("figure"):
+        names = [cube.names[row] for row in selected_rows]
+        pyramid.comparison_figure(labels, [tree.full_name(code) for code in selected_sis], rolled).to_json()
+        pyramid.share_figure(labels, names, sides).to_json()
+    with rec.stage("figure_multiples"):
+        pyramid.small_multiples_figure(labels, names, sides).to_json()
+
+
+def bench_avg_age(data, rec):
+    """tlrkrghkqjwjstwo.py: 평균연령 남녀 비교"""
+    with rec.stage("read_csv"):
+        df = population.read_mois_csv(data)
+    with rec.stage("split_regions"):
+        df["행정구역명"] = [split_label(label)[0] for label in df["행정구역"]]
+        male_col = next(col for col in df.columns if col.endswith("남자 평균연령"))
+        female_col = next(col for col in df.columns if col.endswith("여자 평균연령"))
+        df["남자 평균연령"] = pd.to_numeric(df[male_col], errors="coerce")
+        df["여자 평균연령"] = pd.to_numeric(df[female_col], errors="coerce")
+        tree = RegionTree(df["행정구역"])
+    with rec.stage("filter"):
+        selected_do = tree.children_of(ROOT)[0]
+        selected_si = (tree.children_of(selected_do) or [selected_do])[0]
+        df_selected = df.iloc[tree.subtree_rows([selected_si])]
+    with rec.stage("aggregate"):
+        df_melted = df_selected.melt(
+            id_vars="행정구역명", value_vars=["남자 평균연령", "여자 평균연령"],
+            var_name="성별", value_name="평균연령"
+        )
+    with rec.stage("figure"):
+        fig = px.bar(df_melted, x="행정구역명", y="평균연령", color="성별", barmode="group")
+        fig.to_json()
+
+
+def bench_weather(data, rec):
+    """tlrkrghkqjwjsthree.py: 지점별 기상 시계열"""
+    with rec.stage("read_csv"):
+        cube = weather.parse_weather_csv(data)
+    with rec.stage("filter"):
+        stations, metrics = cube.stations[:3], cube.metrics[:2]
+        block = cube.select(stations, metrics)
+    with rec.stage("aggregate"):
+        rolled = weather.rolling_mean(cube.values, 3)
+        weather.climatology_anomaly(cube.values, cube.months)
+        block = cube.select(stations, metrics, rolled)
+    with rec.stage("figure"):
+        fig = make_subplots(rows=len(metrics), cols=1, shared_xaxes=True, subplot_titles=metrics)
+        for m_idx in range(len(metrics)):
+            for s_idx, station in enumerate(stations):
+                fig.add_trace(go.Scatter(
+                    x=cube.months, y=block[s_idx, :, m_idx], mode="lines+markers", name=station,
+                    legendgroup=station, showlegend=m_idx == 0
+                ), row=m_idx + 1, col=1)
+        fig.to_json()
+
+
+def bench_change(data, rec):
+    """tlrkrghkqjwjsfour.py: 법정동 인구 증감 (계층 합계 / 상위·하위 N / 페이지 / 트리맵·선버스트)"""
+    with rec.stage("read_csv"):
+        df = population.read_mois_csv(data)
+    with rec.stage("split_regions"):
+        df["증감_계"] = df[next(col for col in df.columns if col.endswith("인구증감_계"))]
+        df["증감_남"] = df[next(col for col in df.columns if col.endswith("인구증감_남자인구수"))]
+        df["증감_여"] = df[next(col for col in df.columns if col.endswith("인구증감_여자인구수"))]
+        df["인구"] = df[next(col for col in df.columns if col.endswith("당월인구수_계"))]
+        tree = RegionTree(df["법정구역"])
+    with rec.stage("rollup"):
+        rollup = change_rollup.Rollup(df, tree)
+    with rec.stage("filter"):
+        selected_codes = tree.children_of(ROOT)[:1]
+        filtered_df = df.iloc[tree.subtree_rows(selected_codes)]
+    with rec.stage("aggregate"):
+        level_df = rollup.frame(change_chart.level_codes(rollup, [], ROOT))
+        drill_df = rollup.frame(selected_codes + rollup.children_of(selected_codes[0]))
+        leaf_codes = [leaf for code in selected_codes for leaf in tree.leaves(code)]
+        top_df = change_chart.top_bottom(df.iloc[tree.subtree_rows(leaf_codes)], "증감_계", 20)
+        page_df = change_chart.page(filtered_df, 1, 2000)
+    with rec.stage("check"):
+        rollup.check()
+    with rec.stage("figure"):
+        for chart_df in (level_df, drill_df, top_df, page_df):
+            change_chart.change_figure(chart_df, "증감_계", "인구 증감").to_json()
+        for kind in ("treemap", "sunburst"):
+            for code in (ROOT, selected_codes[0]):
+                change_chart.hierarchy_figure(rollup, code, "증감_계", "인구 증감", kind).to_json()
+
+
+def bench_markers(bookmarks, rec):
+    """main.py: 북마크 모음/검색 색인 -> 화면 범위 마커 배열 -> 지도 HTML"""
+    with rec.stage("collection"):
+        collection = bookmark_collection.BookmarkCollection(bookmarks)
+    with rec.stage("search_index"):
+        search = search_index.SearchIndex(collection)
+    with rec.stage("filter"):
+        hits = search.search("서울")
+        search.search("ㅅㅇ")
+        matched = collection.select(hits)
+        collection.view("이름순")[:20]
+    with rec.stage("aggregate"):
+        colors = {"여행": "red", "맛집": "green"}
+        wide = spatial_index.view_bbox([36.0, 127.8], 7).padded()
+        near = spatial_index.view_bbox([37.55, 126.98], 16).padded()
+        marker_layer.marker_rows(marker_layer.bookmark_index(matched), matched, colors, wide, 7)
+        # 색인은 필터마다 한 번 만들고 화면이 바뀔 때는 query / cluster 만 다시 한다
+        latest = collection.view("최신순")
+        index = marker_layer.bookmark_index(latest)
+        payload = marker_layer.marker_rows(index, latest, colors, near, 16)
+        payload = marker_layer.marker_rows(index, latest, colors, wide, 12)
+    with rec.stage("figure"):
+        import folium
+
+        m = folium.Map(location=[36.0, 127.8], zoom_start=12)
+        marker_layer.build_layer(payload).add_to(m)
+        m.get_root().render()
+
+
+BENCHMARKS = {
+    "age": ("age", bench_age),
+    "age_compare": ("age", bench_age_compare),
+    "avg_age": ("avg_age", bench_avg_age),
+    "weather": ("weather", bench_weather),
+    "change": ("change", bench_change),
+    "markers": (None, bench_markers),
+}
+
+
+def make_input(source, scale):
+    if source is None:
+        return synthetic_bookmarks(BOOKMARKS_PER_SCALE * scale)
+    data = (HERE / DATA_FILES[source]).read_bytes()
+    if source == "weather":
+        return scale_weather(data, scale)
+    return scale_rows(data, scale)
+
+
+def run_one(fn, data, repeat):
+    """반복 실행 중 단계별 최소 시간 + 메모리 추적 실행 한 번의 최대 메모리"""
+    timings = {}
+    with tempfile.TemporaryDirectory() as cache_root:
+        for run in range(repeat + 1):
+            # 실행마다 빈 캐시 폴더를 써서 read_csv 는 항상 처음 읽는 경우를 잰다
+            columnar_cache.CACHE_DIR = Path(cache_root) / str(run)
+            trace = run == repeat
+            if trace:
+                tracemalloc.start()
+            rec = Recorder(trace_memory=trace)
+            try:
+                fn(data, rec)
+            finally:
+                if trace:
+                    tracemalloc.stop()
+            for name, result in rec.stages.items():
+                entry = timings.setdefault(name, {"seconds": float("inf")})
+                if trace:
+                    entry["peak_mb"] = round(result["peak_mb"], 2)
+                else:
+                    entry["seconds"] = min(entry["seconds"], result["seconds"])
+    for entry in timings.values():
+        entry["seconds"] = round(entry["seconds"], 5)
+    return timings
+
+
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """[(벤치마크, 배율, 단계, 메시지)] 느려졌거나 메모리를 더 쓴 단계 목록"""
+    regressions = []
+    for name, by_scale in results.items():
+        for scale, stages in by_scale.items():
+            base_stages = baseline.get(name, {}).get(scale, {})
+            for stage, current in stages.items():
+                base = base_stages.get(stage)
+                if base is None:
+                    continue
+                slower = current["seconds"] - base["seconds"]
+                if slower > MIN_TIME_DIFF and current["seconds"] > base["seconds"] * (1 + time_tolerance):
+                    regressions.append((name, scale, stage, f"시간 {base['seconds']:.4f}s -> {current['seconds']:.4f}s"))
+                if "peak_mb" in current and "peak_mb" in base:
+                    more = current["peak_mb"] - base["peak_mb"]
+                    if more > MIN_MEMORY_DIFF and current["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance):
+                        regressions.append((name, scale, stage, f"메모리 {base['peak_mb']:.1f}MB -> {current['peak_mb']:.1f}MB"))
+    return regressions
+
+
+def print_table(results, baseline):
+    print(f"{'벤치마크':<12} {'배율':>4} {'단계':<18} {'시간(ms)':>10} {'기준(ms)':>10} {'메모리(MB)':>11} {'기준(MB)':>9}")
+    for name, by_scale in results.items():
+        for scale, stages in by_scale.items():
+            base_stages = baseline.get(name, {}).get(scale, {})
+            for stage, current in stages.items():
+                base = base_stages.get(stage, {})
+                base_ms = f"{base['seconds'] * 1000:10.1f}" if "seconds" in base else f"{'-':>10}"
+                base_mb = f"{base['peak_mb']:9.1f}" if "peak_mb" in base else f"{'-':>9}"
+                print(f"{name:<12} {scale:>4} {stage:<18} {current['seconds'] * 1000:10.1f} {base_ms} "
+                      f"{current['peak_mb']:11.1f} {base_mb}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="대시보드 데이터 경로 벤치마크")
+    parser.add_argument("--scale", type=int, nargs="+", default=list(DEFAULT_SCALES), help="데이터 배율 (기본 1 10)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="일부 벤치마크만")
+    parser.add_argument("--repeat", type=int, default=3, help="시간 측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="현재 결과를 기준값 파일에 저장 (있는 항목만 덮어씀)")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="허용하는 시간 증가 비율")
+    parser.add_argument("--output", type=Path, help="결과를 JSON 으로 저장")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    base_results = baseline.get("results", {})
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        source, fn = BENCHMARKS[name]
+        for scale in args.scale:
+            print(f"▶ {name} x{scale}", file=sys.stderr, flush=True)
+            data = make_input(source, scale)
+            results.setdefault(name, {})[f"x{scale}"] = run_one(fn, data, args.repeat)
+            del data
+
+    print_table(results, base_results)
+    if args.output:
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    if args.update_baseline:
+        for name, by_scale in results.items():
+            base_results.setdefault(name, {}).update(by_scale)
+        baseline = {
+            "machine": f"{platform.machine()} / {platform.python_implementation()} {platform.python_version()}",
+            "updated": date.today().isoformat(),
+            "results": base_results,
+        }
+        args.baseline.write_text(json.dumps(baseline, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+        print(f"기준값 저장: {args.baseline}")
+        return 0
+
+    regressions = compare(results, base_results, time_tolerance=args.tolerance)
+    if regressions:
+        print(f"\n❌ 기준보다 나빠진 단계 {len(regressions)}개")
+        for name, scale, stage, message in regressions:
+            print(f"  {name} {scale} {stage}: {message}")
+        return 1
+    print("\n✅ 기준 대비 느려진 단계 없음" if base_results else "\n(기준값 없음: --update-baseline 으로 저장하세요)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import bisect
+from collections import Counter
+from collections.abc import Sequence
+
+# 북마크 모음 (id -> 북마크 dict)
+# - 추가/수정/삭제는 id 로 바로 찾는다
+# - 정렬 순서(이름순/폴더순/최신순)를 전체와 폴더별로 미리 정렬해 두고 바뀐 북마크만 끼우거나 뺀다
+# - 화면에는 BookmarkView 로 필요한 부분(한 페이지)만 꺼내 쓴다
+
+SORT_KEYS = {
+    "이름순": lambda bm: (bm["name"], bm["id"]),
+    "폴더순": lambda bm: (bm["folder"], bm["name"], bm["id"]),
+    "최신순": lambda bm: (-bm["id"],),
+}
+ALL_FOLDERS = None
+
+
+class _Order:
+    """정렬 키 목록과 같은 순서의 id 목록"""
+
+    def __init__(self, entries=()):
+        self.keys = [key for key, _ in entries]
+        self.ids = [bid for _, bid in entries]
+
+    def insert(self, key, bid):
+        pos = bisect.bisect_left(self.keys, key)
+        self.keys.insert(pos, key)
+        self.ids.insert(pos, bid)
+
+    def remove(self, key):
+        pos = bisect.bisect_left(self.keys, key)
+        del self.keys[pos]
+        del self.ids[pos]
+
+
+class BookmarkView(Sequence):
+    """id 목록 위에 얹은 읽기 전용 목록. 잘라도(slice) 북마크를 복사하지 않는다."""
+
+    def __init__(self, items, ids):
+        self._items = items
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return BookmarkView(self._items, self.ids[index])
+        return self._items[self.ids[index]]
+
+
+class BookmarkCollection:
+    def __init__(self, bookmarks=()):
+        self.items = {bm["id"]: bm for bm in bookmarks}
+        self.folder_counts = Counter(bm["folder"] for bm in self.items.values())
+        # 처음에는 한 번에 정렬하고, 폴더별 순서는 전체 순서를 나눠서 만든다
+        self._orders = {}
+        for sort, sort_key in SORT_KEYS.items():
+            entries = sorted((sort_key(bm), bid) for bid, bm in self.items.items())
+            self._orders[ALL_FOLDERS, sort] = _Order(entries)
+            by_folder = {}
+            for key, bid in entries:
+                by_folder.setdefault(self.items[bid]["folder"], []).append((key, bid))
+            for folder, folder_entries in by_folder.items():
+                self._orders[folder, sort] = _Order(folder_entries)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __contains__(self, bid):
+        return bid in self.items
+
+    def __getitem__(self, bid):
+        return self.items[bid]
+
+    def folders(self):
+        return sorted(self.folder_counts)
+
+    def view(self, sort, folder=ALL_FOLDERS):
+        order = self._orders.get((folder, sort))
+        return BookmarkView(self.items, order.ids if order else [])
+
+    def select(self, ids, folder=ALL_FOLDERS):
+        """검색 결과처럼 이미 순서가 정해진 id 목록을 폴더로 거른다."""
+        ids = [bid for bid in ids if bid in self.items]
+        if folder is not ALL_FOLDERS:
+            ids = [bid for bid in ids if self.items[bid]["folder"] == folder]
+        return BookmarkView(self.items, ids)
+
+    def add(self, bookmark):
+        bid = bookmark["id"]
+        if bid in self.items:
+            self.remove(bid)
+        self.items[bid] = bookmark
+        self.folder_counts[bookmark["folder"]] += 1
+        for sort, sort_key in SORT_KEYS.items():
+            key = sort_key(bookmark)
+            for folder in (ALL_FOLDERS, bookmark["folder"]):
+                self._orders.setdefault((folder, sort), _Order()).insert(key, bid)
+
+    def update(self, bid, **fields):
+        """정렬에 쓰이는 필드가 바뀌면 그 북마크만 뺐다가 다시 끼운다."""
+        bookmark = self.remove(bid)
+        bookmark.update(fields)
+        self.add(bookmark)
+        return bookmark
+
+    def remove(self, bid):
+        bookmark = self.items.pop(bid)
+        folder = bookmark["folder"]
+        self.folder_counts[folder] -= 1
+        if not self.folder_counts[folder]:
+            del self.folder_counts[folder]
+        for sort, sort_key in SORT_KEYS.items():
+            key = sort_key(bookmark)
+            self._orders[ALL_FOLDERS, sort].remove(key)
+            self._orders[folder, sort].remove(key)
+            if not self._orders[folder, sort].ids:
+                del self._orders[folder, sort]
+        return bookmark
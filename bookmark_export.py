@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+from itertools import islice
+
+# 북마크 내보내기 (CSV / GeoJSON / Parquet)
+# - 다운로드 버튼을 눌렀을 때만 만든다 (main.py 에서 st.download_button 에 함수로 넘김)
+# - 북마크를 CHUNK_ROWS 개씩 읽어 바로 파일에 쓰므로 전체 목록이나 DataFrame 을 따로 만들지 않는다
+
+# 형식 이름 -> (확장자, MIME)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "GeoJSON": ("geojson", "application/geo+json"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+# lat/lng 를 따로 두어 GIS 도구에서 바로 읽고, bookmark_import 로 다시 가져올 수도 있게 한다
+COLUMNS = ("name", "folder", "description", "address", "lat", "lng", "icon", "color")
+CHUNK_ROWS = 5_000
+
+
+def _chunks(bookmarks, size=CHUNK_ROWS):
+    it = iter(bookmarks)
+    while chunk := list(islice(it, size)):
+        yield chunk
+
+
+def _row(bm):
+    lat, lng = bm["coords"]
+    return (bm["name"], bm["folder"], bm.get("description", ""), bm.get("address", ""),
+            lat, lng, bm["icon"], bm.get("color", "blue"))
+
+
+def iter_csv(bookmarks):
+    """CSV 텍스트 조각 (엑셀에서 한글이 깨지지 않게 BOM 으로 시작)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    yield "\ufeff" + buffer.getvalue()
+    for chunk in _chunks(bookmarks):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_row(bm) for bm in chunk)
+        yield buffer.getvalue()
+
+
+def iter_geojson(bookmarks):
+    """Point FeatureCollection 텍스트 조각"""
+    yield '{"type": "FeatureCollection", "features": ['
+    first = True
+    for chunk in _chunks(bookmarks):
+        features = []
+        for bm in chunk:
+            name, folder, description, address, lat, lng, icon, color = _row(bm)
+            features.append(json.dumps({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lng, lat]},  # GeoJSON 은 [경도, 위도]
+                "properties": {"name": name, "folder": folder, "description": description,
+                               "address": address, "icon": icon, "color": color},
+            }, ensure_ascii=False))
+        yield ("" if first else ",\n") + ",\n".join(features)
+        first = False
+    yield "]}\n"
+
+
+def write_parquet(bookmarks, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (col, pa.float64() if col in ("lat", "lng") else pa.string()) for col in COLUMNS
+    ])
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in _chunks(bookmarks):
+            columns = list(zip(*(_row(bm) for bm in chunk)))
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+        # 북마크가 없어도 열 이름만 있는 파일은 만들어진다
+
+
+def export(bookmarks, fmt, out=None):
+    """bookmarks(한 번 훑을 수 있으면 됨) 를 fmt 형식으로 out(바이너리 파일) 에 쓴다.
+
+    out 이 없으면 BytesIO 에 써서 처음 위치로 되감아 돌려준다.
+    """
+    out = io.BytesIO() if out is None else out
+    if fmt == "Parquet":
+        write_parquet(bookmarks, out)
+    else:
+        pieces = iter_csv(bookmarks) if fmt == "CSV" else iter_geojson(bookmarks)
+        for piece in pieces:
+            out.write(piece.encode("utf-8"))
+    if isinstance(out, io.BytesIO):
+        out.seek(0)
+    return out
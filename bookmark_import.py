@@ -0,0 +1,190 @@
+import ast
+import csv
+import io
+import json
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 북마크 대량 가져오기 (CSV / GeoJSON)
+# - 파일을 한 번에 다 올리지 않고 한 줄(한 feature)씩 읽는다
+# - 이미 있는 북마크와 겹치는 것은 건너뛴다
+# - 좌표가 없는 줄만 지오코딩하며, 동시에 기다리는 요청 수는 작업자 수로 제한한다
+
+# 여러 이름으로 들어오는 컬럼을 북마크 필드로 맞춘다 (main.py 의 CSV 다운로드 형식 포함)
+FIELD_ALIASES = {
+    "name": ("name", "이름", "title"),
+    "folder": ("folder", "폴더"),
+    "description": ("description", "설명", "desc"),
+    "address": ("address", "주소"),
+    "lat": ("lat", "latitude", "위도", "y"),
+    "lng": ("lng", "lon", "long", "longitude", "경도", "x"),
+    "coords": ("coords",),
+    "icon": ("icon", "아이콘"),
+}
+CHUNK_SIZE = 64 * 1024
+
+
+def _pick(record, field):
+    for alias in FIELD_ALIASES[field]:
+        value = record.get(alias)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_row(record):
+    """파일 한 줄 -> 북마크 필드 dict (coords 는 없으면 None)"""
+    lat, lng = _to_float(_pick(record, "lat")), _to_float(_pick(record, "lng"))
+    coords = _pick(record, "coords")
+    if (lat is None or lng is None) and coords:
+        # 다운로드한 CSV 의 "[37.5, 126.9]" 형식
+        try:
+            lat, lng = (float(v) for v in (ast.literal_eval(coords) if isinstance(coords, str) else coords))
+        except (ValueError, SyntaxError, TypeError):
+            lat = lng = None
+
+    return {
+        "name": str(_pick(record, "name") or "").strip(),
+        "folder": str(_pick(record, "folder") or "기본").strip(),
+        "description": str(_pick(record, "description") or "").strip(),
+        "address": str(_pick(record, "address") or "").strip(),
+        "coords": [lat, lng] if lat is not None and lng is not None else None,
+        "icon": str(_pick(record, "icon") or "").strip(),
+    }
+
+
+def iter_csv(binary):
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig", newline="")
+    try:
+        for record in csv.DictReader(text):
+            yield normalize_row({key.strip().lower(): value for key, value in record.items() if key})
+    finally:
+        text.detach()  # 업로드 파일 객체는 닫지 않는다
+
+
+def iter_geojson(binary):
+    """FeatureCollection 의 features 배열을 조각씩 읽으며 feature 를 하나씩 꺼낸다."""
+    decoder = json.JSONDecoder()
+    text = io.TextIOWrapper(binary, encoding="utf-8-sig")
+    buffer, pos, in_array = "", 0, False
+    try:
+        while True:
+            chunk = text.read(CHUNK_SIZE)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            if not in_array:
+                start = buffer.find('"features"')
+                bracket = buffer.find("[", start) if start >= 0 else -1
+                if bracket < 0:
+                    if not chunk:
+                        return
+                    continue
+                pos, in_array = bracket + 1, True
+
+            while True:
+                # 공백/쉼표 건너뛰기
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) and buffer[pos] == "]":
+                    return
+                try:
+                    feature, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    break  # feature 가 잘렸으니 다음 조각을 더 읽는다
+                pos = end
+                yield _feature_row(feature)
+
+            if not chunk:
+                return
+    finally:
+        text.detach()
+
+
+def _feature_row(feature):
+    record = dict(feature.get("properties") or {})
+    geometry = feature.get("geometry") or {}
+    if geometry.get("type") == "Point" and len(geometry.get("coordinates") or []) >= 2:
+        record["lng"], record["lat"] = geometry["coordinates"][:2]  # GeoJSON 은 [경도, 위도]
+    return normalize_row({str(key).lower(): value for key, value in record.items()})
+
+
+def iter_file(uploaded_file):
+    name = uploaded_file.name.lower()
+    if name.endswith((".geojson", ".json")):
+        return iter_geojson(uploaded_file)
+    return iter_csv(uploaded_file)
+
+
+def _norm(text):
+    return " ".join(unicodedata.normalize("NFC", text or "").split()).lower()
+
+
+def dedupe_key(bookmark):
+    """같은 이름 + 같은 위치(소수점 5자리, 약 1m) 또는 같은 주소면 같은 북마크로 본다."""
+    if bookmark.get("coords"):
+        lat, lng = bookmark["coords"]
+        return _norm(bookmark["name"]), round(lat, 5), round(lng, 5)
+    return _norm(bookmark["name"]), _norm(bookmark.get("address"))
+
+
+def import_bookmarks(rows, existing, geocoder, icons, folder_colors, max_workers=4, timeout=60, progress=None):
+    """rows 를 북마크로 만든다. (새 북마크 목록, 통계 dict) 를 돌려준다.
+
+    progress(done, total) 은 지오코딩이 하나 끝날 때마다 불린다.
+    """
+    seen = set()
+    for bookmark in existing:
+        seen.add(dedupe_key(bookmark))
+        seen.add((_norm(bookmark["name"]), _norm(bookmark.get("address"))))
+
+    stats = {"read": 0, "duplicate": 0, "invalid": 0, "geocoded": 0, "not_found": 0}
+    ready, pending = [], []
+    for row in rows:
+        stats["read"] += 1
+        if not row["name"] or (row["coords"] is None and not row["address"]):
+            stats["invalid"] += 1
+            continue
+        key = dedupe_key(row)
+        if key in seen:
+            stats["duplicate"] += 1
+            continue
+        seen.add(key)
+        (ready if row["coords"] else pending).append(row)
+
+    # 좌표 없는 줄만 지오코딩 (지오코더 큐가 속도 제한을 지킨다)
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(geocoder.geocode, row["address"], timeout): row for row in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = futures[future]
+                try:
+                    loc = future.result()
+                except Exception:
+                    loc = None
+                if loc is None:
+                    stats["not_found"] += 1
+                else:
+                    row["coords"] = [loc.latitude, loc.longitude]
+                    row["address"] = loc.address
+                    if dedupe_key(row) in seen:
+                        stats["duplicate"] += 1
+                    else:
+                        seen.add(dedupe_key(row))
+                        ready.append(row)
+                        stats["geocoded"] += 1
+                if progress:
+                    progress(done, len(pending))
+
+    for row in ready:
+        if row["icon"] not in icons:
+            row["icon"] = icons[0]
+        row["color"] = folder_colors.get(row["folder"], "blue")
+    stats["added"] = len(ready)
+    return ready, stats
@@ -0,0 +1,206 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# 사용자 / 북마크 / 폴더 색상 저장소 (SQLite, WAL 모드)
+# - 브라우저를 새로고침하거나 서버를 다시 켜도 남아 있고, 여러 세션이 같이 쓴다
+# - 추가/수정/삭제는 바뀐 행 하나만 쓴다
+# - 비밀번호는 PBKDF2 로 해시해서 저장한다
+
+DB_PATH = Path(os.environ.get("BOOKMARK_DB_PATH", Path(__file__).parent / "data_store" / "bookmarks.sqlite3"))
+DEFAULT_CENTER = [37.5665, 126.9780]
+PBKDF2_ROUNDS = 200_000
+BOOKMARK_FIELDS = ("name", "folder", "description", "address", "lat", "lng", "icon", "color")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    name TEXT PRIMARY KEY,
+    pw_hash BLOB NOT NULL,
+    salt BLOB NOT NULL,
+    center_lat REAL NOT NULL,
+    center_lng REAL NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL REFERENCES users(name) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    address TEXT NOT NULL DEFAULT '',
+    lat REAL NOT NULL,
+    lng REAL NOT NULL,
+    icon TEXT NOT NULL,
+    color TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookmarks_by_user ON bookmarks(user, id);
+CREATE INDEX IF NOT EXISTS bookmarks_by_folder ON bookmarks(user, folder);
+CREATE TABLE IF NOT EXISTS folder_colors (
+    user TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    color TEXT NOT NULL,
+    PRIMARY KEY (user, folder)
+) WITHOUT ROWID;
+"""
+
+
+def hash_password(password, salt):
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PBKDF2_ROUNDS)
+
+
+def _row_to_bookmark(row):
+    bookmark_id, name, folder, description, address, lat, lng, icon, color = row
+    return {
+        "id": bookmark_id,
+        "name": name,
+        "folder": folder,
+        "description": description,
+        "address": address,
+        "coords": [lat, lng],
+        "icon": icon,
+        "color": color,
+    }
+
+
+def _bookmark_values(bookmark):
+    lat, lng = bookmark["coords"]
+    return (
+        bookmark["name"], bookmark["folder"], bookmark.get("description", ""), bookmark.get("address", ""),
+        lat, lng, bookmark["icon"], bookmark.get("color", "blue"),
+    )
+
+
+class BookmarkStore:
+    """프로세스에 하나 만들어 공유한다. SQLite 연결은 스레드(세션)마다 따로 연다."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+            if "revision" not in columns:  # 예전 DB 파일
+                conn.execute("ALTER TABLE users ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")  # 읽기와 쓰기가 서로 막지 않게
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # ---------- 사용자 ----------
+    def login(self, name, password):
+        """없으면 가입시키고 True, 있으면 비밀번호가 맞을 때만 True."""
+        with self._conn() as conn:
+            row = conn.execute("SELECT pw_hash, salt FROM users WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                salt = secrets.token_bytes(16)
+                conn.execute(
+                    "INSERT INTO users (name, pw_hash, salt, center_lat, center_lng) VALUES (?, ?, ?, ?, ?)",
+                    (name, hash_password(password, salt), salt, *DEFAULT_CENTER),
+                )
+                return True
+            pw_hash, salt = row
+            return hmac.compare_digest(pw_hash, hash_password(password, salt))
+
+    def revision(self, user):
+        """북마크나 폴더 색상이 바뀔 때마다 1씩 올라가는 번호. 화면 캐시의 키로 쓴다."""
+        row = self._conn().execute("SELECT revision FROM users WHERE name = ?", (user,)).fetchone()
+        return row[0] if row else 0
+
+    def _bump(self, conn, user):
+        conn.execute("UPDATE users SET revision = revision + 1 WHERE name = ?", (user,))
+
+    def map_center(self, user):
+        row = self._conn().execute("SELECT center_lat, center_lng FROM users WHERE name = ?", (user,)).fetchone()
+        return list(row) if row else list(DEFAULT_CENTER)
+
+    def set_map_center(self, user, center):
+        with self._conn() as conn:
+            conn.execute("UPDATE users SET center_lat = ?, center_lng = ? WHERE name = ?", (*center, user))
+
+    # ---------- 폴더 색상 ----------
+    def folder_colors(self, user):
+        rows = self._conn().execute("SELECT folder, color FROM folder_colors WHERE user = ?", (user,))
+        return dict(rows.fetchall())
+
+    def set_folder_color(self, user, folder, color):
+        with self._conn() as conn:
+            conn.execute("INSERT OR REPLACE INTO folder_colors VALUES (?, ?, ?)", (user, folder, color))
+            conn.execute("UPDATE bookmarks SET color = ? WHERE user = ? AND folder = ?", (color, user, folder))
+            self._bump(conn, user)
+
+    # ---------- 북마크 ----------
+    def bookmarks(self, user):
+        """추가한 순서대로"""
+        return list(self.iter_bookmarks(user))
+
+    def iter_bookmarks(self, user, folder=None):
+        """목록을 만들지 않고 커서에서 한 줄씩 꺼낸다 (내보내기용). folder 를 주면 그 폴더만."""
+        sql = "SELECT id, name, folder, description, address, lat, lng, icon, color FROM bookmarks WHERE user = ?"
+        params = (user,)
+        if folder is not None:
+            sql += " AND folder = ?"
+            params += (folder,)
+        for row in self._conn().execute(sql + " ORDER BY id", params):
+            yield _row_to_bookmark(row)
+
+    def add_bookmark(self, user, bookmark):
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "INSERT INTO bookmarks (user, name, folder, description, address, lat, lng, icon, color, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user, *_bookmark_values(bookmark), time.time()),
+            )
+            self._bump(conn, user)
+            return cursor.lastrowid
+
+    def add_bookmarks(self, user, bookmarks):
+        """여러 개를 트랜잭션 하나로"""
+        now = time.time()
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO bookmarks (user, name, folder, description, address, lat, lng, icon, color, created_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(user, *_bookmark_values(bookmark), now) for bookmark in bookmarks],
+            )
+            self._bump(conn, user)
+
+    def update_bookmark(self, user, bookmark_id, **fields):
+        """바뀐 필드만 UPDATE 한다. coords 는 lat/lng 로 나눠 저장."""
+        if "coords" in fields:
+            fields["lat"], fields["lng"] = fields.pop("coords")
+        columns = [key for key in fields if key in BOOKMARK_FIELDS]
+        if not columns:
+            return
+        with self._conn() as conn:
+            conn.execute(
+                f"UPDATE bookmarks SET {', '.join(f'{col} = ?' for col in columns)} WHERE id = ? AND user = ?",
+                (*(fields[col] for col in columns), bookmark_id, user),
+            )
+            self._bump(conn, user)
+
+    def delete_bookmark(self, user, bookmark_id):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM bookmarks WHERE id = ? AND user = ?", (bookmark_id, user))
+            self._bump(conn, user)
+
+    def reset_user(self, user):
+        """북마크, 폴더 색상, 지도 중심 초기화 (계정은 남긴다)"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM bookmarks WHERE user = ?", (user,))
+            conn.execute("DELETE FROM folder_colors WHERE user = ?", (user,))
+            conn.execute("UPDATE users SET center_lat = ?, center_lng = ? WHERE name = ?", (*DEFAULT_CENTER, user))
+            self._bump(conn, user)
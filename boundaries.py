@@ -0,0 +1,436 @@
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+import spatial_index
+
+# 행정구역 경계 (단계구분도 지도용)
+# - 원본 경계 GeoJSON 을 한 번 전처리해(python boundaries.py 읍면동.geojson ...) boundary_data/ 에 둔다
+# - 단계(시도/시군구/읍면동)마다, 그 단계를 보여 주는 확대 수준마다 미리 단순화해 따로 저장한다
+#   (허용 오차 = 그 확대 수준의 화면 1픽셀이라 단순화한 티가 나지 않는다)
+# - 이웃 지역과 같이 쓰는 경계는 두 지역에서 따로 단순화하면 서로 다르게 깎여 틈이 벌어지므로,
+#   같이 쓰는 구간이 시작/끝나는 점을 고정하고 그 사이 구간(arc)을 양쪽이 같은 방향으로 한 번씩만 단순화한다
+#   (원본에서 두 지역의 경계 점이 1e-5도 단위로 같을 때만 같은 구간으로 알아본다)
+# - 좌표는 1e-5도(약 1m) 정수로 바꿔 바로 앞 점과의 차이만 저장한다 (npz 압축, 원본 GeoJSON 의 1/10 정도)
+# - 지도는 지금 확대 수준의 단계 하나, 화면 근처에 걸친 지역만 GeoJSON 으로 만들어 보낸다
+
+DATA_DIR = Path(__file__).parent / "boundary_data"
+SCALE = 100_000  # 1e-5도 단위 정수 좌표
+SIMPLIFY_PX = 1.0  # 단순화 허용 오차 (화면 픽셀)
+REF_LAT = 36.5  # 경도 1도와 위도 1도의 화면 길이 비를 맞출 때 쓰는 기준 위도 (남한 가운데쯤)
+
+# (단계, 이 확대 수준부터 보여 줌, 미리 단순화해 둘 확대 수준들)
+LEVELS = [
+    ("시도", 0, (5, 7)),
+    ("시군구", 9, (9,)),
+    ("읍면동", 11, (11, 13)),
+]
+LEVEL_NAMES = [level for level, _, _ in LEVELS]
+
+# 경계 파일에서 행정코드/이름이 들어 있을 만한 속성 (행정안전부 행정코드 기준, 짧으면 뒤를 0으로 채운다)
+CODE_PROPS = ("adm_cd2", "code", "sgg", "sido", "SIG_CD", "CTPRVN_CD", "adm_cd")
+
+
+def level_of(code):
+    """행정코드 10자리 -> 단계 이름"""
+    if code[2:] == "0" * 8:
+        return "시도"
+    if code[5:] == "0" * 5:
+        return "시군구"
+    return "읍면동"
+
+
+def level_for_zoom(zoom):
+    current = LEVELS[0]
+    for level in LEVELS:
+        if zoom >= level[1]:
+            current = level
+    return current[0]
+
+
+def resolution_for_zoom(level, zoom):
+    """level 을 zoom 에서 그릴 때 쓸 단순화 단계 (zoom 보다 크지 않은 것 중 가장 자세한 것)"""
+    zooms = dict((name, res) for name, _, res in LEVELS)[level]
+    return max([z for z in zooms if z <= zoom] or [zooms[0]])
+
+
+# --- 전처리 ---
+
+def _douglas_peucker(points, tolerance):
+    """points 의 처음/끝 점을 잇는 선에서 tolerance 안에 드는 점을 뺀다. 남길 점 표시(bool 배열)."""
+    n = len(points)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = points[start], points[end]
+        rest = points[start + 1:end] - a
+        d = b - a
+        norm = math.hypot(d[0], d[1])
+        if norm == 0:  # 닫힌 고리의 처음/끝처럼 두 점이 같으면 그 점과의 거리
+            dist = np.hypot(rest[:, 0], rest[:, 1])
+        else:
+            dist = np.abs(d[0] * rest[:, 1] - d[1] * rest[:, 0]) / norm
+        idx = int(np.argmax(dist))
+        if dist[idx] > tolerance:
+            mid = start + 1 + idx
+            keep[mid] = True
+            stack.append((start, mid))
+            stack.append((mid, end))
+    return keep
+
+
+def _min_ring(keep):
+    if keep.sum() < 4:  # 너무 작은 고리도 모양은 남긴다
+        keep[np.linspace(0, len(keep) - 1, 4).round().astype(int)] = True
+    return keep
+
+
+def simplify_ring(points, tolerance, fixed=None):
+    """Douglas-Peucker. points: (n, 2) 배열 [경도, 위도*비율], 첫 점 = 끝 점. 최소 4점(삼각형)은 남긴다.
+
+    fixed: 꼭 남길 점 표시. 있으면 고정점 사이 구간마다 따로 단순화한다 (구간은 끝점 좌표가 작은 쪽에서 시작해,
+    이웃 지역이 같은 구간을 거꾸로 돌아도 같은 점이 남는다).
+    """
+    n = len(points)
+    if n <= 4:
+        return points
+    if fixed is None or not fixed[1:-1].any():
+        return points[_min_ring(_douglas_peucker(points, tolerance))]
+    keep = fixed.copy()
+    keep[0] = keep[-1] = True
+    stops = np.flatnonzero(keep)
+    for start, end in zip(stops[:-1], stops[1:]):
+        arc = points[start:end + 1]
+        if tuple(arc[-1]) < tuple(arc[0]):
+            keep[start:end + 1] |= _douglas_peucker(arc[::-1], tolerance)[::-1]
+        else:
+            keep[start:end + 1] |= _douglas_peucker(arc, tolerance)
+    return points[_min_ring(keep)]
+
+
+def _shared_stops(shapes):
+    """{코드: 폴리곤들} -> 고리마다 (시작점을 맞춰 돌린 고리, 고정점 표시). 코드 순 -> 폴리곤 -> 고리 순서.
+
+    변(이웃한 두 점)마다 그 변을 쓰는 지역들을 보고, 들어오는 변과 나가는 변을 쓰는 이웃이 다른 점을 고정한다
+    (같이 쓰는 구간의 양 끝, 세 지역이 만나는 점). 점 하나만 우연히 겹치는 것은 구간으로 보지 않는다.
+    고리는 고정점(없으면 가장 작은 좌표)에서 시작하도록 돌려 두 이웃의 구간 나눔이 같게 한다.
+    """
+    rings = [(code_id, np.asarray(ring)) for code_id, code in enumerate(sorted(shapes))
+             for polygon in shapes[code] for ring in polygon]
+    if not rings:
+        return []
+    quantized = [np.round(ring * SCALE).astype(np.int64) for _, ring in rings]
+    ends, owners = [], []
+    for (code_id, _), q in zip(rings, quantized):
+        keys = q[:, 0] * (1 << 26) + q[:, 1]
+        ends.append(np.stack([np.minimum(keys[:-1], keys[1:]), np.maximum(keys[:-1], keys[1:])], axis=1))
+        owners.append(np.full(len(q) - 1, code_id))
+    ends, owners = np.concatenate(ends), np.concatenate(owners)
+    # 같은 변끼리 번호 매기기 (np.unique(axis=0) 보다 정렬 한 번이 훨씬 빠르다)
+    order = np.lexsort((ends[:, 1], ends[:, 0]))
+    ordered = ends[order]
+    edge = np.empty(len(ends), dtype=np.int64)
+    edge[order] = np.cumsum(np.r_[True, np.any(ordered[1:] != ordered[:-1], axis=1)]) - 1
+
+    # 변 -> (쓰는 지역 수, 가장 작은 지역, 가장 큰 지역). 둘까지는 이것으로 어느 이웃과 같이 쓰는지 알 수 있다
+    pairs = np.unique(edge * len(shapes) + owners)
+    pair_edge, pair_owner = pairs // len(shapes), pairs % len(shapes)
+    count = np.bincount(pair_edge)
+    low, high = np.empty_like(count), np.empty_like(count)
+    low[pair_edge[::-1]] = pair_owner[::-1]
+    high[pair_edge] = pair_owner
+    signature = np.stack([count[edge], low[edge], high[edge]], axis=1)
+
+    result = []
+    offset = 0
+    for (_, ring), q in zip(rings, quantized):
+        out = signature[offset:offset + len(q) - 1]  # 점 i 에서 나가는 변 (고리는 첫 점 = 끝 점)
+        offset += len(q) - 1
+        fixed = np.any(out != np.roll(out, 1, axis=0), axis=1)
+        if fixed.any():
+            start = int(np.argmax(fixed))
+        else:
+            start = int(np.lexsort((q[:-1, 1], q[:-1, 0]))[0])
+        order = np.r_[np.arange(start, len(q) - 1), np.arange(0, start), start]
+        result.append((ring[order], np.r_[fixed, fixed[:1]][order]))
+    return result
+
+
+def _polygons(geometry):
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def _feature_code(properties, code_prop=None):
+    props = [code_prop] if code_prop else CODE_PROPS
+    for prop in props:
+        value = str(properties.get(prop) or "").strip()
+        if value.isdigit() and len(value) <= 10:
+            return value.ljust(10, "0")
+    return None
+
+
+def read_geojson(path, code_prop=None):
+    """GeoJSON -> {행정코드: [폴리곤([고리 배열, ...]), ...]}. 같은 코드가 여러 번 나오면 합친다."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    shapes = {}
+    for feature in data.get("features", []):
+        code = _feature_code(feature.get("properties") or {}, code_prop)
+        if code is None:
+            continue
+        polygons = [[np.asarray(ring, dtype=np.float64)[:, :2] for ring in polygon] for polygon in _polygons(feature.get("geometry"))]
+        shapes.setdefault(code, []).extend(polygons)
+    return shapes
+
+
+def group_shapes(shapes, level):
+    """하위 단계 경계를 코드 앞자리로 묶어 상위 단계 경계를 만든다 (선을 녹여 합치지는 않는다)."""
+    grouped = {}
+    for code, polygons in shapes.items():
+        parent = code[:2] + "0" * 8 if level == "시도" else code[:5] + "0" * 5
+        grouped.setdefault(parent, []).extend(polygons)
+    return grouped
+
+
+def encode(shapes, zoom):
+    """{코드: 폴리곤들} -> zoom 의 1픽셀 오차로 단순화한 압축 배열들"""
+    tolerance = spatial_index.degrees_per_pixel(zoom) * SIMPLIFY_PX
+    ratio = 1 / math.cos(math.radians(REF_LAT))  # 화면에서는 위도 1도가 경도 1도보다 길다
+    codes, bboxes = [], []
+    feature_parts, polygon_rings, ring_points = [0], [0], [0]
+    chunks = []
+    # 점이 4개(삼각형)도 안 되는 고리는 버린다. 바깥 고리가 그렇다면 그 폴리곤째 버린다.
+    # 그릴 수 있는 고리가 하나도 없는 지역은 건너뛴다.
+    kept_shapes = {}
+    for code in sorted(shapes):
+        polygons = [
+            [ring for ring in polygon if len(ring) >= 4]
+            for polygon in shapes[code] if len(polygon) and len(polygon[0]) >= 4
+        ]
+        if polygons:
+            kept_shapes[code] = polygons
+    stops = iter(_shared_stops(kept_shapes))
+    for code, polygons in kept_shapes.items():
+        for polygon in polygons:
+            for _ in polygon:
+                ring, fixed = next(stops)
+                scaled = ring * [1.0, ratio]
+                kept = simplify_ring(scaled, tolerance, fixed) / [1.0, ratio]
+                chunks.append(np.round(kept * SCALE).astype(np.int64))
+                ring_points.append(ring_points[-1] + len(kept))
+            polygon_rings.append(len(ring_points) - 1)
+        feature_parts.append(len(polygon_rings) - 1)
+        points = np.concatenate([ring for polygon in polygons for ring in polygon])
+        codes.append(code)
+        bboxes.append([points[:, 1].min(), points[:, 0].min(), points[:, 1].max(), points[:, 0].max()])
+    coords = np.concatenate(chunks) if chunks else np.empty((0, 2), dtype=np.int64)
+    # 바로 앞 점과의 차이만 남긴다 (고리가 바뀌어도 이어서 뺀다: 읽을 때 전체 누적합 한 번이면 된다)
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).astype(np.int32)
+    return {
+        "codes": np.array(codes),
+        "bbox": np.array(bboxes, dtype=np.float64).reshape(-1, 4),
+        "feature_parts": np.array(feature_parts, dtype=np.int32),
+        "polygon_rings": np.array(polygon_rings, dtype=np.int32),
+        "ring_points": np.array(ring_points, dtype=np.int32),
+        "deltas": deltas,
+    }
+
+
+def _save(path, arrays):
+    tmp = path.with_name(path.name + ".tmp.npz")
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def prepare(level_files, out=DATA_DIR, code_prop=None):
+    """{단계: GeoJSON 경로} -> out/<단계>_<zoom>.npz + meta.json. 없는 상위 단계는 읍면동/시군구로 만든다."""
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    shapes = {level: read_geojson(path, code_prop) for level, path in level_files.items() if path}
+    meta = {"scale": SCALE, "levels": {}}
+    for level in reversed(LEVEL_NAMES):  # 아래 단계부터 (위 단계를 만들 때 쓴다)
+        source = level_files.get(level)
+        if level not in shapes:
+            lower = next((shapes[name] for name in LEVEL_NAMES[LEVEL_NAMES.index(level) + 1:] if name in shapes), None)
+            if lower is None:
+                continue
+            shapes[level] = group_shapes(lower, level)
+        zooms = dict((name, res) for name, _, res in LEVELS)[level]
+        for zoom in zooms:
+            arrays = encode(shapes[level], zoom)
+            _save(out / f"{level}_{zoom}.npz", arrays)
+            yield level, zoom, len(arrays["codes"]), len(arrays["deltas"])
+        meta["levels"][level] = {
+            "zooms": list(zooms),
+            "features": len(arrays["codes"]),
+            "source": Path(source).name if source else None,  # None 이면 하위 단계를 묶어 만든 것
+        }
+    tmp = out / "meta.json.tmp"
+    tmp.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, out / "meta.json")
+
+
+# --- 지도에서 읽기 ---
+
+class _Layer:
+    """한 단계 · 한 단순화 수준의 경계. 좌표는 누적합으로 한 번 풀어 둔다 (정수, 읽기 전용)."""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.codes = data["codes"]
+            self.bbox = data["bbox"]
+            self.feature_parts = data["feature_parts"]
+            self.polygon_rings = data["polygon_rings"]
+            self.ring_points = data["ring_points"]
+            self.coords = np.cumsum(data["deltas"], axis=0, dtype=np.int64)
+        self.index = {code: i for i, code in enumerate(self.codes.tolist())}
+
+    def in_view(self, bbox):
+        """bbox(화면 범위)에 걸치는 지역 번호"""
+        south, west, north, east = self.bbox.T
+        hit = (south <= bbox.north) & (north >= bbox.south) & (west <= bbox.east) & (east >= bbox.west)
+        return np.flatnonzero(hit)
+
+    def geometry(self, i):
+        polygons = []
+        for p in range(self.feature_parts[i], self.feature_parts[i + 1]):
+            rings = []
+            for r in range(self.polygon_rings[p], self.polygon_rings[p + 1]):
+                rings.append((self.coords[self.ring_points[r]:self.ring_points[r + 1]] / SCALE).tolist())
+            if rings:
+                polygons.append(rings)
+        return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+class BoundarySet:
+    """boundary_data/ 의 경계들. 단계/단순화 수준별 파일은 처음 필요할 때 읽는다 (모든 세션이 같이 쓴다)."""
+
+    def __init__(self, path=DATA_DIR):
+        self.path = Path(path)
+        self.meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        self._layers = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=DATA_DIR):
+        """전처리한 경계가 없으면 None"""
+        if not (Path(path) / "meta.json").exists():
+            return None
+        return cls(path)
+
+    @property
+    def levels(self):
+        return [level for level in LEVEL_NAMES if level in self.meta["levels"]]
+
+    def derived(self, level):
+        """하위 단계 경계를 묶어 만든 단계인지 (안쪽 경계선이 남아 있다)"""
+        return self.meta["levels"][level]["source"] is None
+
+    def level_for_zoom(self, zoom):
+        """zoom 에서 보여 줄 단계. 그 단계 경계가 없으면 가장 가까운 있는 단계."""
+        wanted = LEVEL_NAMES.index(level_for_zoom(zoom))
+        return min(self.levels, key=lambda level: abs(LEVEL_NAMES.index(level) - wanted))
+
+    def layer(self, level, zoom):
+        resolution = resolution_for_zoom(level, zoom)
+        key = (level, resolution)
+        with self._lock:
+            if key not in self._layers:
+                self._layers[key] = _Layer(self.path / f"{level}_{resolution}.npz")
+            return self._layers[key]
+
+    def features(self, level, zoom, bbox, properties):
+        """bbox 에 걸친 지역의 GeoJSON FeatureCollection. properties: 코드 -> 속성 dict (없는 코드는 뺀다)."""
+        layer = self.layer(level, zoom)
+        features = []
+        for i in layer.in_view(bbox):
+            code = str(layer.codes[i])
+            if code not in properties:
+                continue
+            features.append({"type": "Feature", "properties": properties[code], "geometry": layer.geometry(i)})
+        return {"type": "FeatureCollection", "features": features}
+
+
+# --- 색 구간 ---
+
+SEQUENTIAL = ["#ffffb2", "#fed976", "#feb24c", "#fd8d3c", "#fc4e2a", "#e31a1c", "#b10026"]
+DIVERGING = ["#b2182b", "#ef8a62", "#fddbc7", "#f7f7f7", "#d1e5f0", "#67a9cf", "#2166ac"]  # 감소 - 0 - 증가
+NO_DATA = "#cccccc"
+
+
+def color_bins(values, colors, diverging=False):
+    """값 배열 -> (구간 경계, 값마다 색 번호(값이 없으면 -1)). 분위수로 나눠 색마다 지역 수가 비슷하다.
+
+    diverging 이면 가운데 색은 딱 0 인 값이고, 음수/양수를 따로 나눈다.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[np.isfinite(values)]
+    k = len(colors)
+    if diverging:
+        steps = np.linspace(0, 1, k // 2 + 1)[1:-1]
+        neg, pos = finite[finite < 0], finite[finite > 0]
+        edges = [
+            *(np.quantile(neg, steps) if len(neg) else np.full(len(steps), -np.inf)),
+            0.0, np.nextafter(0.0, 1.0),
+            *(np.quantile(pos, steps) if len(pos) else np.full(len(steps), np.inf)),
+        ]
+    else:
+        edges = list(np.quantile(finite, np.linspace(0, 1, k + 1)[1:-1])) if len(finite) else [np.inf] * (k - 1)
+    index = np.searchsorted(edges, values, side="right")
+    index[~np.isfinite(values)] = -1
+    return edges, index
+
+
+def legend(edges, colors, fmt="{:,.1f}"):
+    """[(색, 구간 글자)]. 같은 경계가 겹쳐 비어 있는 구간은 뺀다."""
+    items = []
+    for i, color in enumerate(colors):
+        low = edges[i - 1] if i > 0 else -np.inf
+        high = edges[i] if i < len(edges) else np.inf
+        if low >= high:
+            continue
+        if low == 0 and high == np.nextafter(0.0, 1.0):
+            items.append((color, "0"))
+        elif not np.isfinite(low):
+            items.append((color, f"~ {fmt.format(high)}"))
+        elif not np.isfinite(high):
+            items.append((color, f"{fmt.format(low)} ~"))
+        else:
+            items.append((color, f"{fmt.format(low)} ~ {fmt.format(high)}"))
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="행정구역 경계 GeoJSON -> 단계/확대 수준별로 미리 단순화한 지도용 경계")
+    parser.add_argument("emd", type=Path, help="읍면동(행정동) 경계 GeoJSON (예: 행정동 경계 파일, 코드 속성 adm_cd2)")
+    parser.add_argument("--sigungu", type=Path, help="시군구 경계 GeoJSON (없으면 읍면동을 묶어 만든다)")
+    parser.add_argument("--sido", type=Path, help="시도 경계 GeoJSON (없으면 시군구/읍면동을 묶어 만든다)")
+    parser.add_argument("--code-prop", help=f"행정코드 속성 이름 (기본: {', '.join(CODE_PROPS)} 중 처음 있는 것)")
+    parser.add_argument("--out", type=Path, default=DATA_DIR, help="출력 폴더 (기본 boundary_data)")
+    args = parser.parse_args(argv)
+
+    files = {"읍면동": args.emd, "시군구": args.sigungu, "시도": args.sido}
+    for level, zoom, features, points in prepare(files, args.out, args.code_prop):
+        print(f"✅ {level} (확대 {zoom}): 지역 {features:,}개, 좌표 {points:,}개")
+    size = sum(path.stat().st_size for path in Path(args.out).glob("*.npz"))
+    print(f"📦 {args.out} ({size / 1e6:.1f} MB)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import sys
+import threading
+from pathlib import Path
+
+# 저장소에 같이 들어 있는 CSV (업로드 전에 바로 보여 줄 기본 데이터)
+# - 파일 내용은 프로세스마다 한 번만 읽어 모든 세션이 같은 bytes 객체를 쓴다 (읽기 전용)
+# - 파싱 결과는 각 대시보드의 st.cache_resource 가 들고 있고, CSV -> 컬럼형 변환은 columnar_cache 가 디스크에 남긴다
+# - 배포 직후 `python bundled.py` 를 한 번 돌려 두면 첫 세션도 CSV 를 파싱하지 않고 캐시에서 바로 읽는다
+
+HERE = Path(__file__).parent
+DATASETS = {
+    "age": "202506_202506_연령별인구현황_월간.csv",
+    "avg_age": "202506_202506_주민등록인구기타현황(평균연령)_월간.csv",
+    "change": "202506_202506_법정동별 인구증감_월간.csv",
+    "weather": "종관기상_지점별_연·월_통계_20250725133303.csv",
+}
+
+_lock = threading.Lock()
+_contents = {}
+
+
+def name(kind):
+    return DATASETS[kind]
+
+
+def read(kind):
+    """기본 데이터 파일 내용 (없으면 None). 처음 한 번만 디스크에서 읽는다."""
+    with _lock:
+        if kind not in _contents:
+            path = HERE / DATASETS[kind]
+            _contents[kind] = path.read_bytes() if path.exists() else None
+        return _contents[kind]
+
+
+def prepare(kinds=None):
+    """기본 데이터를 미리 읽어 컬럼형 캐시를 채운다 (서버 시작 전이나 배포 스크립트에서)."""
+    import population
+
+    for kind in kinds or DATASETS:
+        data = read(kind)
+        if data is None:
+            continue
+        if kind != "weather":  # 기상 CSV 는 작아서 캐시 없이 바로 읽는다
+            population.read_mois_csv(data)
+        yield kind
+
+
+if __name__ == "__main__":
+    for kind in prepare(sys.argv[1:] or None):
+        print(f"✅ {kind}: {DATASETS[kind]}")
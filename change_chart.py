@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# 법정동 인구 증감 그래프용 서버 측 축소
+# 19k 행을 그대로 브라우저로 보내지 않고 (단계 합계 / 상위·하위 N + 기타 / 페이지) 로 줄인 뒤 그린다.
+# 단계 합계는 change_rollup.Rollup 이 말단 행에서 만든다.
+
+VALUE_COLUMNS = ["증감_계", "증감_남", "증감_여"]
+WEBGL_THRESHOLD = 300  # 이보다 많은 점은 막대 대신 WebGL 산점도로 그린다
+
+
+def level_codes(tree, selected_codes, root):
+    """현재 선택 단계의 바로 아래 지역들. 아무것도 고르지 않으면 시도 단위."""
+    if not selected_codes:
+        return tree.children_of(root)
+    codes = [code for parent in selected_codes for code in tree.children_of(parent)]
+    return codes or list(selected_codes)
+
+
+def top_bottom(df, value_col, n, region_col="법정구역"):
+    """증가 상위 n + 감소 상위 n, 나머지는 '기타' 한 줄로 합친다."""
+    if len(df) <= 2 * n:
+        return df.sort_values(value_col, ascending=False)
+
+    order = np.argsort(-df[value_col].to_numpy(), kind="stable")
+    keep = np.concatenate([order[:n], order[-n:]])
+    rest = np.setdiff1d(order, keep, assume_unique=True)
+
+    others = df.iloc[rest][VALUE_COLUMNS].sum().to_frame().T
+    others.insert(0, region_col, f"기타 ({len(rest):,}곳)")
+    head, tail = df.iloc[order[:n]], df.iloc[order[-n:]]
+    return pd.concat([head, others, tail], ignore_index=True)
+
+
+def page_count(total, page_size):
+    return max(1, -(-total // page_size))
+
+
+def page(df, number, page_size):
+    """1 부터 시작하는 페이지 번호"""
+    start = (number - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def change_figure(df, value_col, title, region_col="법정구역"):
+    """행이 적으면 막대, 많으면 WebGL 산점도. x 축 라벨이 너무 많으면 숨긴다."""
+    x = df[region_col].tolist()
+    y = df[value_col].to_numpy()
+
+    fig = go.Figure()
+    if len(df) > WEBGL_THRESHOLD:
+        fig.add_trace(go.Scattergl(
+            x=np.arange(len(df)), y=y, mode="markers", text=x,
+            hovertemplate="%{text}<br>%{y:,d}<extra></extra>",
+            marker=dict(color=y, colorscale="RdBu", cmid=0, size=4, showscale=True),
+        ))
+        fig.update_xaxes(showticklabels=False, title="지역 (마우스를 올리면 이름 표시)")
+    else:
+        fig.add_trace(go.Bar(
+            x=x, y=y,
+            marker=dict(color=y, colorscale="RdBu", cmid=0, showscale=True),
+            hovertemplate="%{x}<br>%{y:,d}<extra></extra>",
+        ))
+        fig.update_xaxes(title="지역", tickangle=-45)
+
+    fig.update_layout(title=title, yaxis_title="인구 증감 수", height=700)
+    return fig
+
+
+def hierarchy_figure(rollup, code, value_col, title, kind="treemap"):
+    """code 와 그 바로 아래 지역만 그린다 (더 아래는 펼칠 때 다시 그린다). 넓이 = 인구, 색 = 증감."""
+    codes = [code] + rollup.children_of(code)
+    totals = rollup.totals.loc[codes]
+    ids = [region or "전국" for region in codes]  # 전국(ROOT) 코드는 빈 문자열이라 id 로 쓸 수 없다
+    trace = go.Treemap if kind == "treemap" else go.Sunburst
+    fig = go.Figure(trace(
+        ids=ids,
+        labels=[rollup.name(region) for region in codes],
+        parents=[""] + [ids[0]] * (len(codes) - 1),
+        values=totals["인구"].to_numpy(),
+        branchvalues="total",  # 부모 인구 = 자식 합 (말단에서 만든 합계라 항상 맞는다)
+        customdata=totals[value_col].to_numpy(),
+        marker=dict(colors=totals[value_col].to_numpy(), colorscale="RdBu", cmid=0, showscale=True),
+        hovertemplate="%{label}<br>인구 %{value:,d}<br>증감 %{customdata:+,d}<extra></extra>",
+    ))
+    fig.update_layout(title=title, height=700, margin=dict(t=60, l=10, r=10, b=10))
+    return fig
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+
+from regions import ROOT
+
+# 법정동 인구 증감 계층 합계
+# 파일에는 전국/시도/시군구 소계 행과 말단(동/리) 행이 섞여 있어 그대로 그리면 같은 인구를 여러 번 센다.
+# 말단 행만 남겨 코드 앞자리(시도 2 / 일반구가 있는 시 4 / 시군구 5 / 읍면동 8자리)로 한 번에 묶어
+# 모든 단계의 합계를 만들고, 파일의 소계 행과 맞는지 확인한다.
+# 리가 군 바로 아래에 있는 파일(읍면 행이 없음)은 리 코드 앞 8자리로 읍면 단계를 만들어 끼운다.
+
+COLUMNS = ["증감_계", "증감_남", "증감_여", "인구"]
+PREFIX_WIDTHS = (2, 4, 5, 8)
+
+
+def prefix_width(code, has_districts=False):
+    """code 아래 말단을 모으는 앞자리 수. has_districts: 일반구가 있는 시 (수원시 4111 -> 41111, 41113 ...)
+
+    일반구가 없는 군은 5자리여야 한다 (영동군 43740 과 증평군 43745 는 앞 4자리가 같다).
+    """
+    if code == ROOT:
+        return 0
+    if code[2:] == "0" * 8:
+        return 2
+    if code[5:] == "0" * 5:
+        return 4 if has_districts else 5
+    if code[8:] == "00":
+        return 8
+    return 10
+
+
+class Rollup:
+    """df(법정구역 + COLUMNS) 와 그 RegionTree 로 한 번 만들어 두고 단계별 합계/자식을 dict 로 꺼낸다."""
+
+    def __init__(self, df, tree):
+        self.tree = tree
+        self.names = dict(tree.names)
+        self.parent = dict(tree.parent)
+        self.children = {code: list(kids) for code, kids in tree.children.items()}
+        self.virtual = set()  # 파일에 행이 없어 리 코드로 만든 읍면
+
+        # 리가 군 바로 아래 붙어 있으면 리 코드 앞 8자리로 읍면을 만들어 사이에 끼운다
+        for code in list(self.names):
+            if code == ROOT or prefix_width(code) != 10:
+                continue
+            town, county = code[:8] + "00", self.parent[code]
+            if county == town:
+                continue
+            if town not in self.names:
+                self.names[town] = self.names[code].rsplit(" ", 1)[0]
+                self.parent[town] = county
+                self.children[town] = []
+                self.children[county].append(town)
+                self.virtual.add(town)
+            self.children[county].remove(code)
+            self.children[town].append(code)
+            self.parent[code] = town
+        for kids in self.children.values():
+            kids.sort()
+
+        # 말단 행만 모아 앞자리별로 한 번에 더한다
+        leaves = [code for code in tree.names if code != ROOT and not tree.children_of(code)]
+        table = df[COLUMNS].to_numpy(dtype=np.int64)
+        values = pd.DataFrame(table[[tree.rows_of(code)[0] for code in leaves]], columns=COLUMNS, index=leaves)
+        prefixes = pd.Series(leaves)
+        sums = {width: values.groupby(prefixes.str[:width].to_numpy()).sum() for width in PREFIX_WIDTHS}
+
+        # 지역마다 앞자리 수를 정하고, 같은 앞자리 수끼리 합계 표에서 reindex 한 번으로 꺼낸다
+        codes = pd.Index(list(self.names))
+        widths = np.array([
+            prefix_width(code, any(kid[5:] == "0" * 5 for kid in self.children_of(code))) for code in codes
+        ])
+        sums[10] = values
+        totals = np.zeros((len(codes), len(COLUMNS)), dtype=np.int64)
+        totals[widths == 0] = values.to_numpy().sum(axis=0)
+        for width, table_sums in sums.items():
+            picked = np.flatnonzero(widths == width)
+            if len(picked):
+                keys = codes[picked].str[:width]
+                totals[picked] = table_sums.reindex(keys, fill_value=0).to_numpy()
+        self.totals = pd.DataFrame(totals, columns=COLUMNS, index=pd.Index(codes, name="코드"))
+        self._file = table
+        self.leaf_count = len(leaves)
+
+    def __contains__(self, code):
+        return code in self.names
+
+    def full_name(self, code):
+        return self.names[code]
+
+    def name(self, code):
+        full = self.names[code]
+        parent = self.parent.get(code)
+        if not parent or not full.startswith(self.names[parent]):
+            return full
+        return full[len(self.names[parent]):].strip() or full
+
+    def children_of(self, code=ROOT):
+        return self.children.get(code, [])
+
+    def path(self, code):
+        path = []
+        while code != ROOT:
+            path.append(code)
+            code = self.parent[code]
+        return path[::-1]
+
+    def frame(self, codes, region_col="법정구역"):
+        """지역별 합계 표: region_col(전체 이름) + COLUMNS, codes 순서대로"""
+        frame = self.totals.loc[list(codes)].reset_index(drop=True)
+        frame.insert(0, region_col, [self.names[code] for code in codes])
+        return frame
+
+    def check(self):
+        """파일의 소계 행과 말단 합계 비교. 소계 행이 있는 지역마다 한 줄."""
+        codes = [code for code in self.names if self.children_of(code) and self.tree.rows_of(code)]
+        file_values = self._file[[self.tree.rows_of(code)[0] for code in codes]]
+        derived = self.totals.loc[codes].to_numpy()
+        frame = pd.DataFrame({
+            "지역": [self.names[code] for code in codes],
+            "파일_증감_계": file_values[:, 0],
+            "계산_증감_계": derived[:, 0],
+            "파일_인구": file_values[:, 3],
+            "계산_인구": derived[:, 3],
+        }, index=pd.Index(codes, name="코드"))
+        frame["일치"] = (file_values == derived).all(axis=1)
+        return frame
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# 업로드 CSV -> 로컬 디스크 컬럼형(Arrow IPC) 캐시
+# - 파일 내용의 해시를 키로 쓰므로 같은 파일은 세션이 달라도 한 번만 파싱한다
+# - 압축 없이 저장해 다음부터는 memory map 으로 바로 연다 (EUC-KR 디코딩/토큰화 없음)
+# - 읽을 때마다 파일 수정 시각을 새로 찍고, 새로 쓴 뒤 전체 크기가 MAX_BYTES 를 넘으면 오래 안 쓴 것부터 지운다
+
+CACHE_DIR = Path(os.environ.get("COLUMNAR_CACHE_DIR", Path(__file__).parent / ".cache" / "columnar"))
+CACHE_VERSION = "1"  # 파싱 방식이 바뀌면 올려서 예전 캐시를 무시한다
+MAX_BYTES = int(os.environ.get("COLUMNAR_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def content_key(data, tag=""):
+    digest = hashlib.sha256(data)
+    digest.update(f"|{tag}|{CACHE_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def _compact(df):
+    # 정수 컬럼은 값 범위에 맞게 줄인다 (대부분 int32 로 충분)
+    for col in df.select_dtypes("integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def _read(path):
+    with pa.memory_map(str(path)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks: 숫자 컬럼을 한 덩어리로 합치지 않아 복사를 줄인다
+    return table.to_pandas(split_blocks=True)
+
+
+def _write(df, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 다른 세션이 읽는 중일 수 있으므로 임시 파일에 쓰고 한 번에 바꿔치기한다
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        feather.write_feather(df, tmp, compression="uncompressed")
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def prune(max_bytes=None):
+    """최근에 쓴 파일부터 더해 max_bytes 를 넘는 나머지 캐시 파일을 지운다. 지운 파일 수를 돌려준다."""
+    max_bytes = MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    for path in CACHE_DIR.glob("*.arrow"):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue  # 다른 세션이 방금 지운 파일
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    removed, total = 0, 0
+    for _, size, path in sorted(files, key=lambda item: item[0], reverse=True):
+        total += size
+        if total <= max_bytes:
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass  # 열려 있어 못 지우는 환경이면 다음 기회에
+    return removed
+
+
+def load(data, parse, tag=""):
+    """data(바이트)에 해당하는 DataFrame. 캐시에 없으면 parse(data) 결과를 저장해 둔다."""
+    path = CACHE_DIR / f"{content_key(data, tag)}.arrow"
+    if path.exists():
+        try:
+            df = _read(path)
+        except (OSError, pa.ArrowException):
+            path.unlink(missing_ok=True)  # 깨진 캐시는 지우고 다시 만든다
+        else:
+            try:
+                os.utime(path)  # 최근에 썼다고 표시 (prune 이 오래 안 쓴 것부터 지운다)
+            except OSError:
+                pass
+            return df
+
+    df = _compact(parse(data))
+    try:
+        _write(df, path)
+    except (OSError, pa.ArrowException):
+        # 쓸 수 없는 환경이거나 Arrow 로 바꿀 수 없는 컬럼(섞인 타입의 object 등)이면 캐시 없이 진행
+        return df
+    prune()
+    return df
@@ -0,0 +1,31 @@
+import threading
+from collections import OrderedDict
+
+# 만들어 둔 plotly 그림 캐시 (모든 세션 공용)
+# - 키는 (그림 종류, 데이터 해시, 선택 ...) 처럼 그림 내용을 정하는 값들. 같으면 go.Figure 를 다시 만들지 않는다
+# - 그림은 만든 뒤 고치지 않는다 (st.plotly_chart 는 to_dict() 로 복사본을 직렬화하므로 같이 써도 안전)
+# - 숫자 배열을 numpy 로 넣어 두면 plotly 가 base64 typed array 로 보낸다 (JSON 숫자 목록보다 작고 빠름)
+
+MAX_ENTRIES = 64  # 최근에 쓴 것부터 남긴다
+
+_lock = threading.Lock()
+_figures = OrderedDict()
+
+
+def get(key, build):
+    """key 의 그림. 없으면 build() 로 만들어 넣는다 (만드는 동안은 잠그지 않는다)."""
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key]
+    fig = build()
+    with _lock:
+        _figures[key] = fig
+        while len(_figures) > MAX_ENTRIES:
+            _figures.popitem(last=False)
+    return fig
+
+
+def clear():
+    with _lock:
+        _figures.clear()
@@ -0,0 +1,186 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from concurrent.futures import Future
+from pathlib import Path
+
+# 주소 -> 좌표 변환 (지오코딩)
+# - 같은 주소는 로컬 SQLite 캐시에서 바로 돌려준다 (유효기간 TTL, 개수 제한 LRU 삭제)
+# - 같은 주소를 동시에 여러 번 요청하면 실제 호출은 한 번만 한다 (요청 합치기)
+# - 실제 호출은 작업 스레드 하나가 큐에서 꺼내 제공자 속도 제한에 맞춰 보낸다
+# - 제공자는 geocode(address) 만 있으면 되므로 테스트에서는 StaticProvider 로 바꿀 수 있다
+
+# geopy Location 과 같은 이름의 속성을 갖게 해서 기존 코드(loc.address 등)를 그대로 쓴다
+GeocodeResult = namedtuple("GeocodeResult", "address latitude longitude")
+
+CACHE_PATH = Path(os.environ.get("GEOCODE_CACHE_PATH", Path(__file__).parent / ".cache" / "geocode.sqlite3"))
+CACHE_TTL = 30 * 24 * 3600  # 찾은 주소는 30일
+MISS_TTL = 24 * 3600  # 못 찾은 주소는 하루 뒤 다시 시도
+CACHE_MAX_ENTRIES = 20_000
+
+log = logging.getLogger(__name__)
+
+
+def normalize_address(address):
+    """캐시 키: 유니코드 정규화 + 공백 정리 + 소문자"""
+    return " ".join(unicodedata.normalize("NFC", address).split()).lower()
+
+
+class NominatimProvider:
+    min_interval = 1.0  # Nominatim 사용 정책: 초당 1회
+
+    def __init__(self, user_agent="bookmark_app", timeout=10):
+        from geopy.geocoders import Nominatim  # 지오코더를 처음 만들 때 불러온다 (로그인 화면에는 필요 없음)
+
+        self._geolocator = Nominatim(user_agent=user_agent, timeout=timeout)
+
+    def geocode(self, address):
+        loc = self._geolocator.geocode(address)
+        if loc is None:
+            return None
+        return GeocodeResult(loc.address, loc.latitude, loc.longitude)
+
+
+class StaticProvider:
+    """네트워크 없이 쓰는 대역: {주소: (위도, 경도)}"""
+
+    min_interval = 0.0
+
+    def __init__(self, places):
+        self.places = {normalize_address(address): coords for address, coords in places.items()}
+        self.calls = 0
+
+    def geocode(self, address):
+        self.calls += 1
+        coords = self.places.get(normalize_address(address))
+        if coords is None:
+            return None
+        return GeocodeResult(address, coords[0], coords[1])
+
+
+class GeocodeCache:
+    """정규화된 주소 -> 좌표. 여러 스레드에서 써도 되도록 잠금 하나로 보호한다."""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, miss_ttl=MISS_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl, self.miss_ttl, self.max_entries = ttl, miss_ttl, max_entries
+        self._lock = threading.Lock()
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " key TEXT PRIMARY KEY, address TEXT, lat REAL, lng REAL,"
+            " fetched_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS geocode_used ON geocode(used_at)")
+        self._count = self._db.execute("SELECT COUNT(*) FROM geocode").fetchone()[0]
+
+    def get(self, key):
+        """(찾음 여부, 결과). 캐시에 없거나 유효기간이 지났으면 (False, None)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT address, lat, lng, fetched_at FROM geocode WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            address, lat, lng, fetched_at = row
+            ttl = self.miss_ttl if lat is None else self.ttl
+            if now - fetched_at > ttl:
+                return False, None
+            self._db.execute("UPDATE geocode SET used_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+        return True, None if lat is None else GeocodeResult(address, lat, lng)
+
+    def put(self, key, result):
+        now = time.time()
+        values = (None, None, None) if result is None else (result.address, result.latitude, result.longitude)
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM geocode WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO geocode VALUES (?, ?, ?, ?, ?, ?)", (key, *values, now, now))
+            if not exists:
+                self._count += 1
+            # 너무 많아지면 오래 안 쓴 것부터 지운다
+            excess = self._count - self.max_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM geocode WHERE key IN (SELECT key FROM geocode ORDER BY used_at LIMIT ?)",
+                    (excess,),
+                )
+                self._count -= excess
+            self._db.commit()
+
+    def __len__(self):
+        return self._count
+
+
+class Geocoder:
+    """캐시 + 요청 합치기 + 속도 제한 큐를 묶은 지오코더. 프로세스에 하나 만들어 공유한다."""
+
+    def __init__(self, provider, cache=None, min_interval=None):
+        self.provider = provider
+        self.cache = cache if cache is not None else GeocodeCache()
+        self.min_interval = provider.min_interval if min_interval is None else min_interval
+        self._queue = queue.Queue()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="geocoder", daemon=True)
+        self._worker.start()
+
+    def submit(self, address):
+        """주소 하나를 비동기로 찾는다. Future 결과는 GeocodeResult 또는 None."""
+        key = normalize_address(address)
+        hit, result = self.cache.get(key)
+        if hit:
+            future = Future()
+            future.set_result(result)
+            return future
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                self._queue.put((key, address, future))
+        return future
+
+    def geocode(self, address, timeout=None):
+        """결과가 올 때까지 최대 timeout 초 기다린다. 시간이 지나면 TimeoutError (요청은 계속 진행)."""
+        return self.submit(address).result(timeout=timeout)
+
+    def _run(self):
+        last_call = 0.0
+        while True:
+            key, address, future = self._queue.get()
+            try:
+                wait = last_call + self.min_interval - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                self._resolve(key, address, future)
+            except Exception:
+                # 작업 스레드는 하나뿐이라 여기서 죽으면 이후 요청이 모두 시간 초과가 된다
+                log.exception("geocoder: %r 처리 중 오류", address)
+            finally:
+                last_call = time.monotonic()
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+    def _resolve(self, key, address, future):
+        try:
+            result = self.provider.geocode(address)
+        except Exception as e:
+            # 네트워크 오류 등은 캐시에 남기지 않는다
+            future.set_exception(e)
+            return
+        try:
+            self.cache.put(key, result)
+        except Exception:
+            # DB 잠김/디스크 부족 등으로 못 남겨도 결과는 돌려준다 (다음에 다시 찾을 뿐)
+            log.exception("geocoder: 캐시 저장 실패 (%s)", key)
+        future.set_result(result)
@@ -1,18 +1,36 @@
 
+import json
+
 import streamlit as st
-import folium
-from folium.plugins import MarkerCluster
-from streamlit_folium import st_folium
-from geopy.geocoders import Nominatim
-import pandas as pd
+
+import bookmark_collection
+import bookmark_export
+import bookmark_import
+import bookmark_store
+import geocoding
+import search_index
+import spatial_index
+import timing
 
 # 페이지 설정
 st.set_page_config(page_title="📍 나만의 북마크 지도", layout="wide")
 st.title("🔐 북마크 지도 로그인")
+run = timing.start("main")
+
+
+@st.cache_resource
+def get_geocoder():
+    # 지오코더는 프로세스에 하나만 만들어 모든 세션이 캐시와 속도 제한 큐를 같이 쓴다
+    return geocoding.Geocoder(geocoding.NominatimProvider(user_agent="bookmark_app"))
+
+
+@st.cache_resource
+def get_store():
+    # 사용자/북마크는 SQLite 파일에 저장해 새로고침이나 재시작 후에도 남고 모든 세션이 같이 쓴다
+    return bookmark_store.BookmarkStore()
+
 
-# 사용자 세션 초기화
-if "users" not in st.session_state:
-    st.session_state.users = {}
+store = get_store()
 
 # 로그인 입력
 username = st.text_input("이름", key="login_name")
@@ -21,28 +39,50 @@ password = st.text_input("비밀번호", type="password", key="login_pwd")
 # 로그인 처리
 if st.button("로그인 / 회원가입"):
     if username and password:
-        if username not in st.session_state.users:
-            st.session_state.users[username] = {
-                "password": password,
-                "bookmarks": [],
-                "folder_colors": {},
-                "map_center": [37.5665, 126.9780],
-            }
-        elif st.session_state.users[username]["password"] != password:
+        if not store.login(username, password):
             st.error("❌ 비밀번호가 틀렸습니다.")
             st.stop()
         st.session_state.current_user = username
-        st.session_state.map_center = st.session_state.users[username]["map_center"]
+        st.session_state.map_center = store.map_center(username)
     else:
         st.warning("이름과 비밀번호를 모두 입력하세요.")
         st.stop()
 
 # 로그인 이후만 실행
 if "current_user" in st.session_state:
-    user = st.session_state.users[st.session_state.current_user]
+    current_user = st.session_state.current_user
+    # 북마크 모음과 검색 색인은 세션에 두고, 이 세션에서 고친 북마크만 그때그때 반영한다.
+    # 다른 세션에서 바뀌었으면(store 버전이 다르면) 그때만 store 에서 다시 읽는다.
+    cache_key = (current_user, store.revision(current_user))
+    if st.session_state.get("bookmark_cache", {}).get("key") != cache_key:
+        with run.stage("decode") as entry:
+            bookmarks = store.bookmarks(current_user)
+            entry["rows"] = len(bookmarks)
+        with run.stage("index", rows=len(bookmarks)):
+            collection = bookmark_collection.BookmarkCollection(bookmarks)
+            st.session_state.bookmark_cache = {
+                "key": cache_key, "bookmarks": collection, "search": search_index.SearchIndex(collection),
+            }
+    user = {
+        "bookmarks": st.session_state.bookmark_cache["bookmarks"],
+        "folder_colors": store.folder_colors(current_user),
+    }
+    search = st.session_state.bookmark_cache["search"]
+
+    def track_write():
+        # store 에 한 번 쓴 직후 부른다. 그사이 다른 세션도 썼으면 모음을 버려 다음 실행에서 다시 읽는다.
+        cache = st.session_state.get("bookmark_cache")
+        if cache is None:
+            return
+        revision = store.revision(current_user)
+        if revision == cache["key"][1] + 1:
+            cache["key"] = (current_user, revision)
+        else:
+            del st.session_state["bookmark_cache"]
     default_colors = ["red", "blue", "green", "purple", "orange", "darkred", "lightblue", "black"]
     icons = ["info-sign", "home", "star", "flag", "cloud", "heart", "gift", "leaf"]
-    geolocator = Nominatim(user_agent="bookmark_app")
+    PAGE_SIZE = 20  # 북마크 목록 한 페이지
+    geocoder = get_geocoder()
 
     # 📍 북마크 추가
     st.markdown("## 📍 북마크 추가 및 지도")
@@ -57,10 +97,18 @@ if "current_user" in st.session_state:
             icon = st.selectbox("아이콘", icons)
 
         if st.form_submit_button("추가") and name and address:
-            loc = geolocator.geocode(address)
+            try:
+                loc = geocoder.geocode(address, timeout=5)
+            except TimeoutError:
+                # 요청은 뒤에서 계속 진행되어 캐시에 남으므로 다시 누르면 바로 찾는다
+                st.info("⏳ 주소를 찾는 중입니다. 잠시 후 다시 '추가'를 눌러주세요.")
+                loc = None
+            except Exception as e:
+                st.error(f"❌ 주소 검색 오류: {e}")
+                loc = None
             if loc:
                 color = user["folder_colors"].get(folder, "blue")
-                user["bookmarks"].append({
+                bookmark = {
                     "name": name.strip(),
                     "folder": folder.strip(),
                     "description": desc.strip(),
@@ -68,51 +116,123 @@ if "current_user" in st.session_state:
                     "coords": [loc.latitude, loc.longitude],
                     "icon": icon,
                     "color": color
-                })
+                }
+                bookmark["id"] = store.add_bookmark(current_user, bookmark)
+                user["bookmarks"].add(bookmark)
+                search.add(bookmark)
+                track_write()
                 st.success("✅ 북마크 추가됨")
 
+    # 📤 북마크 대량 가져오기
+    if "import_message" in st.session_state:
+        st.success(st.session_state.pop("import_message"))
+    with st.expander("📤 북마크 대량 가져오기 (CSV / GeoJSON)"):
+        import_file = st.file_uploader(
+            "이름/주소(또는 위도·경도) 컬럼이 있는 CSV, Point GeoJSON", type=["csv", "geojson", "json"],
+            key="import_file"
+        )
+        if import_file is not None and st.button("📤 가져오기"):
+            progress_bar = st.progress(0.0, text="좌표 없는 주소 찾는 중...")
+            new_bookmarks, stats = bookmark_import.import_bookmarks(
+                bookmark_import.iter_file(import_file), user["bookmarks"], geocoder,
+                icons, user["folder_colors"],
+                progress=lambda done, total: progress_bar.progress(done / total, text=f"주소 찾는 중... {done}/{total}")
+            )
+            # 트랜잭션 하나로 추가하고 한 번만 다시 그린다 (모음과 검색 색인은 다음 실행에서 새로 만든다)
+            store.add_bookmarks(current_user, new_bookmarks)
+            st.session_state.pop("bookmark_cache", None)
+            st.session_state.import_message = (
+                f"✅ {stats['added']}개 추가 (읽은 줄 {stats['read']}, 중복 {stats['duplicate']}, "
+                f"잘못된 줄 {stats['invalid']}, 주소 못 찾음 {stats['not_found']})"
+            )
+            st.rerun()
+
+    # 지도 라이브러리는 무거워서(불러오는 데 1초 가까이) 로그인한 뒤에 불러온다
+    import folium
+    from streamlit_folium import st_folium
+
+    import marker_layer
+
     # 지도 중심 위치
-    map_center = st.session_state.get("map_center", user.get("map_center", [37.5665, 126.9780]))
+    if "map_center" not in st.session_state:
+        st.session_state.map_center = store.map_center(current_user)
+    map_center = st.session_state.map_center
     m = folium.Map(location=map_center, zoom_start=16)
-    cluster = MarkerCluster().add_to(m)
+
+    def move_map(center):
+        # 중심이 바뀌면 지도가 새로 그려지므로 지난번 화면 범위는 버린다
+        st.session_state.map_center = center
+        st.session_state.pop("map_view", None)
+        st.session_state.pop("map_zoom", None)
+        st.session_state.pop("map_fetch", None)
 
     # 클릭 이벤트를 위한 숨겨진 상태값
     if "clicked_location" not in st.session_state:
         st.session_state.clicked_location = None
 
     # 마커 표시
-    def sort_bookmarks(data, method):
-        if method == "이름순":
-            return sorted(data, key=lambda x: x["name"])
-        if method == "폴더순":
-            return sorted(data, key=lambda x: (x["folder"], x["name"]))
-        return list(reversed(data))
-
-    all_folders = list(set(bm.get("folder", "기본") for bm in user["bookmarks"]))
-    selected_folder = st.selectbox("📂 폴더 필터", ["전체"] + sorted(all_folders))
-    query = st.text_input("🔍 북마크 검색 (이름 또는 설명)")
-    sort_option = st.selectbox("🔃 정렬 기준", ["이름순", "폴더순", "최신순"])
-
-    sorted_bookmarks = sort_bookmarks(user["bookmarks"], sort_option)
-    for bm in sorted_bookmarks:
-        if selected_folder != "전체" and bm.get("folder") != selected_folder:
-            continue
-        if query and query.lower() not in bm["name"].lower() and query.lower() not in bm["description"].lower():
-            continue
-        folium.Marker(
-            location=bm["coords"],
-            popup=f"<b>{bm['name']}</b><br>{bm.get('folder')}<br>{bm.get('description')}<br>{bm.get('address')}",
-            icon=folium.Icon(
-                color=user["folder_colors"].get(bm["folder"], "blue"),
-                icon=bm["icon"], prefix="fa"
-            )
-        ).add_to(cluster)
+    all_folders = user["bookmarks"].folders()
+    selected_folder = st.selectbox("📂 폴더 필터", ["전체"] + all_folders)
+    query = st.text_input("🔍 북마크 검색 (이름, 설명, 주소, 폴더 · 초성 검색 가능: ㅅㅇㅅㅊ)")
+    sort_option = st.selectbox("🔃 정렬 기준", list(bookmark_collection.SORT_KEYS))
+
+    # 미리 정렬해 둔 순서(또는 검색 결과)를 복사하지 않고 그대로 쓴다
+    folder_key = None if selected_folder == "전체" else selected_folder
+    with run.stage("filter") as entry:
+        hits = search.search(query)
+        if hits is None:
+            matched_bookmarks = user["bookmarks"].view(sort_option, folder_key)
+        else:
+            matched_bookmarks = user["bookmarks"].select(hits, folder_key)
+        entry["rows"] = len(matched_bookmarks)
+    if hits is not None:
+        # 검색 중에는 관련도순
+        st.caption(f"🔍 '{query}' 검색 결과 {len(matched_bookmarks)}개 (관련도순)")
+
+    # 지난번 화면 범위(없으면 중심과 확대 수준으로 어림) 근처의 북마크만 지도에 보낸다.
+    # 가져온 범위는 화면이 그 밖으로 나갈 때까지 그대로 두어 마커 레이어를 다시 쓸 수 있게 한다.
+    zoom = st.session_state.get("map_zoom", 16)
+    view = st.session_state.get("map_view") or spatial_index.view_bbox(map_center, zoom)
+    fetch_box = st.session_state.get("map_fetch")
+    if fetch_box is None or not fetch_box.contains(view):
+        fetch_box = view.padded()
+        st.session_state.map_fetch = fetch_box
+
+    # 북마크 버전 / 필터가 같으면 공간 색인을, 거기에 폴더 색상 / 범위 / 확대 단계까지 같으면 마커 배열을 그대로 쓴다
+    index_key = (current_user, store.revision(current_user), selected_folder, query)
+    layer_key = index_key + (
+        tuple(sorted(user["folder_colors"].items())), fetch_box.as_tuple(), marker_layer.zoom_bucket(zoom),
+    )
+    with run.stage("aggregate") as entry:
+        payload = marker_layer.cached_payload(
+            st.session_state, layer_key, index_key, matched_bookmarks, user["folder_colors"], fetch_box, zoom
+        )
+        entry["rows"] = len(payload[0])
+    if run.detail:
+        entry["payload_bytes"] = len(json.dumps(payload, ensure_ascii=False).encode())
+    with run.stage("figure"):
+        bookmark_layer = marker_layer.build_layer(payload)
 
     # 지도 클릭 이벤트 처리용 JavaScript
     m.add_child(folium.LatLngPopup())
     folium.Marker(location=map_center, popup="중심 위치").add_to(m)
 
-    result = st_folium(m, width=700, height=500)
+    # 마커는 feature_group_to_add 로 넘겨 지도 전체를 다시 불러오지 않고 바꿔 끼운다
+    with run.stage("render"):
+        result = st_folium(
+            m, key="bookmark_map", width=700, height=500, feature_group_to_add=bookmark_layer,
+            returned_objects=["last_clicked", "bounds", "zoom"]
+        )
+
+    # 화면이 가져온 범위를 벗어났거나, 묶는 단위가 달라지는 확대 수준 변화면 그 화면 기준으로 다시 그린다
+    new_view = spatial_index.bbox_from_folium((result or {}).get("bounds"))
+    new_zoom = (result or {}).get("zoom") or zoom
+    if new_view is not None:
+        zoom_changed = marker_layer.zoom_bucket(new_zoom) != marker_layer.zoom_bucket(zoom)
+        st.session_state.map_view = new_view
+        st.session_state.map_zoom = new_zoom
+        if zoom_changed or not fetch_box.contains(new_view):
+            st.rerun()
 
     if result and result.get("last_clicked"):
         latlng = result["last_clicked"]
@@ -124,7 +244,7 @@ if "current_user" in st.session_state:
             desc = st.text_input("설명", key="click_desc")
             icon = st.selectbox("아이콘", icons, key="click_icon")
             if st.form_submit_button("지도 위치로 추가"):
-                user["bookmarks"].append({
+                bookmark = {
                     "name": name.strip(),
                     "folder": folder.strip(),
                     "description": desc.strip(),
@@ -132,56 +252,98 @@ if "current_user" in st.session_state:
                     "coords": [latlng["lat"], latlng["lng"]],
                     "icon": icon,
                     "color": user["folder_colors"].get(folder, "blue")
-                })
+                }
+                bookmark["id"] = store.add_bookmark(current_user, bookmark)
+                user["bookmarks"].add(bookmark)
+                search.add(bookmark)
+                track_write()
                 st.success("✅ 지도에서 북마크 추가됨")
                 st.rerun()
 
     # 🎨 폴더 색상 설정
     st.markdown("## 🎨 폴더별 색상 설정")
-    for folder in sorted(all_folders):
+    for folder in all_folders:
         current_color = user["folder_colors"].get(folder, "blue")
-        user["folder_colors"][folder] = st.selectbox(
+        new_color = st.selectbox(
             f"폴더: {folder}", default_colors,
             index=default_colors.index(current_color) if current_color in default_colors else 0,
             key=f"color_{folder}"
         )
+        if new_color != current_color:
+            store.set_folder_color(current_user, folder, new_color)
+            for bm in user["bookmarks"].view("최신순", folder):
+                bm["color"] = new_color  # 정렬에 쓰지 않는 필드라 순서는 그대로
+            track_write()
+            user["folder_colors"][folder] = new_color
 
     # 📋 북마크 목록
     st.markdown("## 📋 북마크 목록")
-    for i, bm in enumerate(sorted_bookmarks):
-        if selected_folder != "전체" and bm.get("folder") != selected_folder:
-            continue
-        if query and query.lower() not in bm["name"].lower() and query.lower() not in bm["description"].lower():
-            continue
+    # 한 페이지만 그려서 북마크가 늘어도 위젯 수는 그대로
+    page_count = max(1, -(-len(matched_bookmarks) // PAGE_SIZE))
+    if st.session_state.get("bookmark_page", 1) > page_count:
+        st.session_state.bookmark_page = page_count  # 필터를 바꿔 페이지가 줄어든 경우
+    page = 1
+    if page_count > 1:
+        page = st.number_input(
+            f"페이지 (전체 {len(matched_bookmarks)}개, {page_count}쪽)",
+            min_value=1, max_value=page_count, step=1, key="bookmark_page"
+        )
+    for bm in matched_bookmarks[(page - 1) * PAGE_SIZE:page * PAGE_SIZE]:
+        bid = bm["id"]
         with st.expander(f"{bm['name']} ({bm['folder']})"):
-            bm["name"] = st.text_input("이름", bm["name"], key=f"name_{i}")
-            bm["description"] = st.text_input("설명", bm["description"], key=f"desc_{i}")
-            bm["folder"] = st.text_input("폴더", bm["folder"], key=f"folder_{i}")
-            bm["icon"] = st.selectbox("아이콘", icons, index=icons.index(bm["icon"]), key=f"icon_{i}")
-            bm["color"] = user["folder_colors"].get(bm["folder"], "blue")
+            edited = {
+                "name": st.text_input("이름", bm["name"], key=f"name_{bid}"),
+                "description": st.text_input("설명", bm["description"], key=f"desc_{bid}"),
+                "folder": st.text_input("폴더", bm["folder"], key=f"folder_{bid}"),
+                "icon": st.selectbox(
+                    "아이콘", icons, index=icons.index(bm["icon"]) if bm["icon"] in icons else 0, key=f"icon_{bid}"
+                ),
+            }
+            edited["color"] = user["folder_colors"].get(edited["folder"], "blue")
+            # 바뀐 필드가 있을 때만 이 북마크 한 행을 고친다
+            changed = {key: value for key, value in edited.items() if bm[key] != value}
+            if changed:
+                store.update_bookmark(current_user, bid, **changed)
+                user["bookmarks"].update(bid, **changed)
+                search.update(bm)
+                track_write()
             st.text(f"📍 좌표: {bm['coords'][0]:.5f}, {bm['coords'][1]:.5f}")
             st.text(f"🏠 주소: {bm.get('address','')}")
 
             col1, col2, col3 = st.columns(3)
-            if col1.button("❌ 삭제", key=f"del_{i}"):
-                del user["bookmarks"][i]
+            if col1.button("❌ 삭제", key=f"del_{bid}"):
+                store.delete_bookmark(current_user, bid)
+                user["bookmarks"].remove(bid)
+                search.remove(bid)
+                track_write()
                 st.rerun()
-            if col2.button("✅ 저장", key=f"save_{i}"):
+            if col2.button("✅ 저장", key=f"save_{bid}"):
                 st.success("✔️ 수정 완료")
-            if col3.button("📍 지도에서 보기", key=f"view_{i}"):
-                user["map_center"] = bm["coords"]
-                st.session_state.map_center = bm["coords"]
+            if col3.button("📍 지도에서 보기", key=f"view_{bid}"):
+                store.set_map_center(current_user, bm["coords"])
+                move_map(bm["coords"])
                 st.rerun()
 
-    # 📥 CSV 다운로드
-    if user["bookmarks"]:
-        df = pd.DataFrame(user["bookmarks"])
-        st.download_button("📥 CSV 다운로드", df.to_csv(index=False), "bookmarks.csv", "text/csv")
+    # 📥 내보내기: 버튼을 눌렀을 때만 store 에서 조금씩 읽어 만든다
+    if len(user["bookmarks"]):
+        with st.expander("📥 내보내기 (CSV / GeoJSON / Parquet)"):
+            export_format = st.radio("형식", list(bookmark_export.FORMATS), horizontal=True, key="export_format")
+            export_folder = st.selectbox("내보낼 폴더", ["전체"] + all_folders, key="export_folder")
+            extension, mime = bookmark_export.FORMATS[export_format]
+            folder_arg = None if export_folder == "전체" else export_folder
+            st.download_button(
+                f"📥 {export_format} 다운로드",
+                data=lambda: bookmark_export.export(
+                    store.iter_bookmarks(current_user, folder_arg), export_format
+                ),
+                file_name=f"bookmarks.{extension}", mime=mime, on_click="ignore"
+            )
 
     # 전체 초기화
     if st.button("🧹 전체 초기화"):
-        user["bookmarks"] = []
-        user["folder_colors"] = {}
-        user["map_center"] = [37.5665, 126.9780]
-        st.session_state.map_center = [37.5665, 126.9780]
+        store.reset_user(current_user)
+        st.session_state.pop("bookmark_cache", None)
+        move_map(list(bookmark_store.DEFAULT_CENTER))
         st.rerun() 
+
+run.finish()
@@ -0,0 +1,114 @@
+import html
+import json
+
+import folium
+from folium.plugins import FastMarkerCluster
+
+import spatial_index
+
+# 북마크 마커 레이어
+# 북마크마다 folium.Marker 객체를 만들지 않고 [위도, 경도, 개수, 색 번호, 아이콘 번호, 팝업] 배열 하나를 보내
+# 브라우저에서 마커를 만든다 (FastMarkerCluster). 같은 키로 다시 부르면 만들어 둔 배열을 그대로 쓴다.
+
+# 브라우저에서 행 하나 -> 마커. 서버에서 미리 묶은 행(개수 > 1)은 개수 동그라미로 그린다.
+CALLBACK = """function (row) {
+    var marker;
+    if (row[2] > 1) {
+        marker = L.marker([row[0], row[1]], {count: row[2], icon: L.divIcon({
+            html: "<div><span>" + row[2] + "</span></div>",
+            className: "marker-cluster marker-cluster-medium", iconSize: L.point(40, 40)
+        })});
+        marker.bindTooltip("북마크 " + row[2] + "개 (확대하면 펼쳐집니다)");
+    } else {
+        marker = L.marker([row[0], row[1]], {count: 1, icon: L.AwesomeMarkers.icon({
+            icon: ICONS[row[4]], markerColor: COLORS[row[3]], iconColor: "white", prefix: "fa"
+        })});
+        marker.bindPopup(row[5]);
+    }
+    return marker;
+}"""
+
+# 브라우저 쪽 묶음도 미리 묶은 개수를 더해서 보여 준다
+ICON_CREATE_FUNCTION = """function (cluster) {
+    var n = 0;
+    cluster.getAllChildMarkers().forEach(function (m) { n += m.options.count || 1; });
+    var size = n < 10 ? "small" : n < 100 ? "medium" : "large";
+    return L.divIcon({
+        html: "<div><span>" + n + "</span></div>",
+        className: "marker-cluster marker-cluster-" + size, iconSize: L.point(40, 40)
+    });
+}"""
+
+
+def zoom_bucket(zoom):
+    """CLUSTER_MAX_ZOOM 보다 확대하면 묶는 방식이 같으므로 하나로 본다."""
+    return min(zoom, spatial_index.CLUSTER_MAX_ZOOM + 1)
+
+
+def _popup(bm):
+    parts = [f"<b>{html.escape(bm['name'])}</b>"]
+    parts += [html.escape(str(bm.get(field) or "")) for field in ("folder", "description", "address")]
+    return "<br>".join(parts)
+
+
+def bookmark_index(bookmarks):
+    """bookmarks 좌표의 격자 색인. 점 번호는 bookmarks 순서를 따른다."""
+    return spatial_index.GridIndex([bm["coords"] for bm in bookmarks])
+
+
+def marker_rows(index, bookmarks, folder_colors, fetch_box, zoom):
+    """fetch_box 안의 북마크 -> (행 목록, 색 목록, 아이콘 목록). index 는 bookmark_index(bookmarks)"""
+    colors, icons = {}, {}
+    rows = []
+    for lat, lng, members in spatial_index.cluster(index, index.query(fetch_box), zoom):
+        if len(members) > 1:
+            rows.append([round(float(lat), 6), round(float(lng), 6), len(members), 0, 0, ""])
+            continue
+        bm = bookmarks[members[0]]
+        color = colors.setdefault(folder_colors.get(bm["folder"], "blue"), len(colors))
+        icon = icons.setdefault(bm["icon"], len(icons))
+        rows.append([round(bm["coords"][0], 6), round(bm["coords"][1], 6), 1, color, icon, _popup(bm)])
+    return rows, list(colors), list(icons)
+
+
+def build_layer(payload):
+    """(행, 색, 아이콘) -> 지도에 얹을 FeatureGroup. 객체 두 개만 만드므로 실행마다 새로 만든다.
+
+    folium 객체는 한 번 그리면 내부 이름이 바뀌어 다시 그릴 때 잘못된 JS 가 나오므로 캐시하지 않는다.
+    """
+    rows, colors, icons = payload
+    callback = (
+        f"(function () {{ var COLORS = {json.dumps(colors)}; var ICONS = {json.dumps(icons)};"
+        f" return {CALLBACK}; }})()"
+    )
+    layer = folium.FeatureGroup(name="북마크")
+    FastMarkerCluster(rows, callback=callback, icon_create_function=ICON_CREATE_FUNCTION).add_to(layer)
+    return layer
+
+
+def cached_index(session, key, bookmarks):
+    """session 에 마지막 공간 색인 하나를 (키, 색인, 북마크 목록) 으로 둔다. (색인, 북마크 목록) 을 돌려준다.
+
+    key 에는 북마크 버전과 필터(폴더, 검색어)가 들어가야 한다. 화면을 움직이거나 확대 단계만 바뀌면
+    색인은 그대로 두고 query / cluster 만 다시 한다. 점 번호가 어긋나지 않도록 색인을 만든 목록을 같이 둔다.
+    """
+    cached = session.get("marker_index")
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+    index = bookmark_index(bookmarks)
+    session["marker_index"] = (key, index, bookmarks)
+    return index, bookmarks
+
+
+def cached_payload(session, key, index_key, bookmarks, folder_colors, fetch_box, zoom):
+    """session(세션 상태) 에 마지막 배열 하나를 키와 함께 둔다. 키가 같으면 배열을 다시 만들지 않는다.
+
+    key 에는 index_key(북마크 버전, 필터) 와 폴더 색상, 가져온 범위, 확대 단계가 들어가야 한다.
+    """
+    cached = session.get("marker_payload")
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    index, bookmarks = cached_index(session, index_key, bookmarks)
+    payload = marker_rows(index, bookmarks, folder_colors, fetch_box, zoom)
+    session["marker_payload"] = (key, payload)
+    return payload
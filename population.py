@@ -0,0 +1,142 @@
+import hashlib
+import io
+import re
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+import timing
+from regions import RegionTree, split_label
+
+# 행정안전부(주민등록 인구통계) CSV 공통 처리
+# - 숫자는 "9,325,616" 처럼 콤마가 들어간 문자열로 내려온다
+# - 행정구역 이름 끝에 10자리 행정코드가 괄호로 붙어 있다: "서울특별시 종로구 (1111000000)"
+
+SEXES = ("계", "남", "여")
+MAX_AGE = 100  # 100세 이상은 한 칸으로 묶여 있음
+AGE_LABELS = [f"{age}세" for age in range(MAX_AGE)] + [f"{MAX_AGE}세 이상"]
+
+_MONTH_RE = re.compile(r"^(\d{4})년(\d{2})월_")
+_AGE_COL_RE = re.compile(r"^(?:\d{4}년\d{2}월_)?(계|남|여)_(\d+)세")
+
+
+def _parse_mois_csv(data, encoding):
+    try:
+        return pd.read_csv(io.BytesIO(data), encoding=encoding, thousands=",")
+    except UnicodeDecodeError:
+        return pd.read_csv(io.BytesIO(data), encoding="utf-8", thousands=",")
+
+
+def read_mois_csv(data, encoding="cp949"):
+    """CSV 바이트를 읽어 콤마가 제거된 숫자형 DataFrame 으로 돌려준다.
+
+    한 번 읽은 파일은 columnar_cache 에 저장되어 다음부터는 CSV 를 다시 파싱하지 않는다.
+    """
+    with timing.stage("decode", nbytes=len(data)) as entry:
+        df = columnar_cache.load(data, lambda raw: _parse_mois_csv(raw, encoding), tag=f"mois:{encoding}")
+        entry["rows"] = len(df)
+    return df
+
+
+def month_of(columns):
+    """'2025년06월_...' 컬럼에서 기준 연월('202506')을 찾는다."""
+    for col in columns:
+        match = _MONTH_RE.match(col)
+        if match:
+            return match.group(1) + match.group(2)
+    return ""
+
+
+def cumulative(counts):
+    """나이 축(마지막 축) 누적합. 맨 앞에 0 을 붙여 길이가 나이 수 + 1 이 된다."""
+    cum = np.zeros(counts.shape[:-1] + (counts.shape[-1] + 1,), dtype=np.int64)
+    np.cumsum(counts, axis=-1, out=cum[..., 1:])
+    return cum
+
+
+class AgeCube:
+    """연령별 인구를 (지역, 성별, 나이 0~100) int32 배열로 들고 있는 객체.
+
+    한 번 만들고 나면 읽기 전용으로 쓴다. 위젯이 바뀔 때는 배열을 잘라 쓰기만 한다.
+    """
+
+    def __init__(self, labels, counts, sexes, month=""):
+        self.labels = list(labels)
+        parsed = [split_label(label) for label in self.labels]
+        self.names = [name for name, _ in parsed]
+        self.codes = [code for _, code in parsed]
+        self.counts = counts
+        self.sexes = tuple(sexes)
+        self.month = month
+        self.row_of = {name: i for i, name in enumerate(self.names)}
+        self.row_of_code = {code: i for i, code in enumerate(self.codes) if code}
+        self.tree = RegionTree(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @cached_property
+    def cumulative(self):
+        """나이 축 누적합 (맨 앞 0 포함). 연령 구간 합을 뺄셈 한 번으로 구할 때 쓴다."""
+        return cumulative(self.counts)
+
+    @cached_property
+    def key(self):
+        """내용 해시 (업로드 파일이든 저장소의 달이든 같은 인구면 같은 값). 그림 캐시 키로 쓴다."""
+        digest = hashlib.sha1(self.counts.tobytes())
+        digest.update("|".join(self.labels + list(self.sexes)).encode())
+        return digest.hexdigest()
+
+    def has_sex(self, sex):
+        return sex in self.sexes
+
+    def series(self, row, sex, ages=None):
+        """한 지역 한 성별의 연령별 인구 (ages 를 주면 그 나이만)."""
+        values = self.counts[row, self.sexes.index(sex)]
+        return values if ages is None else values[ages]
+
+    def block(self, rows, sex, ages=None):
+        """여러 지역을 한 번에 꺼낸다: (len(rows), len(ages))"""
+        values = self.counts[np.asarray(rows, dtype=np.intp), self.sexes.index(sex)]
+        return values if ages is None else values[:, ages]
+
+    def mean_age(self, rows, sex):
+        """연령별 인구로 구한 평균 나이 (한 살 구간의 가운데 값, 100세 이상은 100.5세로 계산)"""
+        counts = self.block(rows, sex).astype(np.float64)
+        totals = counts.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return counts @ (np.arange(MAX_AGE + 1) + 0.5) / totals
+
+
+def build_age_cube(df, region_col="행정구역"):
+    """연령별 인구현황 DataFrame -> AgeCube"""
+    with timing.stage("split", rows=len(df)):
+        return _build_age_cube(df, region_col)
+
+
+def _build_age_cube(df, region_col):
+    slots = {}
+    for col in df.columns:
+        match = _AGE_COL_RE.match(col)
+        if match:
+            slots[col] = (match.group(1), min(int(match.group(2)), MAX_AGE))
+
+    sexes = tuple(s for s in SEXES if any(sex == s for sex, _ in slots.values()))
+    if not sexes:
+        raise ValueError("연령별 인구 컬럼(예: 2025년06월_남_0세)을 찾지 못했습니다.")
+
+    counts = np.zeros((len(df), len(sexes), MAX_AGE + 1), dtype=np.int32)
+    for sex_idx, sex in enumerate(sexes):
+        cols = [col for col, (s, _) in slots.items() if s == sex]
+        ages = [slots[col][1] for col in cols]
+        values = df[cols].apply(pd.to_numeric, errors="coerce").fillna(0).to_numpy(dtype=np.int64)
+        counts[:, sex_idx, ages] = values
+
+    return AgeCube(df[region_col].astype(str), counts, sexes, month_of(df.columns))
+
+
+def load_age_cube(data):
+    """업로드된 연령별 인구 CSV 바이트 -> AgeCube"""
+    return build_age_cube(read_mois_csv(data))
@@ -0,0 +1,157 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import age_bands
+
+# 인구 피라미드 그림 만들기 (streamlit 없이 plotly 만 사용)
+# sides: [(이름, (지역 수, 연령 수) 배열, 방향)]  방향 -1 = 왼쪽(남), +1 = 오른쪽(여)
+# 연령 라벨은 y 축에 한 번만 넣고(labelalias) 막대는 0, 1, 2 ... 위치에 그린다.
+# trace 마다 라벨 목록을 반복하지 않고, 인구수는 numpy 배열이라 base64 typed array 로 나간다.
+
+COLORS = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 'cyan', 'magenta']
+SEX_COLORS = {"남": "blue", "여": "red", "전체": "gray"}
+
+COMPACT_THRESHOLD = len(COLORS)  # 이보다 많은 지역은 지역별 막대 대신 압축 모드로 그린다
+MAX_MULTIPLES = 24  # 작은 그래프 모드에서 한 번에 그리는 최대 지역 수
+
+
+def sides_from_cube(cube, rows, bands):
+    """선택한 행들의 연령 구간 합을 한 번에 구해 sides 목록을 만든다 (지역마다 따로 찾지 않음)."""
+    if cube.has_sex("남") and cube.has_sex("여"):
+        return [
+            ("남", age_bands.cube_band_sums(cube, rows, "남", bands), -1),
+            ("여", age_bands.cube_band_sums(cube, rows, "여", bands), 1),
+        ]
+    return [("전체", age_bands.cube_band_sums(cube, rows, "계", bands), 1)]
+
+
+def sides_from_counts(counts, sexes, bands):
+    """(지역, 성별, 나이) 배열(예: age_bands.rollup 결과)로 sides 목록을 만든다."""
+    sums = age_bands.band_sums(counts, bands)
+    if "남" in sexes and "여" in sexes:
+        return [("남", sums[:, sexes.index("남")], -1), ("여", sums[:, sexes.index("여")], 1)]
+    return [("전체", sums[:, sexes.index("계")], 1)]
+
+
+def _category_axis(fig, labels):
+    """y 위치 i 에 labels[i] 를 붙인다 (눈금과 마우스 올렸을 때 모두). 1세 단위처럼 많으면 10칸마다 눈금."""
+    step = 10 if len(labels) > 20 else 1
+    fig.update_yaxes(
+        tickmode="array",
+        tickvals=list(range(0, len(labels), step)),
+        labelalias={str(i): label for i, label in enumerate(labels)},
+    )
+    return fig
+
+
+def _layout(fig, title, height=1000):
+    fig.update_layout(
+        title=title,
+        barmode="relative",
+        xaxis_title="인구수",
+        yaxis_title="연령",
+        xaxis_tickformat=",d",
+        height=height,
+        yaxis=dict(autorange="reversed"),
+    )
+    return fig
+
+
+def pyramid_figure(labels, sides, title):
+    """한 지역의 남/여 피라미드 (sides 의 배열에서 첫 번째 지역만 그린다)."""
+    bar_names = {"남": "남자", "여": "여자", "전체": "전체"}
+    fig = go.Figure()
+    for sex, values, direction in sides:
+        fig.add_trace(go.Bar(
+            x=direction * values[0],
+            name=bar_names.get(sex, sex),
+            orientation="h",
+            marker_color=SEX_COLORS.get(sex, "gray"),
+        ))
+    return _category_axis(_layout(fig, title), labels)
+
+
+def comparison_figure(labels, names, sides, title="선택된 지역 인구 피라미드 비교"):
+    """지역마다 성별 막대 2개씩 (지역 수가 적을 때)."""
+    fig = go.Figure()
+    for idx, region in enumerate(names):
+        color = COLORS[idx % len(COLORS)]
+        for side_idx, (sex, values, direction) in enumerate(sides):
+            fig.add_trace(go.Bar(
+                x=direction * values[idx],
+                name=f"{region} ({sex})" if len(sides) > 1 else region,
+                orientation="h",
+                marker_color=color,
+                opacity=1.0 if side_idx == 0 else 0.5,
+                legendgroup=region,
+                showlegend=side_idx == 0,
+            ))
+    return _category_axis(_layout(fig, title), labels)
+
+
+def share_figure(labels, names, sides, title="선택된 지역 연령 구성비 (겹쳐 보기)"):
+    """지역별 연령 구성비(%)를 성별당 trace 하나에 겹쳐 그린다.
+
+    지역마다 trace 를 만들지 않고 선 사이에 NaN 을 끼워 한 trace 로 합치므로
+    지역이 수백 개여도 trace 수는 성별 수 x 2 로 고정된다.
+    """
+    n_regions, n_ages = sides[0][1].shape
+    totals = sum(values.sum(axis=1) for _, values, _ in sides).astype(np.float64)
+    totals[totals == 0] = np.nan
+
+    # (지역, 연령+1) 모양으로 만든 뒤 x 의 마지막 칸을 NaN 으로 두어 선을 끊는다
+    y = np.tile(np.arange(n_ages + 1, dtype=np.int16), n_regions)
+
+    fig = go.Figure()
+    for sex, values, direction in sides:
+        share = values / totals[:, None] * 100 * direction
+        x = np.hstack([share, np.full((n_regions, 1), np.nan)]).astype(np.float32).ravel()
+        fig.add_trace(go.Scattergl(
+            x=x,
+            y=y,
+            mode="lines",
+            name=f"{sex} (지역 {n_regions}곳)",
+            line=dict(color=SEX_COLORS.get(sex, "gray"), width=1),
+            opacity=0.25,
+            hoverinfo="skip",
+        ))
+
+        # 선택 지역 전체 합계 기준 구성비
+        overall = values.sum(axis=0) / np.nansum(totals) * 100 * direction
+        fig.add_trace(go.Scatter(
+            x=overall,
+            y=np.arange(n_ages),
+            mode="lines",
+            name=f"{sex} (전체 합계)",
+            line=dict(color=SEX_COLORS.get(sex, "gray"), width=3),
+        ))
+
+    _layout(fig, title)
+    fig.update_layout(xaxis_title="구성비 (%)", xaxis_tickformat=".1f")
+    return _category_axis(fig, labels)
+
+
+def small_multiples_figure(labels, names, sides, cols=4, title="선택된 지역 인구 피라미드 (작은 그래프)"):
+    """지역마다 작은 피라미드 하나씩 (최대 MAX_MULTIPLES 개)."""
+    names = list(names)[:MAX_MULTIPLES]
+    rows = -(-len(names) // cols)
+    fig = make_subplots(
+        rows=rows, cols=cols, subplot_titles=names,
+        shared_yaxes=True, horizontal_spacing=0.02, vertical_spacing=0.3 / max(rows, 1),
+    )
+    for idx in range(len(names)):
+        for sex, values, direction in sides:
+            fig.add_trace(go.Bar(
+                x=direction * values[idx],
+                name=sex,
+                orientation="h",
+                marker_color=SEX_COLORS.get(sex, "gray"),
+                showlegend=idx == 0,
+                legendgroup=sex,
+            ), row=idx // cols + 1, col=idx % cols + 1)
+
+    _category_axis(_layout(fig, title, height=max(300, 250 * rows)), labels)
+    fig.update_yaxes(autorange="reversed", showticklabels=False)
+    fig.update_xaxes(showticklabels=False)
+    return fig
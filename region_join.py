@@ -0,0 +1,280 @@
+import io
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import population
+from regions import NATION_CODE, ROOT, RegionTree, split_label
+
+# 세 파일(연령별 인구 / 평균연령 / 법정동 인구증감)을 지역 코드 하나로 묶은 표
+# - 연령별·평균연령 파일은 행정동 코드, 인구증감 파일은 법정동 코드를 쓴다.
+#   시도·시군구 코드는 두 체계가 같아서 코드로 바로 잇고, 읍면동은 행정동 <-> 법정동 대응표를 거친다.
+# - 대응표는 행정안전부 '행정동-법정동 코드 대응' 파일을 주면 그대로 쓰고, 없으면 어림해서 만든다:
+#   읍면은 코드 앞 8자리가 같은 리(법정)를, 동은 같은 시군구 안에서 이름이 맞는 법정동을 잇는다.
+# - 한 번 만든 RegionData 는 읽기 전용으로 쓰고, 지역 -> 행 / 행정동 <-> 법정동은 dict 로 바로 찾는다.
+# - 대시보드는 build() 대신 load() 를 부른다. 파일 조합마다 한 번만 이어 두고 모든 페이지/세션이 같이 쓴다.
+
+AVG_CHECK_TOLERANCE = 0.1  # 파일의 평균연령은 소수 첫째 자리까지라 이 정도 차이는 같은 값으로 본다
+CHANGE_COLUMNS = ["증감_계", "증감_남", "증감_여"]
+CACHE_ENTRIES = 4  # load() 가 들고 있는 파일 조합 수 (올린 파일마다 늘어나지 않도록)
+
+_NAME_NOISE_RE = re.compile(r"[\d·.,제()]")
+
+
+def name_key(name):
+    """이름 비교용 줄기: '역삼1동' -> '역삼', '종로1·2·3·4가동' -> '종로', '청운효자동' -> '청운효자'"""
+    key = _NAME_NOISE_RE.sub("", name.split()[-1] if name.split() else "")
+    while len(key) > 1 and key[-1] in "동가읍면":
+        key = key[:-1]
+    return key
+
+
+def _is_sigungu_or_above(code):
+    return code[5:] == "00000"
+
+
+def derive_mapping(admin_tree, legal_tree):
+    """행정동 -> 법정동 대응표를 두 코드 체계의 지역 트리에서 어림한다.
+
+    돌려주는 DataFrame: 행정동코드, 행정동명, 법정동코드, 법정동명, 방법('코드' / '이름' / '이름(부분)')
+    """
+    legal_codes = [code for code in legal_tree.names if code != ROOT]
+    by_emd = defaultdict(list)  # 법정 코드 앞 8자리(읍면동) -> 법정 코드들
+    dongs_by_sigungu = defaultdict(list)  # 시군구 5자리 -> 법정동(리 제외)
+    for code in legal_codes:
+        if _is_sigungu_or_above(code):
+            continue
+        by_emd[code[:8]].append(code)
+        if code[8:] == "00":
+            dongs_by_sigungu[code[:5]].append(code)
+
+    rows = []
+    for admin in admin_tree.names:
+        if admin == ROOT:
+            continue
+        if _is_sigungu_or_above(admin):
+            if admin in legal_tree:
+                rows.append((admin, admin, "코드"))
+            continue
+        # 읍면: 법정 체계에서는 읍면 아래 리 코드가 같은 앞 8자리를 쓴다
+        same_prefix = by_emd.get(admin[:8], [])
+        if same_prefix:
+            rows += [(admin, legal, "코드") for legal in same_prefix]
+            continue
+        key = name_key(admin_tree.full_name(admin))
+        candidates = dongs_by_sigungu.get(admin[:5], [])
+        exact = [legal for legal in candidates if name_key(legal_tree.full_name(legal)) == key]
+        if exact:
+            rows += [(admin, legal, "이름") for legal in exact]
+            continue
+        # '청운효자동' 처럼 법정동 여러 개의 이름을 합친 행정동
+        partial = [
+            legal for legal in candidates
+            if len(legal_key := name_key(legal_tree.full_name(legal))) >= 2 and legal_key in key
+        ]
+        rows += [(admin, legal, "이름(부분)") for legal in partial]
+
+    return _mapping_frame(rows, admin_tree, legal_tree)
+
+
+def _mapping_frame(rows, admin_tree, legal_tree):
+    frame = pd.DataFrame(rows, columns=["행정동코드", "법정동코드", "방법"])
+    frame.insert(1, "행정동명", [admin_tree.names.get(code, "") for code in frame["행정동코드"]])
+    frame["법정동명"] = [legal_tree.names.get(code, "") for code in frame["법정동코드"]]
+    return frame[["행정동코드", "행정동명", "법정동코드", "법정동명", "방법"]]
+
+
+def read_mapping(data, admin_tree, legal_tree):
+    """행정안전부 대응표 CSV (행정동코드/행정기관코드 + 법정동코드 컬럼) -> derive_mapping 과 같은 모양"""
+    try:
+        raw = pd.read_csv(io.BytesIO(data), dtype=str, encoding="cp949")
+    except UnicodeDecodeError:
+        raw = pd.read_csv(io.BytesIO(data), dtype=str, encoding="utf-8-sig")
+    admin_col = next((col for col in raw.columns if "행정" in col and "코드" in col), None)
+    legal_col = next((col for col in raw.columns if "법정동코드" in col), None)
+    if admin_col is None or legal_col is None:
+        raise ValueError("대응표에서 행정동코드/법정동코드 컬럼을 찾지 못했습니다.")
+    pairs = raw[[admin_col, legal_col]].dropna().drop_duplicates()
+    rows = [(admin.strip().ljust(10, "0"), legal.strip().ljust(10, "0"), "파일") for admin, legal in pairs.itertuples(index=False)]
+    return _mapping_frame(rows, admin_tree, legal_tree)
+
+
+class RegionData:
+    """행정코드 -> 인구 / 평균연령(파일, 계산) / 인구증감 한 줄씩의 표 + 두 코드 체계 대응"""
+
+    def __init__(self, frame, mapping, cube, change=None):
+        self.frame = frame  # index: 행정코드 (전국은 ROOT)
+        self.mapping = mapping
+        self.cube = cube
+        self.change = change  # (법정동 DataFrame, RegionTree) 또는 None
+        self.tree = cube.tree
+        self.legal_of = defaultdict(list)
+        self.admin_of = defaultdict(list)
+        for admin, legal in zip(mapping["행정동코드"], mapping["법정동코드"]):
+            self.legal_of[admin].append(legal)
+            self.admin_of[legal].append(admin)
+
+    def __contains__(self, code):
+        return code in self.frame.index
+
+    def row(self, code):
+        return self.frame.loc[code]
+
+    def rows(self, codes):
+        return self.frame.loc[[code for code in codes if code in self.frame.index]]
+
+    def children(self, code):
+        """하위 지역 표 (지도/표 사이를 오갈 때 다시 합치지 않고 잘라 쓰기만 한다)"""
+        return self.rows(self.tree.children_of(code))
+
+    def unmapped_legal(self, code):
+        """code(시군구) 아래 법정동 중 대응표에 없는 것 (증감이 시군구 합계에만 들어간다)"""
+        if self.change is None:
+            return []
+        _, legal_tree = self.change
+        return [
+            legal for legal in legal_tree.descendants(code)
+            if legal != code and not _is_sigungu_or_above(legal) and legal not in self.admin_of
+        ]
+
+    def avg_check(self):
+        """파일 평균연령과 연령 분포로 계산한 값이 맞지 않는 지역"""
+        return self.frame[self.frame["평균연령_검증"] == "불일치"]
+
+
+def _mean_age_columns(cube):
+    rows = np.arange(len(cube))
+    columns = {"평균연령_계산": cube.mean_age(rows, "계") if cube.has_sex("계") else None}
+    for sex, label in (("남", "남자"), ("여", "여자")):
+        if cube.has_sex(sex):
+            columns[f"{label} 평균연령_계산"] = cube.mean_age(rows, sex)
+    if columns["평균연령_계산"] is None:
+        # 계 컬럼이 없는 파일: 남녀 인구로 가중 평균
+        male, female = cube.block(rows, "남").sum(axis=1), cube.block(rows, "여").sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns["평균연령_계산"] = (
+                columns["남자 평균연령_계산"] * male + columns["여자 평균연령_계산"] * female
+            ) / (male + female)
+    return {name: np.round(values, 2) for name, values in columns.items()}
+
+
+def _check_average(frame):
+    """남/여를 모두 계산할 수 있으면 성별로 비교하고, 계만 있으면 남/여 평균 사이에 드는지 본다."""
+    if "남자 평균연령" not in frame:
+        return pd.Series("파일 없음", index=frame.index)
+    male, female = frame["남자 평균연령"], frame["여자 평균연령"]
+    if "남자 평균연령_계산" in frame:
+        diff = np.maximum((frame["남자 평균연령_계산"] - male).abs(), (frame["여자 평균연령_계산"] - female).abs())
+        ok = diff <= AVG_CHECK_TOLERANCE + 0.05
+    else:
+        low = np.minimum(male, female) - AVG_CHECK_TOLERANCE
+        high = np.maximum(male, female) + AVG_CHECK_TOLERANCE
+        ok = frame["평균연령_계산"].between(low, high)
+    result = np.where(ok, "일치", "불일치")
+    result = np.where(male.isna() | frame["평균연령_계산"].isna(), "비교 불가", result)
+    return pd.Series(result, index=frame.index)
+
+
+def admin_code(code):
+    """전국 코드는 지역 트리처럼 ROOT 로"""
+    return ROOT if code == NATION_CODE else code
+
+
+def build(age_data, avg_data=None, change_data=None, mapping_data=None):
+    """세 CSV(+대응표) 바이트 -> RegionData. 평균연령/증감 파일이 없으면 그 컬럼만 빈다."""
+    cube = population.load_age_cube(age_data)
+    rows = np.arange(len(cube))
+    if cube.has_sex("계"):
+        totals = cube.block(rows, "계").sum(axis=1)
+    else:
+        totals = cube.block(rows, "남").sum(axis=1) + cube.block(rows, "여").sum(axis=1)
+    frame = pd.DataFrame(
+        {"지역": cube.names, "인구": totals, **_mean_age_columns(cube)},
+        index=pd.Index([admin_code(code) for code in cube.codes], name="코드"),
+    )
+    frame = frame[(pd.Index(cube.codes) != "") & ~frame.index.duplicated()]
+
+    # 평균연령 파일: 같은 행정코드 -> 해시 조인
+    if avg_data is not None:
+        avg = population.read_mois_csv(avg_data)
+        avg_codes = [admin_code(split_label(str(label))[1]) for label in avg["행정구역"]]
+        male_col = next(col for col in avg.columns if col.endswith("남자 평균연령"))
+        female_col = next(col for col in avg.columns if col.endswith("여자 평균연령"))
+        avg_frame = pd.DataFrame({
+            "남자 평균연령": pd.to_numeric(avg[male_col], errors="coerce").to_numpy(),
+            "여자 평균연령": pd.to_numeric(avg[female_col], errors="coerce").to_numpy(),
+        }, index=avg_codes)
+        frame = frame.join(avg_frame[~avg_frame.index.duplicated()], how="left")
+    frame["평균연령_검증"] = _check_average(frame)
+
+    # 인구증감 파일: 시도·시군구는 코드로, 읍면동은 대응표의 법정동을 더해서
+    change = None
+    mapping = pd.DataFrame(columns=["행정동코드", "행정동명", "법정동코드", "법정동명", "방법"])
+    if change_data is not None:
+        change_df = population.read_mois_csv(change_data)
+        change_df["증감_계"] = change_df[next(col for col in change_df.columns if col.endswith("인구증감_계"))]
+        change_df["증감_남"] = change_df[next(col for col in change_df.columns if col.endswith("인구증감_남자인구수"))]
+        change_df["증감_여"] = change_df[next(col for col in change_df.columns if col.endswith("인구증감_여자인구수"))]
+        legal_tree = RegionTree(change_df["법정구역"])
+        change = (change_df, legal_tree)
+        if mapping_data is not None:
+            mapping = read_mapping(mapping_data, cube.tree, legal_tree)
+        else:
+            mapping = derive_mapping(cube.tree, legal_tree)
+        frame = frame.join(_joined_change(frame, mapping, change_df, legal_tree), how="left")
+
+    return RegionData(frame, mapping, cube, change)
+
+
+_cached_build = None
+
+
+def load(age_data, avg_data=None, change_data=None, mapping_data=None):
+    """build() 를 st.cache_resource 로 감싼 것. 같은 파일 조합이면 어느 페이지에서 불러도 다시 잇지 않는다."""
+    global _cached_build
+    if _cached_build is None:
+        import streamlit as st
+
+        _cached_build = st.cache_resource(
+            max_entries=CACHE_ENTRIES, show_spinner="📦 파일들을 지역 코드로 잇는 중..."
+        )(build)
+    return _cached_build(age_data, avg_data, change_data, mapping_data)
+
+
+def _joined_change(frame, mapping, change_df, legal_tree):
+    """행정코드별 증감과 잇는 방법.
+
+    한 법정동이 행정동 여러 곳에 걸치면 그 법정동의 증감을 행정동 인구 비율로 나눠 더하고 '대응표(배분)' 으로 표시한다
+    (나눠도 시군구 안의 합계는 그대로 유지된다).
+    """
+    table = change_df[CHANGE_COLUMNS].to_numpy(dtype=np.float64)
+    legal_row = {code: rows[0] for code, rows in legal_tree.rows.items() if rows}
+    population_of = frame["인구"].to_dict()
+    pairs = mapping[mapping["법정동코드"].isin(legal_row.keys()) & mapping["행정동코드"].isin(frame.index)]
+    pairs = pairs[[not _is_sigungu_or_above(code) for code in pairs["행정동코드"]]]
+
+    # 법정동마다 걸친 행정동들의 인구 합 -> 행정동 몫
+    weight = pairs["행정동코드"].map(population_of).astype(np.float64).to_numpy()
+    share_total = pd.Series(weight).groupby(pairs["법정동코드"].to_numpy()).transform("sum").to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(share_total > 0, weight / share_total, 0.0)
+    split = pd.Series(share != 1.0).groupby(pairs["행정동코드"].to_numpy()).any().to_dict()
+
+    sums = defaultdict(lambda: np.zeros(len(CHANGE_COLUMNS)))
+    for admin, legal, part in zip(pairs["행정동코드"], pairs["법정동코드"], share):
+        sums[admin] += table[legal_row[legal]] * part
+
+    values = np.full((len(frame), len(CHANGE_COLUMNS)), np.nan)
+    how = np.full(len(frame), None, dtype=object)
+    for idx, admin in enumerate(frame.index):
+        if (admin == ROOT or _is_sigungu_or_above(admin)) and admin in legal_row:
+            values[idx] = table[legal_row[admin]]
+            how[idx] = "코드"
+        elif admin in sums:
+            values[idx] = np.round(sums[admin])
+            how[idx] = "대응표(배분)" if split[admin] else "대응표"
+    joined = pd.DataFrame(values, columns=CHANGE_COLUMNS, index=frame.index)
+    joined["증감_연결"] = how
+    return joined
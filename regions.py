@@ -0,0 +1,138 @@
+import re
+
+# 10자리 행정코드로 만든 지역 계층 트리
+#   시도(2) + 시군구(3) + 읍면동(3) + 리(2)
+#   예) 4111156000 = 경기도(41) 수원시 장안구(111) 파장동(560)
+# 일반구가 있는 시(수원시 4111000000)는 구(4111100000)의 부모가 된다.
+
+_CODE_RE = re.compile(r"\s*\((\d{10})\)\s*$")
+
+ROOT = ""
+NATION_CODE = "1000000000"  # 전국
+
+
+def split_label(label):
+    """'서울특별시 종로구 (1111000000)' -> ('서울특별시 종로구', '1111000000')"""
+    match = _CODE_RE.search(label)
+    if not match:
+        return label.strip(), ""
+    return " ".join(label[:match.start()].split()), match.group(1)
+
+
+def _parent_candidates(code):
+    # 가까운 조상부터: 읍면동 -> 시군구 -> 일반구가 있는 시 -> 시도
+    return (
+        code[:8] + "00",
+        code[:5] + "00000",
+        code[:4] + "000000",
+        code[:2] + "00000000",
+    )
+
+
+class RegionTree:
+    """행정구역 라벨 목록으로 한 번 만들어 두고 자식/행 번호를 dict 로 바로 찾는다."""
+
+    def __init__(self, labels):
+        self.names = {ROOT: "전국"}
+        self.rows = {ROOT: []}
+        self.parent = {}
+        self.children = {ROOT: []}
+
+        for row, label in enumerate(labels):
+            full_name, code = split_label(str(label))
+            if not code:
+                continue
+            if code == NATION_CODE:
+                code = ROOT
+            else:
+                self.names.setdefault(code, full_name)
+            self.rows.setdefault(code, []).append(row)
+
+        for code in self.names:
+            if code == ROOT:
+                continue
+            parent = next(
+                (c for c in _parent_candidates(code) if c != code and c in self.names and self._may_contain(c, code)),
+                ROOT,
+            )
+            self.parent[code] = parent
+            self.children.setdefault(parent, []).append(code)
+            self.children.setdefault(code, [])
+
+        for kids in self.children.values():
+            kids.sort()
+
+    def _may_contain(self, parent, code):
+        # 앞 4자리가 같아도 일반구가 아닌 이웃 군일 수 있다 (영동군 4374000000 / 증평군 4374500000).
+        # 일반구는 이름이 시 이름으로 시작한다.
+        if parent != code[:4] + "000000" or code[5:] != "0" * 5:
+            return True
+        return self.names[code].startswith(self.names[parent] + " ")
+
+    def __contains__(self, code):
+        return code in self.names
+
+    def full_name(self, code):
+        return self.names[code]
+
+    def name(self, code):
+        """부모 이름을 뺀 짧은 이름: '경기도 수원시 장안구' -> '장안구'"""
+        full = self.names[code]
+        parent = self.parent.get(code)
+        if not parent:
+            return full
+        parent_name = self.names[parent]
+        if not full.startswith(parent_name):
+            return full
+        return full[len(parent_name):].strip() or full.split()[-1]
+
+    def children_of(self, code=ROOT):
+        return self.children.get(code, [])
+
+    def child_options(self, parents):
+        """여러 부모의 자식 코드와 selectbox 용 format_func.
+
+        부모가 둘 이상이면 '중구' 처럼 겹치는 이름을 구분하도록 부모 이름을 붙인다.
+        """
+        codes = [code for parent in parents for code in self.children_of(parent)]
+        if len(parents) > 1:
+            return codes, lambda code: f"{self.name(self.parent[code])} {self.name(code)}"
+        return codes, self.name
+
+    def rows_of(self, code):
+        return self.rows.get(code, [])
+
+    def depth(self, code):
+        depth = 0
+        while code != ROOT:
+            code = self.parent[code]
+            depth += 1
+        return depth
+
+    def path(self, code):
+        """최상위(시도)부터 code 까지의 코드 목록"""
+        path = []
+        while code != ROOT:
+            path.append(code)
+            code = self.parent[code]
+        return path[::-1]
+
+    def descendants(self, code):
+        """code 아래 모든 지역 코드 (code 자신 포함, 위에서부터)"""
+        stack, found = [code], []
+        while stack:
+            current = stack.pop()
+            found.append(current)
+            stack.extend(reversed(self.children_of(current)))
+        return found
+
+    def subtree_rows(self, codes):
+        """여러 지역의 하위 전체 행 번호 (중복 없이, 파일 순서대로)"""
+        rows = set()
+        for code in codes:
+            for current in self.descendants(code):
+                rows.update(self.rows_of(current))
+        return sorted(rows)
+
+    def leaves(self, code=ROOT):
+        return [c for c in self.descendants(code) if not self.children_of(c)]
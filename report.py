@@ -0,0 +1,272 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import pickle
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import plotly.graph_objects as go
+
+import age_bands
+import change_chart
+import change_rollup
+import population
+import pyramid
+from regions import NATION_CODE, ROOT, RegionTree
+
+# 지역별 정적 보고서 일괄 생성 (Streamlit 없이 실행)
+#   python report.py 202506_202506_연령별인구현황_월간.csv
+#   python report.py 연령별.csv --root 4100000000 --formats html png --workers 8
+#   python report.py 연령별.csv --change "202506_202506_법정동별 인구증감_월간.csv" --out reports
+#
+# 지역마다 out/pyramid/<코드>.html|json|png (인구 피라미드),
+# 하위 지역이 있으면 out/avg_age/<코드>.* (하위 지역 평균 나이) 와 out/change/<코드>.* (하위 지역 인구 증감) 를 만든다.
+# - 부모 프로세스가 CSV 를 한 번만 읽어 out/_data 에 배열(과 증감 계층 합계)을 두고, 작업 프로세스는 그것을 memory map 으로 연다
+# - 파일은 임시 파일에 쓴 뒤 바꿔치기하므로, 중간에 끊겨도 다시 실행하면 이미 만든 지역은 건너뛴다
+#   (입력 파일이나 옵션이 바뀌면 처음부터 다시 만든다. --force 로 강제할 수도 있다)
+
+FORMATS = ("html", "json", "png")
+KINDS = ("pyramid", "avg_age", "change")
+CHUNK_SIZE = 40  # 작업 하나에 넣는 지역 수 (프로세스 간 왕복을 줄인다)
+DATA_DIR = "_data"
+DATA_VERSION = "2"  # _data 에 저장하는 모양이 바뀌면 올려서 다시 만든다
+PLOTLY_JS = "plotly.min.js"  # html 은 이 파일 하나를 같이 쓴다 (지역마다 3MB 씩 넣지 않음)
+
+
+def file_stem(code):
+    return code or NATION_CODE
+
+
+# ---------- 작업 프로세스 ----------
+_STATE = {}
+
+
+def _init_worker(out_dir, options):
+    """작업 프로세스마다 한 번: 부모가 저장한 배열/표를 memory map 으로 연다."""
+    data_dir = Path(out_dir) / DATA_DIR
+    meta = json.loads((data_dir / "meta.json").read_text(encoding="utf-8"))
+    counts = np.load(data_dir / "age_counts.npy", mmap_mode="r")
+    cube = population.AgeCube(meta["labels"], counts, meta["sexes"], meta["month"])
+    change = None
+    if (data_dir / "change_rollup.pkl").exists():
+        # 부모가 직접 만들어 저장한 파일만 읽는다
+        change = pickle.loads((data_dir / "change_rollup.pkl").read_bytes())
+    _STATE.update(out=Path(out_dir), cube=cube, change=change, options=options)
+
+
+def _write(path, fig, fmt):
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "html":
+        fig.write_html(tmp, include_plotlyjs=f"../{PLOTLY_JS}", full_html=True)
+    elif fmt == "json":
+        tmp.write_text(fig.to_json(), encoding="utf-8")
+    else:
+        fig.write_image(tmp, format="png", width=1200, height=fig.layout.height or 800)
+    os.replace(tmp, path)
+
+
+def _figures(code):
+    """code 지역의 (종류, 그림) 목록. 그림은 실제로 필요할 때만 만든다."""
+    cube, change, options = _STATE["cube"], _STATE["change"], _STATE["options"]
+    tree = cube.tree
+    bands = age_bands.BAND_SETS[options["bands"]]
+    labels = [band[0] for band in bands]
+    name = tree.full_name(code)
+
+    rows = tree.rows_of(code)
+    if rows:
+        sides = pyramid.sides_from_cube(cube, rows[:1], bands)
+        yield "pyramid", lambda: pyramid.pyramid_figure(labels, sides, f"{name} 인구 피라미드")
+
+    children = [child for child in tree.children_of(code) if tree.rows_of(child)]
+    if children:
+        yield "avg_age", lambda: avg_age_figure(cube, children, f"{name} 하위 지역 평균 나이")
+
+    if change is not None and code in change and change.children_of(code):
+        # 합계는 말단(동/리) 행을 더한 값 (파일의 소계 행은 쓰지 않는다)
+        yield "change", lambda: change_chart.change_figure(
+            change.frame(change.children_of(code)), "증감_계", f"{name} 하위 지역 인구 증감"
+        )
+
+
+def avg_age_figure(cube, codes, title):
+    """하위 지역별 평균 나이 막대 (남/여가 있으면 나란히, 없으면 전체)"""
+    tree = cube.tree
+    rows = [tree.rows_of(code)[0] for code in codes]
+    names = [tree.name(code) for code in codes]
+    sexes = [sex for sex in ("남", "여") if cube.has_sex(sex)] or ["계"]
+    fig = go.Figure()
+    for sex in sexes:
+        fig.add_trace(go.Bar(
+            x=names, y=np.round(cube.mean_age(rows, sex), 1),
+            name={"남": "남자", "여": "여자", "계": "전체"}[sex],
+            marker_color=pyramid.SEX_COLORS.get(sex, "gray"),
+        ))
+    fig.update_layout(
+        title=title, barmode="group", xaxis_tickangle=-45, height=600,
+        xaxis_title="지역", yaxis_title="평균 나이 (세)",
+    )
+    return fig
+
+
+def render_chunk(codes):
+    """지역 코드 묶음을 그린다 -> ([(코드, 종류 목록)], [(코드, 오류)])"""
+    out, options = _STATE["out"], _STATE["options"]
+    done, failed = [], []
+    for code in codes:
+        try:
+            kinds = []
+            for kind, make in _figures(code):
+                kinds.append(kind)
+                paths = [out / kind / f"{file_stem(code)}.{fmt}" for fmt in options["formats"]]
+                if not options["force"] and all(path.exists() for path in paths):
+                    continue  # 지난번 실행에서 이미 만듦
+                fig = make()
+                for path, fmt in zip(paths, options["formats"]):
+                    _write(path, fig, fmt)
+            done.append((code, kinds))
+        except Exception as e:
+            failed.append((code, f"{type(e).__name__}: {e}"))
+    return done, failed
+
+
+# ---------- 부모 프로세스 ----------
+def run_key(age_data, change_data, options):
+    digest = hashlib.sha256(age_data)
+    digest.update(change_data or b"")
+    digest.update(options["bands"].encode())
+    digest.update(DATA_VERSION.encode())  # 형식은 파일마다 있는지 따로 보므로 키에 넣지 않는다
+    return digest.hexdigest()
+
+
+def prepare_data(out, age_data, change_data, key):
+    """CSV 를 한 번 읽어 작업 프로세스가 같이 쓸 파일로 저장. 같은 입력이면 다시 만들지 않는다.
+
+    입력이나 옵션이 지난 실행과 다르면 예전 그림은 지우고 처음부터 만든다.
+    """
+    data_dir = out / DATA_DIR
+    meta_path = data_dir / "meta.json"
+    if meta_path.exists():
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("key") == key:
+            return
+        meta_path.unlink()
+
+    for kind in KINDS:
+        shutil.rmtree(out / kind, ignore_errors=True)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    cube = population.load_age_cube(age_data)
+    np.save(data_dir / "age_counts.npy", np.ascontiguousarray(cube.counts))
+    (data_dir / "change.arrow").unlink(missing_ok=True)  # 예전 실행이 남긴 행 단위 표
+    change_path = data_dir / "change_rollup.pkl"
+    if change_data is not None:
+        df = population.read_mois_csv(change_data)
+        df["증감_계"] = df[next(col for col in df.columns if col.endswith("인구증감_계"))]
+        df["증감_남"] = df[next(col for col in df.columns if col.endswith("인구증감_남자인구수"))]
+        df["증감_여"] = df[next(col for col in df.columns if col.endswith("인구증감_여자인구수"))]
+        df["인구"] = df[next(col for col in df.columns if col.endswith("당월인구수_계"))]
+        # 모든 단계 합계를 여기서 한 번만 만들고, 작업 프로세스는 저장한 것을 읽어 쓴다
+        rollup = change_rollup.Rollup(df[["법정구역"] + change_rollup.COLUMNS], RegionTree(df["법정구역"]))
+        tmp = change_path.with_name(change_path.name + ".tmp")
+        tmp.write_bytes(pickle.dumps(rollup, protocol=pickle.HIGHEST_PROTOCOL))
+        os.replace(tmp, change_path)
+    else:
+        change_path.unlink(missing_ok=True)
+    # meta.json 을 마지막에 써서, 중간에 끊기면 다음 실행에서 다시 만든다
+    meta = {"key": key, "labels": cube.labels, "sexes": list(cube.sexes), "month": cube.month}
+    tmp = meta_path.with_name("meta.json.tmp")
+    tmp.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, meta_path)
+
+
+def write_index(out, tree, results, formats):
+    """index.json (지역 -> 만든 그림 종류) 와 링크 모음 index.html"""
+    entries = []
+    for code in sorted(results, key=lambda c: (tree.depth(c), c)):
+        entries.append({
+            "code": file_stem(code), "name": tree.full_name(code),
+            "parent": file_stem(tree.parent[code]) if code in tree.parent else None,
+            "files": {kind: [f"{kind}/{file_stem(code)}.{fmt}" for fmt in formats] for kind in results[code]},
+        })
+    (out / "index.json").write_text(json.dumps(entries, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    if "html" in formats:
+        lines = ["<!doctype html><meta charset='utf-8'><title>지역별 인구 보고서</title><ul>"]
+        for entry in entries:
+            links = " ".join(
+                f"<a href='{kind}/{entry['code']}.html'>{kind}</a>" for kind in KINDS if kind in entry["files"]
+            )
+            lines.append(f"<li>{html.escape(entry['name'])} ({entry['code']}) {links}</li>")
+        lines.append("</ul>")
+        (out / "index.html").write_text("\n".join(lines), encoding="utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="지역별 인구 피라미드/평균 나이/인구 증감 보고서 일괄 생성")
+    parser.add_argument("age_csv", type=Path, help="연령별 인구현황 CSV")
+    parser.add_argument("--change", type=Path, help="법정동별 인구증감 CSV (없으면 증감 그래프는 건너뜀)")
+    parser.add_argument("--out", type=Path, default=Path("reports"), help="출력 폴더 (기본 reports)")
+    parser.add_argument("--root", default=ROOT, help="이 행정코드 아래 지역만 (기본: 전국)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["html", "json"])
+    parser.add_argument("--bands", choices=list(age_bands.BAND_SETS), default="5세 단위", help="피라미드 막대 단위")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="이미 만든 파일도 다시 만든다")
+    args = parser.parse_args(argv)
+
+    if "png" in args.formats:
+        try:
+            import kaleido  # noqa: F401  (plotly 가 PNG 를 만들 때 쓰는 패키지)
+        except ImportError:
+            parser.error("png 형식은 kaleido 패키지가 필요합니다 (pip install kaleido)")
+
+    age_data = args.age_csv.read_bytes()
+    change_data = args.change.read_bytes() if args.change else None
+    options = {"bands": args.bands, "formats": args.formats, "force": args.force}
+
+    out = args.out
+    prepare_data(out, age_data, change_data, run_key(age_data, change_data, options))
+    for kind in KINDS:
+        (out / kind).mkdir(parents=True, exist_ok=True)
+    if "html" in args.formats and not (out / PLOTLY_JS).exists():
+        from plotly.offline import get_plotlyjs
+
+        (out / PLOTLY_JS).write_text(get_plotlyjs(), encoding="utf-8")
+
+    # 부모 프로세스도 지역 트리는 필요하다 (라벨만 있으면 되므로 가볍다)
+    meta = json.loads((out / DATA_DIR / "meta.json").read_text(encoding="utf-8"))
+    tree = RegionTree(meta["labels"])
+    root = "" if args.root == NATION_CODE else args.root
+    if root not in tree:
+        parser.error(f"{args.root} 지역이 파일에 없습니다")
+    codes = tree.descendants(root)
+    chunks = [codes[i:i + CHUNK_SIZE] for i in range(0, len(codes), CHUNK_SIZE)]
+    print(f"{tree.full_name(root)} 아래 {len(codes):,}개 지역, 작업 {len(chunks)}개, 프로세스 {args.workers}개",
+          file=sys.stderr)
+
+    results, failures = {}, []
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(str(out), options)) as pool:
+        futures = [pool.submit(render_chunk, chunk) for chunk in chunks]
+        for finished, future in enumerate(as_completed(futures), 1):
+            done, failed = future.result()
+            results.update(done)
+            failures += failed
+            print(f"\r{finished}/{len(chunks)}", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+
+    write_index(out, tree, results, args.formats)
+    print(f"✅ {len(results):,}개 지역 보고서: {out}")
+    if failures:
+        print(f"❌ 실패 {len(failures)}개 지역 (다시 실행하면 실패한 것만 다시 만든다)")
+        for code, message in failures[:20]:
+            print(f"  {file_stem(code)} {tree.full_name(code)}: {message}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import os
+import sqlite3
+import threading
+import time
+from itertools import islice
+from pathlib import Path
+
+# 가위바위보(test1.py) 점수 / 순위표 (모든 세션 공용)
+# - 점수는 SQLite 에 두어 새로고침이나 서버 재시작 후에도 남는다
+# - 한 판 결과는 잠금 안에서 "읽고 -> 계산 -> 쓰기" 를 한 트랜잭션으로 처리한다 (동시에 눌러도 점수가 꼬이지 않음)
+# - 점수 범위가 정해져 있으므로(MIN_SCORE ~ MAX_SCORE) 점수별 인원 수를 펜윅 트리로 들고 있어
+#   "내 순위"와 상위 K 명의 시작 위치를 O(log 점수 범위) 로 찾는다. 매번 전원을 정렬하지 않는다.
+# - 순위 색인은 프로세스 메모리에 있으므로 Streamlit 서버 프로세스 하나를 기준으로 한다 (시작할 때 DB 에서 다시 만든다)
+
+DB_PATH = Path(os.environ.get("SCOREBOARD_DB_PATH", Path(__file__).parent / "data_store" / "scoreboard.sqlite3"))
+
+START_SCORE = 15
+WIN_POINTS = 5
+LOSE_POINTS = 3
+GOAL_SCORE = 50  # 이 점수 이상이면 성공, 0 이하면 실패로 게임 끝
+
+# 게임이 끝나면 더 못 하므로 점수는 이 범위를 벗어나지 않는다
+MIN_SCORE = 0 - LOSE_POINTS + 1
+MAX_SCORE = GOAL_SCORE + WIN_POINTS - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    name TEXT PRIMARY KEY,
+    score INTEGER NOT NULL,
+    win INTEGER NOT NULL DEFAULT 0,
+    lose INTEGER NOT NULL DEFAULT 0,
+    game_over INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class _Fenwick:
+    """0 ~ size-1 칸의 개수. 한 칸 더하기 / 앞에서부터 합이 모두 O(log size)."""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, idx, delta):
+        idx += 1
+        while idx <= self.size:
+            self.tree[idx] += delta
+            idx += idx & -idx
+
+    def prefix(self, idx):
+        """0 ~ idx 칸의 합 (idx < 0 이면 0)"""
+        total = 0
+        idx = min(idx, self.size - 1) + 1
+        while idx > 0:
+            total += self.tree[idx]
+            idx -= idx & -idx
+        return total
+
+    def find(self, count):
+        """앞에서부터 합이 count 이상이 되는 첫 칸 (O(log size))"""
+        pos, step = 0, 1 << self.size.bit_length()
+        while step:
+            if pos + step <= self.size and self.tree[pos + step] < count:
+                pos += step
+                count -= self.tree[pos]
+            step >>= 1
+        return pos
+
+
+def _row_to_player(row):
+    name, score, win, lose, game_over = row
+    return {"name": name, "score": score, "win": win, "lose": lose, "game_over": bool(game_over)}
+
+
+class Scoreboard:
+    """프로세스에 하나 만들어 공유한다. SQLite 연결은 스레드(세션)마다 따로 연다."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()  # DB 쓰기와 순위 색인을 같이 바꾼다
+
+        # 순위 색인: 높은 점수가 앞 칸에 오도록 (MAX_SCORE - 점수) 칸에 센다. 칸마다 이름 -> 마지막으로 바뀐 시각
+        # (점수가 바뀌면 빼고 다시 넣으므로 칸 dict 는 그 점수에 도달한 순서를 그대로 유지한다)
+        self._counts = _Fenwick(MAX_SCORE - MIN_SCORE + 1)
+        self._buckets = [dict() for _ in range(MAX_SCORE - MIN_SCORE + 1)]
+        self._score_of = {}
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            # 칸마다 점수에 도달한 순서대로 들어가도록 바뀐 시각 순으로 읽는다
+            rows = conn.execute("SELECT name, score, updated_at FROM players ORDER BY updated_at")
+            for name, score, updated_at in rows:
+                self._index(name, score, updated_at)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")  # 읽기와 쓰기가 서로 막지 않게
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ---------- 순위 색인 ----------
+    @staticmethod
+    def _slot(score):
+        return MAX_SCORE - min(max(score, MIN_SCORE), MAX_SCORE)
+
+    def _index(self, name, score, updated_at):
+        old = self._score_of.get(name)
+        if old is not None:
+            self._counts.add(self._slot(old), -1)
+            self._buckets[self._slot(old)].pop(name, None)
+        self._score_of[name] = score
+        self._counts.add(self._slot(score), 1)
+        self._buckets[self._slot(score)][name] = updated_at
+
+    # ---------- 점수 ----------
+    def _update(self, name, change):
+        """잠금 + 트랜잭션 안에서 한 사람 행을 읽어 change(행) 로 바꾸고 색인도 같이 고친다."""
+        with self._lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT name, score, win, lose, game_over, updated_at FROM players WHERE name = ?", (name,)
+                ).fetchone()
+                player = _row_to_player(row[:5]) if row else {
+                    "name": name, "score": START_SCORE, "win": 0, "lose": 0, "game_over": False
+                }
+                player = change(player)
+                moved = row is None or row[1] != player["score"]
+                # 점수가 그대로면 도달 시각도 그대로 둔다 (재시작 후 같은 점수 안의 순서가 바뀌지 않게)
+                now = time.time() if moved else row[5]
+                conn.execute(
+                    "INSERT OR REPLACE INTO players (name, score, win, lose, game_over, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, player["score"], player["win"], player["lose"], int(player["game_over"]), now),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if moved or self._score_of.get(name) != player["score"]:
+                self._index(name, player["score"], now)
+            return player
+
+    def player(self, name):
+        """없으면 시작 점수로 등록해서 돌려준다."""
+        row = self._conn().execute(
+            "SELECT name, score, win, lose, game_over FROM players WHERE name = ?", (name,)
+        ).fetchone()
+        if row is not None:
+            return _row_to_player(row)
+        return self._update(name, lambda player: player)
+
+    def play(self, name, won):
+        """한 판 결과를 반영한다. 이미 끝난 게임이면 그대로 둔다."""
+        def change(player):
+            if player["game_over"]:
+                return player
+            if won:
+                player["score"] += WIN_POINTS
+                player["win"] += 1
+            else:
+                player["score"] -= LOSE_POINTS
+                player["lose"] += 1
+            player["game_over"] = player["score"] <= 0 or player["score"] >= GOAL_SCORE
+            return player
+
+        return self._update(name, change)
+
+    def reset(self, name):
+        return self._update(name, lambda player: {
+            "name": name, "score": START_SCORE, "win": 0, "lose": 0, "game_over": False
+        })
+
+    # ---------- 순위 ----------
+    def rank(self, name):
+        """(등수, 전체 인원). 같은 점수는 같은 등수 (1 + 나보다 점수가 높은 사람 수)."""
+        with self._lock:
+            score = self._score_of.get(name)
+            if score is None:
+                return None, len(self._score_of)
+            return 1 + self._counts.prefix(self._slot(score) - 1), len(self._score_of)
+
+    def top(self, k=10):
+        """상위 k 명 [{등수, 이름, 점수}]. k 번째 사람이 있는 점수 칸까지만 본다 (같은 점수는 먼저 도달한 순)."""
+        with self._lock:
+            if not self._score_of or k <= 0:
+                return []
+            last_slot = self._counts.find(min(k, len(self._score_of)))
+            rows, ahead = [], 0
+            for slot in range(last_slot + 1):
+                bucket = self._buckets[slot]
+                if not bucket:
+                    continue
+                for name in islice(bucket, k - len(rows)):
+                    rows.append({"등수": ahead + 1, "이름": name, "점수": self._score_of[name]})
+                ahead += len(bucket)
+            return rows
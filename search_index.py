@@ -0,0 +1,131 @@
+import math
+import unicodedata
+from collections import Counter, defaultdict
+
+# 북마크 검색 색인 (메모리 안의 역색인)
+# - 이름/폴더/설명/주소를 공백을 뺀 2글자 조각(bigram)으로 나눠 조각 -> 북마크 id 집합을 둔다
+#   (한 글자 검색어는 조각 없이 전체를 훑는다)
+# - 한글은 초성 문자열(서울시청 -> ㅅㅇㅅㅊ)도 따로 색인해서 "ㅅㅇㅅㅊ" 로도 찾는다
+# - 추가/수정/삭제 때 그 북마크의 조각만 넣고 뺀다
+# - 그대로 들어 있는 결과가 없으면 조각이 많이 겹치는 순서로 비슷한 결과를 돌려준다 (오타 허용)
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+CHOSUNG_SET = set(CHOSUNG)
+# 음절 -> 초성 변환표 (가 ~ 힣, 한 음절의 초성은 (코드 - 0xAC00) // 588 번째)
+CHOSUNG_TABLE = {0xAC00 + i: CHOSUNG[i // 588] for i in range(11172)}
+CHOSUNG_KEY = "\x00"  # 초성 조각은 앞에 이 표시를 붙여 일반 조각과 섞이지 않게 한다
+# (필드, 가중치): 이름에서 찾은 것을 가장 앞에
+FIELDS = (("name", 4.0), ("folder", 2.0), ("description", 1.0), ("address", 0.5))
+FUZZY_MIN_OVERLAP = 0.5  # 비슷한 결과로 인정할 최소 조각 겹침 비율
+
+
+def normalize(text):
+    """NFC + 소문자 + 공백 제거 (공백 유무와 관계없이 찾도록)"""
+    return "".join(unicodedata.normalize("NFC", text or "").lower().split())
+
+
+def chosung(text):
+    """한글 음절은 초성으로 바꾸고 나머지 글자는 그대로 둔다."""
+    return text.translate(CHOSUNG_TABLE)
+
+
+def is_chosung_query(text):
+    return any(ch in CHOSUNG_SET for ch in text) and all(ch in CHOSUNG_SET or ch.isdigit() for ch in text)
+
+
+def grams(text):
+    """2글자 조각"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def chosung_grams(cho):
+    """초성 문자열의 2글자 조각 중 초성이 들어 있는 것만 (숫자/영문끼리는 일반 조각과 같으므로 뺀다)"""
+    return {CHOSUNG_KEY + gram for gram in grams(cho) if gram[0] in CHOSUNG_SET or gram[1] in CHOSUNG_SET}
+
+
+class SearchIndex:
+    def __init__(self, bookmarks=()):
+        self.postings = defaultdict(set)
+        self.docs = {}  # id -> (필드별 정규화 문자열, 필드별 초성 문자열)
+        for bm in bookmarks:
+            self.add(bm)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.docs
+
+    def add(self, bookmark):
+        doc_id = bookmark["id"]
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        texts = tuple(normalize(bookmark.get(field)) for field, _ in FIELDS)
+        chos = tuple(chosung(text) for text in texts)
+        postings = self.postings
+        for key in self._keys(texts, chos):
+            postings[key].add(doc_id)
+        self.docs[doc_id] = (texts, chos)
+
+    @staticmethod
+    def _keys(texts, chos):
+        keys = set()
+        for text, cho in zip(texts, chos):
+            keys.update(grams(text))
+            keys.update(chosung_grams(cho))
+        return keys
+
+    def update(self, bookmark):
+        self.add(bookmark)
+
+    def remove(self, doc_id):
+        entry = self.docs.pop(doc_id, None)
+        if entry is None:
+            return
+        for key in self._keys(*entry):
+            ids = self.postings[key]
+            ids.discard(doc_id)
+            if not ids:
+                del self.postings[key]
+
+    def search(self, query, limit=None):
+        """관련도 높은 순서의 북마크 id 목록. 검색어가 비어 있으면 None."""
+        text = normalize(query)
+        if not text:
+            return None
+        use_chosung = is_chosung_query(text)
+        keys = list(chosung_grams(text) if use_chosung else grams(text))
+
+        scores = self._exact(text, keys, use_chosung)
+        if not scores and len(keys) >= 2:
+            scores = self._fuzzy(keys)
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
+        return ranked[:limit] if limit else ranked
+
+    def _exact(self, text, keys, use_chosung):
+        if keys:
+            postings = sorted((self.postings.get(key, set()) for key in keys), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        else:
+            candidates = self.docs  # 한 글자 검색어
+        scores = {}
+        for doc_id in candidates:
+            texts, chos = self.docs[doc_id]
+            score = 0.0
+            for (_, weight), field_text in zip(FIELDS, chos if use_chosung else texts):
+                pos = field_text.find(text)
+                if pos < 0:
+                    continue
+                # 앞부분에서 찾을수록, 필드가 짧을수록(거의 그대로 일치) 점수를 더 준다
+                bonus = 2.0 if pos == 0 else 1.0
+                score = max(score, weight * bonus + len(text) / len(field_text))
+            if score:
+                scores[doc_id] = 10.0 + score  # 그대로 들어 있는 결과는 비슷한 결과보다 항상 앞
+        return scores
+
+    def _fuzzy(self, keys):
+        overlap = Counter()
+        for key in keys:
+            overlap.update(self.postings.get(key, ()))
+        need = math.ceil(len(keys) * FUZZY_MIN_OVERLAP)
+        return {doc_id: count / len(keys) for doc_id, count in overlap.items() if count >= need}
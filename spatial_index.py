@@ -0,0 +1,129 @@
+import math
+
+import numpy as np
+
+# 북마크 좌표용 격자 공간 색인
+# - 좌표를 격자 칸(cell_deg 도 단위)으로 나눠 두고, 지도에 보이는 범위(bbox)에 걸친 칸만 본다
+# - 많이 축소한 화면에서는 화면 픽셀 기준 격자로 미리 묶어(서버 측 클러스터링) 점 대신 묶음 하나를 그린다
+
+TILE_SIZE = 256  # 웹 지도 타일 한 장의 픽셀 수
+CLUSTER_PX = 60  # 이 픽셀 크기의 격자 칸 안에 든 점들을 하나로 묶는다
+CLUSTER_MAX_ZOOM = 13  # 이보다 확대하면 묶지 않고 점을 그대로 보낸다
+VIEW_PADDING = 0.5  # 조금만 움직여도 다시 그리지 않도록 화면 크기의 절반만큼 넓혀서 가져온다
+
+
+class BBox:
+    """남서쪽 / 북동쪽 모서리 (위도, 경도)"""
+
+    def __init__(self, south, west, north, east):
+        self.south, self.west, self.north, self.east = south, west, north, east
+
+    def __repr__(self):
+        return f"BBox({self.south:.5f}, {self.west:.5f}, {self.north:.5f}, {self.east:.5f})"
+
+    def __eq__(self, other):
+        return isinstance(other, BBox) and self.as_tuple() == other.as_tuple()
+
+    def as_tuple(self):
+        return self.south, self.west, self.north, self.east
+
+    def padded(self, ratio=VIEW_PADDING):
+        dlat = (self.north - self.south) * ratio
+        dlng = (self.east - self.west) * ratio
+        return BBox(max(self.south - dlat, -90.0), max(self.west - dlng, -180.0),
+                    min(self.north + dlat, 90.0), min(self.east + dlng, 180.0))
+
+    def contains(self, other):
+        return (self.south <= other.south and self.west <= other.west
+                and self.north >= other.north and self.east >= other.east)
+
+
+def degrees_per_pixel(zoom):
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def view_bbox(center, zoom, width=700, height=500):
+    """지도가 아직 그려지기 전(경계를 모를 때) 중심과 확대 수준으로 화면 범위를 어림한다."""
+    deg = degrees_per_pixel(zoom)
+    # 위도 방향은 메르카토르 투영이라 cos(위도) 만큼 좁아진다
+    dlat = deg * height / 2 * math.cos(math.radians(center[0]))
+    dlng = deg * width / 2
+    return BBox(center[0] - dlat, center[1] - dlng, center[0] + dlat, center[1] + dlng)
+
+
+def bbox_from_folium(bounds):
+    """st_folium 이 돌려주는 bounds dict -> BBox. 값이 없거나 한 점이면 None."""
+    if not bounds:
+        return None
+    sw, ne = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    values = (sw.get("lat"), sw.get("lng"), ne.get("lat"), ne.get("lng"))
+    if any(v is None for v in values) or values[0] == values[2] or values[1] == values[3]:
+        return None
+    return BBox(*values)
+
+
+class GridIndex:
+    """points[i] = (위도, 경도). 같은 칸의 점들이 붙어 있도록 정렬해 두고 칸 -> (시작, 끝) 으로 찾는다."""
+
+    def __init__(self, coords, cell_deg=0.05):
+        self.cell_deg = cell_deg
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.lat, self.lng = coords[:, 0], coords[:, 1]
+        cells = np.floor(coords / cell_deg).astype(np.int64)
+
+        self.order = np.lexsort((cells[:, 1], cells[:, 0]))
+        sorted_cells = cells[self.order]
+        self.cells = {}
+        if len(sorted_cells):
+            starts = np.flatnonzero(np.any(np.diff(sorted_cells, axis=0) != 0, axis=1)) + 1
+            bounds = np.concatenate([[0], starts, [len(sorted_cells)]])
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                self.cells[tuple(sorted_cells[start])] = (int(start), int(end))
+
+    def __len__(self):
+        return len(self.lat)
+
+    def query(self, bbox):
+        """bbox 안의 점 번호 (원래 순서 기준, 오름차순)"""
+        if not len(self):
+            return np.empty(0, dtype=np.intp)
+        row0, row1 = math.floor(bbox.south / self.cell_deg), math.floor(bbox.north / self.cell_deg)
+        col0, col1 = math.floor(bbox.west / self.cell_deg), math.floor(bbox.east / self.cell_deg)
+
+        if (row1 - row0 + 1) * (col1 - col0 + 1) > len(self.cells):
+            # 범위가 넓으면 칸을 훑는 것보다 전체를 한 번에 거르는 편이 빠르다
+            candidates = np.arange(len(self))
+        else:
+            # 화면에 걸친 칸만 찾아본다 (점이 있는 칸 전체를 훑지 않는다)
+            slices = []
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    span = self.cells.get((row, col))
+                    if span is not None:
+                        slices.append(self.order[span[0]:span[1]])
+            candidates = np.concatenate(slices) if slices else np.empty(0, dtype=np.intp)
+
+        lat, lng = self.lat[candidates], self.lng[candidates]
+        inside = (lat >= bbox.south) & (lat <= bbox.north) & (lng >= bbox.west) & (lng <= bbox.east)
+        return np.sort(candidates[inside])
+
+
+def cluster(index, points, zoom, cell_px=CLUSTER_PX):
+    """points(점 번호들)를 화면 픽셀 격자로 묶는다. [(평균 위도, 평균 경도, 점 번호 배열)] 를 돌려준다.
+
+    CLUSTER_MAX_ZOOM 보다 확대했으면 묶지 않고 점마다 하나씩 돌려준다.
+    """
+    points = np.asarray(points, dtype=np.intp)
+    lat, lng = index.lat[points], index.lng[points]
+    if zoom > CLUSTER_MAX_ZOOM or len(points) <= 1:
+        return [(lat[i], lng[i], points[i:i + 1]) for i in range(len(points))]
+
+    cell = degrees_per_pixel(zoom) * cell_px
+    keys = np.stack([np.floor(lat / cell), np.floor(lng / cell)], axis=1)
+    _, group, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+    group = group.ravel()
+    lat_mean = np.bincount(group, weights=lat) / counts
+    lng_mean = np.bincount(group, weights=lng) / counts
+    order = np.argsort(group, kind="stable")
+    members = np.split(points[order], np.cumsum(counts)[:-1])
+    return [(lat_mean[g], lng_mean[g], members[g]) for g in range(len(counts))]
@@ -1,6 +1,8 @@
 import streamlit as st
 import random
 
+import scoreboard
+
 # 이모지 매핑
 emoji_map = {
     "가위": "✌️",
@@ -11,7 +13,16 @@ emoji_map = {
 # 페이지 설정
 st.set_page_config(page_title="비겨야 이기는 가위바위보", page_icon="✊", layout="centered")
 st.title("✊ 비겨야 이기는 가위바위보")
-st.caption("💡 비겨야만 승리! 50점 넘으면 성공, 0점이면 실패!")
+st.caption(f"💡 비겨야만 승리! {scoreboard.GOAL_SCORE}점 넘으면 성공, 0점이면 실패!")
+
+
+@st.cache_resource
+def get_scoreboard():
+    # 점수판은 프로세스에 하나만 만들어 모든 플레이어가 같이 쓴다 (순위표도 공용)
+    return scoreboard.Scoreboard()
+
+
+board = get_scoreboard()
 
 # 사용자 이름 입력
 username = st.text_input("🙋 사용자 이름을 입력하세요:", value="guest").strip()
@@ -20,27 +31,18 @@ if not username:
     st.warning("이름을 입력해주세요.")
     st.stop()
 
-# 사용자별 점수 상태 초기화
-if "users" not in st.session_state:
-    st.session_state.users = {}
-
-# 사용자 필드 초기화 및 누락 보완
-if username not in st.session_state.users:
-    st.session_state.users[username] = {
-        "score": 15,
-        "win": 0,
-        "lose": 0,
-        "game_over": False
-    }
-else:
-    user_data = st.session_state.users[username]
-    user_data.setdefault("score", 15)
-    user_data.setdefault("win", 0)
-    user_data.setdefault("lose", 0)
-    user_data.setdefault("game_over", False)
-
-# 사용자 데이터 참조
-user_data = st.session_state.users[username]
+# 사용자 점수 불러오기 (처음 온 이름이면 시작 점수로 등록)
+user_data = board.player(username)
+
+
+def show_leaderboard():
+    # 순위표는 점수판의 순위 색인에서 바로 꺼낸다 (전원을 정렬하지 않음)
+    st.markdown("---")
+    st.subheader("🏆 순위표")
+    rank, total = board.rank(username)
+    st.write(f"🙋 {username}님은 {total}명 중 **{rank}위**")
+    st.dataframe(board.top(10), hide_index=True)
+
 
 # 게임 종료 시 처리
 if user_data["game_over"]:
@@ -48,9 +50,13 @@ if user_data["game_over"]:
     if user_data["score"] <= 0:
         st.error("게임 오버! 점수가 0점이 되었습니다. 😭")
         st.write("😢 😭 😢 😭 😢 😭 😢 😭 😢")
-    elif user_data["score"] >= 50:
-        st.success("축하합니다! 50점 이상으로 클리어! 🎉")
+    elif user_data["score"] >= scoreboard.GOAL_SCORE:
+        st.success(f"축하합니다! {scoreboard.GOAL_SCORE}점 이상으로 클리어! 🎉")
         st.balloons()
+    if st.button("🔄 다시 도전"):
+        board.reset(username)
+        st.rerun()
+    show_leaderboard()
     st.stop()
 
 # 선택지 및 사용자 입력
@@ -64,20 +70,17 @@ if st.button("🎲 결과 보기"):
     st.write(f"🤖 챗GPT의 선택: **{ai_choice} {emoji_map[ai_choice]}**")
     st.write(f"🙂 당신의 선택: **{user_choice} {emoji_map[user_choice]}**")
 
+    # 점수판에서 한 번에 반영한다 (같은 이름으로 여러 창에서 눌러도 점수가 꼬이지 않음)
     if user_choice == ai_choice:
-        st.success("🎉 비겼습니다! 당신의 승리입니다! (+5점)")
-        user_data["score"] += 5
-        user_data["win"] += 1
+        st.success(f"🎉 비겼습니다! 당신의 승리입니다! (+{scoreboard.WIN_POINTS}점)")
+        user_data = board.play(username, won=True)
     else:
-        st.error("😢 비기지 못했네요. 당신의 패배입니다. (-3점)")
-        user_data["score"] -= 3
-        user_data["lose"] += 1
+        st.error(f"😢 비기지 못했네요. 당신의 패배입니다. (-{scoreboard.LOSE_POINTS}점)")
+        user_data = board.play(username, won=False)
 
-    # 종료 조건 검사 후 rerun
-    if user_data["score"] <= 0 or user_data["score"] >= 50:
-        user_data["game_over"] = True
-        st.experimental_rerun()
-        st.stop()
+    # 종료 조건에 닿았으면 결과 화면으로
+    if user_data["game_over"]:
+        st.rerun()
 
 # 점수 및 전적 출력
 st.markdown("---")
@@ -88,9 +91,9 @@ st.write(f"💯 현재 점수: **{user_data['score']}점**")
 
 # 점수 초기화 버튼
 if st.button("🧹 내 점수 초기화"):
-    user_data["score"] = 15
-    user_data["win"] = 0
-    user_data["lose"] = 0
-    user_data["game_over"] = False
+    board.reset(username)
     st.info("점수가 초기화되었습니다.")
+    st.rerun()
+
+show_leaderboard()
 
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import population
+
+# 월별 인구 통계 누적 저장소 (추가만 하고 고치지 않음)
+#   data_store/<데이터 종류>/month=YYYYMM.parquet
+# 한 파티션은 (행정코드, 항목, 값) 세로형 표: "2025년06월_계_0세" -> month=202506, measure="계_0세"
+# 코드 순으로 정렬해 저장하므로 지역 하나의 추이를 볼 때 row group 통계로 필요한 부분만 읽는다.
+# 파티션마다 원본 파일 해시를 메타데이터에 남긴다. 이미 있는 달은 같은 파일이면 건너뛰고,
+# 저장된 지역을 모두 포함하면서 더 많은 지역이 든 파일(일부 시도만 있던 달의 전국 파일)이면 바꾸고,
+# 그 밖의 파일(일부만 있거나 고친 파일)은 받지 않는다.
+
+STORE_DIR = Path(os.environ.get("POPULATION_STORE_DIR", Path(__file__).parent / "data_store"))
+ROW_GROUP_SIZE = 64_000
+
+# 데이터 종류: (이름, 지역 컬럼, 항목 이름을 알아보는 정규식)
+DATASETS = (
+    ("age", "행정구역", re.compile(r"^(계|남|여)_")),
+    ("change", "법정구역", re.compile(r"인구증감|인구수")),
+    ("avg_age", "행정구역", re.compile(r"평균연령")),
+)
+
+_MONTH_COL_RE = re.compile(r"^(\d{4})년(\d{2})월_(.+)$")
+_LABEL_RE = r"^\s*(.*?)\s*\((\d{10})\)\s*$"
+COLUMNS = ["month", "code", "measure", "value"]
+
+# ingest 결과 (달마다 하나)
+ADDED = "added"  # 새로 저장
+REPLACED = "replaced"  # 저장돼 있던 일부 지역 파티션을 더 넓은 파일로 바꿈
+SAME = "same"  # 같은 파일이 이미 있음
+PARTIAL = "partial"  # 저장된 달보다 지역이 적거나 내용이 달라 받지 않음
+
+
+def month_label(month):
+    return f"{month[:4]}년 {month[4:]}월"
+
+
+def detect_dataset(df):
+    """업로드한 표가 어떤 종류의 행정안전부 통계인지 알아낸다."""
+    first = df.columns[0]
+    measures = [m.group(3) for m in map(_MONTH_COL_RE.match, df.columns) if m]
+    for name, region_col, measure_re in DATASETS:
+        if first == region_col and measures and all(measure_re.search(m) for m in measures):
+            return name
+    raise ValueError("월별 저장소가 지원하지 않는 CSV 형식입니다.")
+
+
+def _partition(dataset, month):
+    return STORE_DIR / dataset / f"month={month}.parquet"
+
+
+def months(dataset):
+    """저장된 기준 연월 목록 (오름차순)"""
+    folder = STORE_DIR / dataset
+    if not folder.exists():
+        return []
+    return sorted(path.stem.split("=", 1)[1] for path in folder.glob("month=*.parquet"))
+
+
+def _to_long(df, region_col, month_cols):
+    # 넓은 표 -> 세로형 (한 번에 melt)
+    wide = df[[region_col] + month_cols].copy()
+    wide.columns = ["label"] + [_MONTH_COL_RE.match(col).group(3) for col in month_cols]
+    wide.insert(0, "row", range(len(wide)))
+    wide["code"] = wide["label"].str.extract(_LABEL_RE)[1].fillna("")
+
+    long = wide.melt(id_vars=["row", "label", "code"], var_name="measure", value_name="value")
+    return long.sort_values(["code", "row"], kind="stable").reset_index(drop=True)
+
+
+def _write(long, measures, source, path):
+    table = pa.Table.from_pandas(long, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[b"measures"] = json.dumps(measures, ensure_ascii=False).encode()
+    meta[b"source"] = source.encode()
+    table = table.replace_schema_metadata(meta)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def source_of(dataset, month):
+    """파티션을 만든 원본 파일 해시 (파티션이 바뀌었는지 알아보는 데 쓴다)"""
+    return (pq.read_schema(_partition(dataset, month)).metadata or {}).get(b"source", b"").decode()
+
+
+def _stored_codes(path):
+    return set(pq.read_table(path, columns=["code"]).column("code").to_pylist())
+
+
+def ingest(data):
+    """업로드 CSV 바이트를 월별 파티션으로 나눠 저장한다.
+
+    (데이터 종류, {달: ADDED / REPLACED / SAME / PARTIAL}) 을 돌려준다.
+    지원하지 않는 형식이면 ValueError.
+    """
+    df = population.read_mois_csv(data)
+    dataset = detect_dataset(df)
+    region_col = df.columns[0]
+    source = hashlib.sha1(data).hexdigest()
+
+    by_month = {}
+    for col in df.columns:
+        match = _MONTH_COL_RE.match(col)
+        if match:
+            by_month.setdefault(match.group(1) + match.group(2), []).append(col)
+
+    status = {}
+    codes = None
+    for month, cols in sorted(by_month.items()):
+        path = _partition(dataset, month)
+        result = ADDED
+        if path.exists():
+            if source_of(dataset, month) == source:
+                status[month] = SAME
+                continue
+            if codes is None:
+                codes = set(df[region_col].str.extract(_LABEL_RE)[1].fillna(""))
+            stored = _stored_codes(path)
+            if not (codes > stored):
+                status[month] = PARTIAL
+                continue
+            result = REPLACED
+        measures = [_MONTH_COL_RE.match(col).group(3) for col in cols]
+        _write(_to_long(df, region_col, cols), measures, source, path)
+        status[month] = result
+    return dataset, status
+
+
+def summary(status):
+    """ingest 결과를 한 줄로 (화면에 보여 줄 문구)"""
+    words = {
+        ADDED: "새로 저장", REPLACED: "더 넓은 파일로 바꿈", SAME: "이미 같은 파일이 있음",
+        PARTIAL: "이미 저장된 달이라 받지 않음 (저장된 지역을 모두 포함하고 더 많은 파일만 바꿔 넣음)",
+    }
+    return " · ".join(f"{month_label(month)}: {words[result]}" for month, result in sorted(status.items()))
+
+
+def load_month(dataset, month):
+    """한 달치를 원래 CSV 와 같은 넓은 표로 되돌린다 (기존 화면 코드를 그대로 쓰기 위해)."""
+    path = _partition(dataset, month)
+    table = pq.read_table(path)
+    measures = json.loads(table.schema.metadata[b"measures"])
+    long = table.to_pandas()
+
+    wide = long.pivot(index="row", columns="measure", values="value")[measures]
+    wide.columns = [f"{month[:4]}년{month[4:]}월_{m}" for m in measures]
+    labels = long.drop_duplicates("row").set_index("row")["label"]
+    region_col = next(col for name, col, _ in DATASETS if name == dataset)
+    wide.insert(0, region_col, labels.reindex(wide.index))
+    return wide.reset_index(drop=True)
+
+
+def trend(dataset, codes, measures=None):
+    """지역(코드)별 월별 추이: 컬럼 (month, code, measure, value)
+
+    파티션마다 필요한 지역/항목 행만 읽어 모으므로 전체 달을 메모리에 올리지 않는다.
+    """
+    stored = months(dataset)
+    if not stored:
+        return pd.DataFrame(columns=COLUMNS)
+
+    condition = ds.field("code").isin(list(codes))
+    if measures is not None:
+        condition &= ds.field("measure").isin(list(measures))
+
+    frames = []
+    for month in stored:
+        part = ds.dataset(_partition(dataset, month), format="parquet")
+        table = part.to_table(columns=["code", "measure", "value"], filter=condition)
+        frame = table.to_pandas()
+        frame.insert(0, "month", month)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+# 실행(rerun)마다 단계별 시간 재기
+#   run = timing.start("tlrkrghk")
+#   with run.stage("decode", nbytes=len(data)) as s:
+#       ...
+#       s["rows"] = len(df)          # 처리한 행 수는 알게 된 뒤에 넣어도 된다
+#   run.plotly_chart(fig, use_container_width=True)   # 브라우저로 보내는 시간 + 그림 크기
+#   run.finish()                     # 사이드바 패널 + JSON lines 로그
+#
+# 공통 모듈(population, weather ...) 안에서는 timing.stage(...) 로 지금 실행 중인 Run 에 단계를 더한다.
+# Run 이 없으면(report.py, bench.py, 캐시 적중으로 함수가 안 불린 경우) 아무것도 하지 않는다.
+# 단계 이름은 decode(CSV 읽기) / split(지역 나누기) / filter / aggregate / figure / render(브라우저로 전송) 를 쓴다.
+# 시간은 항상 재서 로그에 남기고(perf_counter 몇 번이라 거의 공짜), 그림 JSON 크기는 패널을 켰을 때만 잰다
+# (크기를 재려면 그림을 한 번 더 직렬화해야 하므로).
+# 로그 파일은 TIMING_LOG 환경 변수로 바꿀 수 있고, 빈 문자열이면 남기지 않는다.
+# st.stop() / st.rerun() 은 예외로 스크립트를 끝내 run.finish() 까지 오지 못한다. 그래서 Run 을 세션 상태에 두고,
+# 다음 실행의 timing.start() 가 끝나지 못한 Run 을 "interrupted" 로 로그에 남기고 패널에도 같이 보여 준다
+# (지도를 움직여 다시 그리는 실행도 빠지지 않도록).
+
+LOG_PATH = os.environ.get("TIMING_LOG", str(Path(__file__).parent / ".cache" / "timings.jsonl"))
+PANEL_KEY = "timing_panel"
+PENDING_KEY = "timing_run"  # 이번 세션에서 마지막으로 시작한 Run
+
+_current = threading.local()  # Streamlit 은 세션마다 다른 스레드에서 스크립트를 실행한다
+
+
+class Run:
+    def __init__(self, page, detail=False):
+        self.page = page
+        self.detail = detail  # 그림 크기처럼 비용이 드는 측정까지 할지
+        self.stages = []
+        self.finished = False
+        self.previous = None  # 이 실행 전에 st.stop() / st.rerun() 으로 끝난 실행의 기록
+        self._start = time.perf_counter()
+        self._end = self._start  # 마지막 단계가 끝난 시각 (중간에 끊긴 실행은 여기까지로 센다)
+
+    @contextmanager
+    def stage(self, name, rows=None, nbytes=None):
+        entry = {"stage": name}
+        if rows is not None:
+            entry["rows"] = rows
+        if nbytes is not None:
+            entry["bytes"] = nbytes
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            self._end = time.perf_counter()
+            entry["ms"] = round((self._end - start) * 1000, 2)
+            self.stages.append(entry)
+
+    def plotly_chart(self, fig, **kwargs):
+        import streamlit as st
+
+        with self.stage("render") as entry:
+            st.plotly_chart(fig, **kwargs)
+        if self.detail:
+            entry["payload_bytes"] = len(fig.to_json().encode())
+            entry["traces"] = len(fig.data)
+
+    def record(self, interrupted=False):
+        record = {
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "page": self.page,
+            "total_ms": round(((self._end if interrupted else time.perf_counter()) - self._start) * 1000, 2),
+            "stages": self.stages,
+        }
+        if interrupted:
+            record["interrupted"] = True
+        return record
+
+    def finish(self):
+        """로그 한 줄을 남기고, 사이드바 맨 아래에 패널 스위치(켜져 있으면 표)를 그린다."""
+        import streamlit as st
+
+        self.finished = True
+        record = self.record()
+        write_log(record)
+        if getattr(_current, "run", None) is self:
+            _current.run = None
+
+        st.sidebar.divider()
+        if st.sidebar.toggle("⏱️ 단계별 시간 보기", key=PANEL_KEY):
+            if self.previous is not None:
+                st.sidebar.caption(f"지난 실행 (중간에 멈추거나 다시 그림) {self.previous['total_ms']:,.0f} ms")
+                _panel_table(self.previous["stages"])
+            st.sidebar.caption(f"이번 실행 전체 {record['total_ms']:,.0f} ms")
+            _panel_table(self.stages)
+        return record
+
+
+def _panel_table(stages):
+    import streamlit as st
+
+    st.sidebar.dataframe(
+        [
+            {
+                "단계": entry["stage"],
+                "ms": entry["ms"],
+                "행": entry.get("rows"),
+                "바이트": entry.get("bytes", entry.get("payload_bytes")),
+            }
+            for entry in stages
+        ],
+        hide_index=True,
+    )
+
+
+def write_log(record, path=None):
+    path = LOG_PATH if path is None else path
+    if not path:
+        return
+    try:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError:
+        pass  # 쓸 수 없는 환경이면 로그 없이 진행
+
+
+def start(page):
+    """이번 실행의 Run. 사이드바 패널이 켜져 있으면(지난 실행에서 켠 값) 자세히 잰다."""
+    import streamlit as st
+
+    run = Run(page, detail=bool(st.session_state.get(PANEL_KEY)))
+    pending = st.session_state.get(PENDING_KEY)
+    if pending is not None and not pending.finished:
+        # 지난 실행이 st.stop() / st.rerun() 으로 끝났으면 여기서 대신 남긴다
+        pending.finished = True
+        run.previous = pending.record(interrupted=True)
+        write_log(run.previous)
+    st.session_state[PENDING_KEY] = run
+    _current.run = run
+    return run
+
+
+def stage(name, rows=None, nbytes=None):
+    """지금 스레드에서 실행 중인 Run 의 단계. Run 이 없으면 빈 dict 를 주는 빈 context."""
+    run = getattr(_current, "run", None)
+    if run is None:
+        return nullcontext({})
+    return run.stage(name, rows=rows, nbytes=nbytes)
@@ -1,116 +1,142 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import re
+
+import age_bands
+import bundled
+import figure_cache
+import population
+import pyramid
+import timeseries_store
+import timing
+from regions import ROOT
 
 # 페이지 설정
 st.set_page_config(page_title="도/시/구 인구 피라미드", layout="wide")
 st.title("👥 도-시-구 단위 연령별 인구 피라미드 (2025년 6월 기준)")
+run = timing.start("tlrkrghk")
+
+
+@st.cache_resource(show_spinner="📦 CSV 분석 중...")
+def load_cube(data):
+    # 업로드 파일 내용이 같으면 다시 파싱하지 않고 같은 배열을 돌려쓴다 (읽기 전용)
+    return population.load_age_cube(data)
 
-# CSV 업로드
-uploaded_file = st.file_uploader("📂 연령별 인구 데이터 (CSV, euc-kr 인코딩)", type=["csv"])
 
-if uploaded_file is not None:
+@st.cache_resource(show_spinner="📦 월별 저장소에 추가 중...")
+def ingest_months(data):
+    # 기본 데이터는 프로세스마다 한 번만 저장소에 넣는다 (같은 파일이면 저장소가 건너뜀)
+    return timeseries_store.ingest(data)
+
+
+def add_to_store(data):
+    # 올린 파일은 다른 사용자의 기준 월 목록에도 보이므로 버튼을 눌렀을 때만 넣는다
     try:
-        df = pd.read_csv(uploaded_file, encoding="euc-kr")
+        _, status = timeseries_store.ingest(data)
+    except ValueError as e:
+        st.sidebar.warning(f"⚠️ {e}")
+        return
+    st.sidebar.info(f"📥 {timeseries_store.summary(status)}")
+
 
-        # 지역 정보 분리
-        df = df.copy()
-        df["도"] = df["행정구역"].str.extract(r"^([가-힣]+[도|시|특별시|광역시|자치시|자치도|특별자치도])")
-        df["시"] = df["행정구역"].str.extract(r"^.+? ([가-힣]+[시|군|구])")
-        df["구"] = df["행정구역"].str.extract(r".+? ([가-힣]+동|[가-힣]+구|[가-힣]+면|[가-힣]+읍)")
+@st.cache_resource(show_spinner="📦 저장된 달 불러오는 중...")
+def load_month_cube(month, source):
+    # source: 파티션이 더 넓은 파일로 바뀌면 다시 읽도록 캐시 키로만 쓴다
+    return population.build_age_cube(timeseries_store.load_month("age", month))
 
-        # 사이드바 선택 UI
+
+# CSV 업로드
+uploaded_file = st.file_uploader("📂 연령별 인구 데이터 (CSV, euc-kr 인코딩)", type=["csv"])
+
+# 업로드하지 않으면 저장소에 들어 있는 기본 데이터를 보여 준다 (프로세스마다 한 번만 읽고 파싱)
+data = uploaded_file.getvalue() if uploaded_file is not None else bundled.read("age")
+if uploaded_file is None and data is not None:
+    st.caption(f"ℹ️ 기본 데이터({bundled.name('age')})를 보여 주고 있습니다. 다른 파일을 올리면 그 파일로 바뀝니다.")
+
+if data is not None:
+    try:
+        cube = load_cube(data)
+
+        # 📅 저장소에 여러 달이 쌓여 있으면 기준 월을 고를 수 있다 (지금 보는 파일의 달도 같이 넣는다)
+        if uploaded_file is None:
+            ingest_months(data)
+        elif st.sidebar.button("📥 이 파일을 월별 저장소에 추가"):
+            add_to_store(data)
+        stored_months = timeseries_store.months("age")
+        if cube.month:
+            stored_months = sorted(set(stored_months) | {cube.month})
+        if len(stored_months) > 1:
+            selected_month = st.sidebar.select_slider(
+                "📅 기준 월", stored_months,
+                value=cube.month or stored_months[-1],
+                format_func=timeseries_store.month_label
+            )
+            if selected_month != cube.month:
+                cube = load_month_cube(selected_month, timeseries_store.source_of("age", selected_month))
+
+        tree = cube.tree
+
+        # 사이드바 선택 UI (행정코드 트리에서 자식만 꺼내 쓴다)
         st.sidebar.header("📍 지역 선택")
-        selected_do = st.sidebar.selectbox("도 (광역단체)", sorted(df["도"].dropna().unique()))
-        filtered_si = df[df["도"] == selected_do]["시"].dropna().unique()
-        selected_si = st.sidebar.selectbox("시 (기초단체)", sorted(filtered_si))
-
-        filtered_gu = df[(df["도"] == selected_do) & (df["시"] == selected_si)]["구"].dropna().unique()
-        gu_options = sorted(filtered_gu) if len(filtered_gu) > 0 else ["(해당 없음)"]
-        selected_gu = st.sidebar.selectbox("구/동/읍/면", gu_options)
-
-        # 대상 행정구역 이름 찾기
-        candidates = df[
-            (df["도"] == selected_do) &
-            (df["시"] == selected_si)
-        ]
-        if selected_gu != "(해당 없음)":
-            candidates = candidates[candidates["구"] == selected_gu]
-
-        if candidates.empty:
+        selected_do = st.sidebar.selectbox("도 (광역단체)", tree.children_of(ROOT), format_func=tree.name)
+        si_options = tree.children_of(selected_do) or [selected_do]
+        selected_si = st.sidebar.selectbox("시 (기초단체)", si_options, format_func=tree.name)
+
+        gu_options = tree.children_of(selected_si) or [None]
+        selected_gu = st.sidebar.selectbox(
+            "구/동/읍/면", gu_options,
+            format_func=lambda code: tree.name(code) if code else "(해당 없음)"
+        )
+
+        # 대상 행정구역 행 찾기
+        selected_code = selected_gu or selected_si
+        candidates = tree.rows_of(selected_code)
+        if not candidates:
             st.warning("선택한 행정구역에 해당하는 데이터가 없습니다.")
             st.stop()
 
-        selected_row = candidates.iloc[0]
+        selected_row = candidates[0]
 
-        # 연령 그룹 선택
+        # 연령 그룹 선택 (구간 합은 나이 축 누적합에서 뺄셈 한 번으로 구한다)
         st.sidebar.header("🎚️ 연령 그룹 선택")
-        age_groups = [(f"{i}~{i+9}세", list(range(i, i+10))) for i in range(0, 100, 10)]
-        age_groups.append(("100세 이상", list(range(100, 101))))
-        group_names = [g[0] for g in age_groups]
-        selected_groups = st.sidebar.multiselect("연령 그룹 선택", group_names, default=group_names)
-
-        # 연령 컬럼 정리
-        male_cols = [col for col in df.columns if "남_" in col and "세" in col]
-        female_cols = [col for col in df.columns if "여_" in col and "세" in col]
-
-        def extract_age(col_name):
-            match = re.search(r"(\d+)세", col_name)
-            return int(match.group(1)) if match else 100
-
-        age_mapping = {col: extract_age(col) for col in male_cols}
-
-        # 선택한 연령 범위에 해당하는 컬럼만 추출
-        selected_male_cols, selected_female_cols, selected_labels = [], [], []
-
-        for group_name in selected_groups:
-            group_range = dict(age_groups)[group_name]
-            for col, age in age_mapping.items():
-                if age in group_range:
-                    selected_male_cols.append(col)
-                    female_col = col.replace("남_", "여_")
-                    if female_col in female_cols:
-                        selected_female_cols.append(female_col)
-                        selected_labels.append(col.split("_")[-1])
-
-        # 데이터 전처리
-        male_counts = selected_row[selected_male_cols].fillna(0).astype(str).str.replace(",", "").astype(float).astype(int)
-        female_counts = selected_row[selected_female_cols].fillna(0).astype(str).str.replace(",", "").astype(float).astype(int)
-
-        # 인구 피라미드 시각화
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            y=selected_labels,
-            x=-male_counts,
-            name="남자",
-            orientation="h",
-            marker_color="blue"
-        ))
-        fig.add_trace(go.Bar(
-            y=selected_labels,
-            x=female_counts,
-            name="여자",
-            orientation="h",
-            marker_color="red"
-        ))
-
-        title_text = f"{selected_do} {selected_si}"
-        if selected_gu != "(해당 없음)":
-            title_text += f" {selected_gu}"
-        fig.update_layout(
-            title=f"{title_text} 인구 피라미드",
-            barmode="relative",
-            xaxis_title="인구수",
-            yaxis_title="연령",
-            xaxis_tickformat=",d",
-            height=1000,
-            yaxis=dict(autorange="reversed"),
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        band_unit = st.sidebar.selectbox("막대 단위", list(age_bands.BAND_SETS) + ["직접 입력"])
+        if band_unit == "1세 단위":
+            # 10세 그룹으로 범위를 고르고 1세 막대로 그린다
+            group_bands = age_bands.BAND_SETS["10세 단위"]
+            group_names = [band[0] for band in group_bands]
+            selected_groups = st.sidebar.multiselect("연령 그룹 선택", group_names, default=group_names)
+            bands = [
+                band
+                for name, lo, hi in group_bands if name in selected_groups
+                for band in age_bands.SINGLE_YEAR[lo:hi + 1]
+            ]
+        else:
+            if band_unit == "직접 입력":
+                band_text = st.sidebar.text_input("연령 구간 (예: 0-19, 20-64, 65-)", "0-19, 20-64, 65-")
+                bands = age_bands.parse_bands(band_text)
+            else:
+                bands = age_bands.BAND_SETS[band_unit]
+            band_names = [band[0] for band in bands]
+            selected_bands = st.sidebar.multiselect("연령 그룹 선택", band_names, default=band_names)
+            bands = [band for band in bands if band[0] in selected_bands]
+        band_labels = [band[0] for band in bands]
+
+        # 남/여 구분이 없는 파일(계만 있음)이면 전체 인구를 한쪽으로 그린다
+        if not (cube.has_sex("남") and cube.has_sex("여")):
+            st.info("ℹ️ 남/여 구분 컬럼이 없어 전체(계) 인구로 표시합니다.")
+
+        def build_figure():
+            with run.stage("aggregate", rows=1):
+                sides = pyramid.sides_from_cube(cube, [selected_row], bands)
+            return pyramid.pyramid_figure(band_labels, sides, f"{tree.full_name(selected_code)} 인구 피라미드")
+
+        # 인구 피라미드 시각화 (같은 데이터 · 같은 지역 · 같은 구간이면 만들어 둔 그림을 그대로 쓴다)
+        with run.stage("figure"):
+            fig = figure_cache.get(("pyramid", cube.key, selected_row, tuple(bands)), build_figure)
+
+        run.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
         st.error(f"❌ 오류 발생: {e}")
 else:
     st.info("왼쪽에서 연령별 인구 CSV 파일을 업로드해주세요.")
+
+run.finish()
@@ -1,133 +1,167 @@
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import re
+
+import age_bands
+import bundled
+import figure_cache
+import population
+import pyramid
+import timeseries_store
+import timing
+from regions import ROOT
 
 st.set_page_config(page_title="도-시-구 다중 선택 인구 피라미드", layout="wide")
 st.title("👥 도-시-구 다중 선택 인구 피라미드 비교 (2025년 6월 기준)")
+run = timing.start("tlrkrghk2")
+
+
+@st.cache_resource(show_spinner="📦 CSV 분석 중...")
+def load_cube(data):
+    # 업로드 파일 내용이 같으면 다시 파싱하지 않고 같은 배열을 돌려쓴다 (읽기 전용)
+    return population.load_age_cube(data)
+
+
+@st.cache_resource(show_spinner="📦 월별 저장소에 추가 중...")
+def ingest_months(data):
+    # 기본 데이터는 프로세스마다 한 번만 저장소에 넣는다 (같은 파일이면 저장소가 건너뜀)
+    return timeseries_store.ingest(data)
 
-uploaded_file = st.file_uploader("📂 연령별 인구 데이터 (CSV, euc-kr 인코딩)", type=["csv"])
 
-if uploaded_file is not None:
+def add_to_store(data):
+    # 올린 파일은 다른 사용자의 기준 월 목록에도 보이므로 버튼을 눌렀을 때만 넣는다
     try:
-        df = pd.read_csv(uploaded_file, encoding="euc-kr")
+        _, status = timeseries_store.ingest(data)
+    except ValueError as e:
+        st.sidebar.warning(f"⚠️ {e}")
+        return
+    st.sidebar.info(f"📥 {timeseries_store.summary(status)}")
 
-        # 도, 시, 구 분리
-        df["도"] = df["행정구역"].str.extract(r"^([가-힣]+[도시특별시광역시자치시특별자치도]+)")
-        df["시"] = df["행정구역"].str.extract(r"^.+? ([가-힣]+[시군구])")
-        df["구"] = df["행정구역"].str.extract(r".+? ([가-힣]+[동구면읍])")
 
-        df["도"] = df["도"].fillna("")
-        df["시"] = df["시"].fillna("")
-        df["구"] = df["구"].fillna("")
+@st.cache_resource(show_spinner="📦 저장된 달 불러오는 중...")
+def load_month_cube(month, source):
+    # source: 파티션이 더 넓은 파일로 바뀌면 다시 읽도록 캐시 키로만 쓴다
+    return population.build_age_cube(timeseries_store.load_month("age", month))
 
-        # 지역 라벨 생성
-        df["지역"] = df[["도", "시", "구"]].agg(" ".join, axis=1).str.strip()
 
-        # 🔹 사이드바: 단계별 지역 선택
-        st.sidebar.header("📍 지역 선택")
+uploaded_file = st.file_uploader("📂 연령별 인구 데이터 (CSV, euc-kr 인코딩)", type=["csv"])
+
+# 업로드하지 않으면 저장소에 들어 있는 기본 데이터를 보여 준다 (프로세스마다 한 번만 읽고 파싱)
+data = uploaded_file.getvalue() if uploaded_file is not None else bundled.read("age")
+if uploaded_file is None and data is not None:
+    st.caption(f"ℹ️ 기본 데이터({bundled.name('age')})를 보여 주고 있습니다. 다른 파일을 올리면 그 파일로 바뀝니다.")
 
-        all_dos = sorted(df["도"].unique())
-        selected_dos = st.sidebar.multiselect("도 선택", all_dos, default=all_dos[:1])
+if data is not None:
+    try:
+        cube = load_cube(data)
+
+        # 📅 저장소에 여러 달이 쌓여 있으면 기준 월을 고를 수 있다 (지금 보는 파일의 달도 같이 넣는다)
+        if uploaded_file is None:
+            ingest_months(data)
+        elif st.sidebar.button("📥 이 파일을 월별 저장소에 추가"):
+            add_to_store(data)
+        stored_months = timeseries_store.months("age")
+        if cube.month:
+            stored_months = sorted(set(stored_months) | {cube.month})
+        if len(stored_months) > 1:
+            selected_month = st.sidebar.select_slider(
+                "📅 기준 월", stored_months,
+                value=cube.month or stored_months[-1],
+                format_func=timeseries_store.month_label
+            )
+            if selected_month != cube.month:
+                cube = load_month_cube(selected_month, timeseries_store.source_of("age", selected_month))
+        tree = cube.tree
+
+        # 🔹 사이드바: 단계별 지역 선택 (행정코드 트리에서 자식만 꺼내 쓴다)
+        st.sidebar.header("📍 지역 선택")
 
-        filtered_si_df = df[df["도"].isin(selected_dos)]
-        all_sis = sorted(filtered_si_df["시"].unique())
-        selected_sis = st.sidebar.multiselect("시 선택", all_sis, default=all_sis[:2])
+        all_dos = tree.children_of(ROOT)
+        selected_dos = st.sidebar.multiselect("도 선택", all_dos, default=all_dos[:1], format_func=tree.name)
 
-        filtered_gu_df = df[df["시"].isin(selected_sis)]
-        all_gus = sorted(filtered_gu_df["구"].unique())
-        selected_gus = st.sidebar.multiselect("구 선택 (옵션)", all_gus)
+        all_sis, si_format = tree.child_options(selected_dos)
+        selected_sis = st.sidebar.multiselect("시 선택", all_sis, default=all_sis[:2], format_func=si_format)
 
-        # 🔹 지역 필터링
-        region_mask = (
-            df["도"].isin(selected_dos) &
-            df["시"].isin(selected_sis)
-        )
-        if selected_gus:
-            region_mask &= df["구"].isin(selected_gus)
+        all_gus, gu_format = tree.child_options(selected_sis)
+        selected_gus = st.sidebar.multiselect("구 선택 (옵션)", all_gus, format_func=gu_format)
 
-        selected_df = df[region_mask]
-        selected_regions = selected_df["지역"].unique()
+        # 🔹 지역 필터링: 선택한 구(없으면 시) 아래의 모든 행
+        with run.stage("filter") as entry:
+            selected_rows = tree.subtree_rows(selected_gus or selected_sis)
+            entry["rows"] = len(selected_rows)
 
-        if len(selected_regions) == 0:
+        if len(selected_rows) == 0:
             st.warning("선택한 지역 조합에 해당하는 데이터가 없습니다.")
             st.stop()
 
-        # 🔹 연령 그룹 선택
+        # 🔹 연령 그룹 선택 (구간 합은 나이 축 누적합에서 뺄셈 한 번으로 구한다)
         st.sidebar.header("🎚️ 연령 그룹 선택")
-        age_groups = [(f"{i}~{i+9}세", list(range(i, i+10))) for i in range(0, 100, 10)]
-        age_groups.append(("100세 이상", list(range(100, 101))))
-        group_names = [g[0] for g in age_groups]
-        selected_groups = st.sidebar.multiselect("연령 그룹 선택", group_names, default=group_names)
-
-        # 🔹 컬럼 처리
-        male_cols = [col for col in df.columns if "남_" in col and "세" in col]
-        female_cols = [col for col in df.columns if "여_" in col and "세" in col]
-
-        def extract_age(col_name):
-            match = re.search(r"(\d+)세", col_name)
-            return int(match.group(1)) if match else 100
-
-        age_mapping = {col: extract_age(col) for col in male_cols}
-
-        selected_male_cols, selected_female_cols, selected_labels = [], [], []
-        for group_name in selected_groups:
-            group_range = dict(age_groups)[group_name]
-            for col, age in age_mapping.items():
-                if age in group_range:
-                    selected_male_cols.append(col)
-                    female_col = col.replace("남_", "여_")
-                    if female_col in female_cols:
-                        selected_female_cols.append(female_col)
-                        selected_labels.append(col.split("_")[-1])
-
-        # 🔹 그래프 생성
-        fig = go.Figure()
-        colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 'cyan', 'magenta']
-
-        for idx, region in enumerate(selected_regions):
-            row = df[df["지역"] == region]
-            if row.empty:
-                continue
-
-            male = row[selected_male_cols].iloc[0].fillna(0).astype(str).str.replace(",", "").astype(float).astype(int)
-            female = row[selected_female_cols].iloc[0].fillna(0).astype(str).str.replace(",", "").astype(float).astype(int)
-
-            color = colors[idx % len(colors)]
-
-            fig.add_trace(go.Bar(
-                y=selected_labels,
-                x=-male,
-                name=f"{region} (남)",
-                orientation="h",
-                marker_color=color,
-                legendgroup=region
-            ))
-
-            fig.add_trace(go.Bar(
-                y=selected_labels,
-                x=female,
-                name=f"{region} (여)",
-                orientation="h",
-                marker_color=color,
-                opacity=0.5,
-                legendgroup=region,
-                showlegend=False
-            ))
-
-        fig.update_layout(
-            title="선택된 지역 인구 피라미드 비교",
-            barmode="relative",
-            xaxis_title="인구수",
-            yaxis_title="연령",
-            xaxis_tickformat=",d",
-            height=1000,
-            yaxis=dict(autorange="reversed")
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        band_unit = st.sidebar.selectbox("막대 단위", list(age_bands.BAND_SETS) + ["직접 입력"])
+        if band_unit == "1세 단위":
+            # 10세 그룹으로 범위를 고르고 1세 막대로 그린다
+            group_bands = age_bands.BAND_SETS["10세 단위"]
+            group_names = [band[0] for band in group_bands]
+            selected_groups = st.sidebar.multiselect("연령 그룹 선택", group_names, default=group_names)
+            bands = [
+                band
+                for name, lo, hi in group_bands if name in selected_groups
+                for band in age_bands.SINGLE_YEAR[lo:hi + 1]
+            ]
+        else:
+            if band_unit == "직접 입력":
+                band_text = st.sidebar.text_input("연령 구간 (예: 0-19, 20-64, 65-)", "0-19, 20-64, 65-")
+                bands = age_bands.parse_bands(band_text)
+            else:
+                bands = age_bands.BAND_SETS[band_unit]
+            band_names = [band[0] for band in bands]
+            selected_bands = st.sidebar.multiselect("연령 그룹 선택", band_names, default=band_names)
+            bands = [band for band in bands if band[0] in selected_bands]
+        band_labels = [band[0] for band in bands]
+
+        # 남/여 구분이 없는 파일(계만 있음)이면 전체 인구를 한쪽으로 그린다
+        if not (cube.has_sex("남") and cube.has_sex("여")):
+            st.info("ℹ️ 남/여 구분 컬럼이 없어 전체(계) 인구로 표시합니다.")
+
+        # 🔹 비교 단위: 하위 지역 행을 모두 그리거나, 선택 지역마다 말단 지역을 합산해서 그린다
+        compare_unit = st.sidebar.radio("📊 비교 단위", ["하위 지역 모두", "선택 지역별 합계"])
+        selected_codes = selected_gus or selected_sis
+        if compare_unit == "하위 지역 모두":
+            region_names = [cube.names[row] for row in selected_rows]
+        else:
+            region_names = [tree.full_name(code) for code in selected_codes]
+
+        def build_sides():
+            with run.stage("aggregate", rows=len(selected_rows)):
+                if compare_unit == "하위 지역 모두":
+                    return pyramid.sides_from_cube(cube, selected_rows, bands)
+                return pyramid.sides_from_counts(age_bands.rollup(cube, selected_codes), cube.sexes, bands)
+
+        # 🔹 그래프 생성: 지역이 많으면 압축 모드
+        view = "지역별 막대"
+        if len(region_names) > pyramid.COMPACT_THRESHOLD:
+            view = st.sidebar.radio(
+                f"🗂️ 지역 {len(region_names)}곳 표시 방식",
+                ["구성비 겹쳐 보기", "작은 그래프 여러 개"]
+            )
+            if view == "작은 그래프 여러 개" and len(region_names) > pyramid.MAX_MULTIPLES:
+                st.info(f"ℹ️ 앞의 {pyramid.MAX_MULTIPLES}곳만 작은 그래프로 표시합니다.")
+
+        def build_figure():
+            sides = build_sides()
+            if view == "지역별 막대":
+                return pyramid.comparison_figure(band_labels, region_names, sides)
+            if view == "구성비 겹쳐 보기":
+                return pyramid.share_figure(band_labels, region_names, sides)
+            return pyramid.small_multiples_figure(band_labels, region_names, sides)
+
+        # 같은 데이터 · 같은 지역 · 같은 구간 · 같은 표시 방식이면 만들어 둔 그림을 그대로 쓴다
+        figure_key = ("compare", cube.key, compare_unit, tuple(selected_rows), tuple(selected_codes), tuple(bands), view)
+        with run.stage("figure"):
+            fig = figure_cache.get(figure_key, build_figure)
+
+        run.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
         st.error(f"❌ 오류 발생: {e}")
 else:
     st.info("📄 좌측에서 연령별 인구 CSV 파일을 업로드해주세요.")
+
+run.finish()
@@ -0,0 +1,118 @@
+import pandas as pd
+import streamlit as st
+
+import age_bands
+import bundled
+import pyramid
+import region_join
+import timing
+from regions import ROOT
+
+st.set_page_config(page_title="지역 한눈에 보기", layout="wide")
+st.title("🔗 지역 한눈에 보기 (연령 분포 · 평균연령 · 인구 증감)")
+run = timing.start("tlrkrghkqjwjsfive")
+
+
+with st.expander("📂 파일 바꾸기 (올리지 않으면 저장소에 들어 있는 기본 데이터)"):
+    age_file = st.file_uploader("연령별 인구현황 CSV", type=["csv"], key="age_file")
+    avg_file = st.file_uploader("평균연령 CSV", type=["csv"], key="avg_file")
+    change_file = st.file_uploader("법정동별 인구증감 CSV", type=["csv"], key="change_file")
+    mapping_file = st.file_uploader(
+        "행정동-법정동 대응표 CSV (선택: 없으면 이름으로 어림)", type=["csv"], key="mapping_file"
+    )
+
+
+def pick(uploaded, kind):
+    return uploaded.getvalue() if uploaded is not None else bundled.read(kind)
+
+
+age_data = pick(age_file, "age")
+
+if age_data is not None:
+    try:
+        # 파일 조합이 같으면 다시 잇지 않는다 (지도 페이지와 같은 캐시). 지역을 바꾸면 만들어 둔 표에서 꺼내 쓰기만 한다.
+        regions = region_join.load(
+            age_data, pick(avg_file, "avg_age"), pick(change_file, "change"),
+            mapping_file.getvalue() if mapping_file is not None else None,
+        )
+        tree = regions.tree
+
+        # 사이드바: 도 -> 시 -> 구/동 (행정코드 트리)
+        st.sidebar.header("📍 지역 선택")
+        selected_do = st.sidebar.selectbox("도 (광역단체)", tree.children_of(ROOT), format_func=tree.name)
+        si_options = tree.children_of(selected_do) or [selected_do]
+        selected_si = st.sidebar.selectbox("시/군/구", si_options, format_func=tree.name)
+        selected_dong = st.sidebar.selectbox(
+            "읍/면/동", [None] + tree.children_of(selected_si),
+            format_func=lambda code: "(전체)" if code is None else tree.name(code)
+        )
+        selected_code = selected_dong or selected_si
+        row = regions.row(selected_code)
+
+        # 📌 한 줄 요약 (세 파일에서 같은 지역 한 줄씩)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("인구", f"{int(row['인구']):,}명")
+        if "남자 평균연령" in row:
+            col2.metric("평균연령 (파일, 남/여)", f"{row['남자 평균연령']} / {row['여자 평균연령']}세")
+        col3.metric("평균연령 (연령 분포로 계산)", f"{row['평균연령_계산']:.1f}세", help=f"검증: {row['평균연령_검증']}")
+        if "증감_계" in row and pd.notna(row["증감_연결"]):
+            col4.metric("인구 증감 (법정동 기준)", f"{int(row['증감_계']):+,}명", help=f"연결 방법: {row['증감_연결']}")
+        elif "증감_계" in row:
+            col4.metric("인구 증감 (법정동 기준)", "대응 없음")
+
+        # 🔽 하위 지역 표: 고르면 피라미드에 겹쳐 그린다
+        children = regions.children(selected_code)
+        bands = age_bands.BAND_SETS["5세 단위"]
+        band_labels = [band[0] for band in bands]
+        compare_codes = [selected_code]
+        left, right = st.columns([3, 2])
+        with right:
+            st.subheader("하위 지역")
+            if children.empty:
+                st.caption("하위 지역이 없습니다.")
+            else:
+                event = st.dataframe(
+                    children.drop(columns=["평균연령_검증"], errors="ignore"),
+                    on_select="rerun", selection_mode="multi-row", key="children_table", height=500,
+                )
+                compare_codes += [children.index[idx] for idx in event.selection.rows][:pyramid.COMPACT_THRESHOLD - 1]
+
+        with left:
+            with run.stage("aggregate", rows=len(compare_codes)):
+                cube_rows = [tree.rows_of(code)[0] for code in compare_codes]
+                sides = pyramid.sides_from_cube(regions.cube, cube_rows, bands)
+            with run.stage("figure"):
+                if len(compare_codes) == 1:
+                    fig = pyramid.pyramid_figure(band_labels, sides, f"{tree.full_name(selected_code)} 인구 피라미드")
+                else:
+                    fig = pyramid.comparison_figure(
+                        band_labels, [tree.full_name(code) for code in compare_codes], sides,
+                        title="선택한 지역과 하위 지역 인구 피라미드"
+                    )
+            run.plotly_chart(fig, use_container_width=True)
+
+        # 🔗 행정동 <-> 법정동 대응
+        with st.expander("🔗 행정동 ↔ 법정동 대응"):
+            mapped = regions.mapping[regions.mapping["행정동코드"].isin([selected_code] + list(children.index))]
+            st.dataframe(mapped, hide_index=True)
+            sigungu = selected_si if selected_si != selected_do else selected_do
+            unmapped = regions.unmapped_legal(sigungu)
+            if unmapped:
+                st.caption(
+                    f"ℹ️ {tree.full_name(sigungu)} 의 법정동 {len(unmapped)}곳은 이름으로 행정동을 찾지 못해 "
+                    "시군구 합계에만 들어갑니다. 행정안전부 대응표 파일을 올리면 정확히 나눠집니다."
+                )
+
+        # 📐 평균연령 검증
+        with st.expander("📐 평균연령 검증 (파일 값 vs 연령 분포로 계산)"):
+            st.write(regions.frame["평균연령_검증"].value_counts())
+            mismatched = regions.avg_check()
+            if len(mismatched):
+                st.dataframe(mismatched)
+
+    except Exception as e:
+        st.error(f"❌ 오류 발생: {e}")
+else:
+    st.info("📂 위에서 연령별 인구 CSV 파일을 올려 주세요.")
+
+run.finish()
@@ -1,44 +1,111 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import re
+
+import bundled
+import change_chart
+import change_rollup
+import population
+import timeseries_store
+import timing
+from regions import ROOT, RegionTree
 
 # 페이지 설정
 st.set_page_config(page_title="📊 법정동별 인구 증감 시각화", layout="wide")
 st.title("📊 2025년 6월 법정동별 인구 증감 시각화")
+run = timing.start("tlrkrghkqjwjsfour")
+
+
+def prepare(df):
+    # 콤마는 읽을 때 이미 제거됨
+    with timing.stage("split", rows=len(df)):
+        df["증감_계"] = df[next(col for col in df.columns if col.endswith("인구증감_계"))]
+        df["증감_남"] = df[next(col for col in df.columns if col.endswith("인구증감_남자인구수"))]
+        df["증감_여"] = df[next(col for col in df.columns if col.endswith("인구증감_여자인구수"))]
+        df["인구"] = df[next(col for col in df.columns if col.endswith("당월인구수_계"))]
+        tree = RegionTree(df["법정구역"])
+    with timing.stage("aggregate", rows=len(df)):
+        # 말단 행에서 모든 단계 합계를 한 번에 만들어 둔다 (소계 행과 섞어 그리지 않도록)
+        return df, tree, change_rollup.Rollup(df, tree)
+
+
+@st.cache_resource(show_spinner="📦 CSV 분석 중...")
+def load_data(data):
+    # 파일 내용이 같으면 다시 파싱하지 않는다 (읽기 전용으로 사용)
+    return prepare(population.read_mois_csv(data))
+
+
+@st.cache_resource(show_spinner="📦 월별 저장소에 추가 중...")
+def ingest_months(data):
+    # 기본 데이터는 프로세스마다 한 번만 저장소에 넣는다 (같은 파일이면 저장소가 건너뜀)
+    return timeseries_store.ingest(data)
+
+
+def add_to_store(data):
+    # 올린 파일은 다른 사용자의 기준 월 목록에도 보이므로 버튼을 눌렀을 때만 넣는다
+    try:
+        _, status = timeseries_store.ingest(data)
+    except ValueError as e:
+        st.sidebar.warning(f"⚠️ {e}")
+        return
+    st.sidebar.info(f"📥 {timeseries_store.summary(status)}")
+
+
+@st.cache_resource(show_spinner="📦 저장된 달 불러오는 중...")
+def load_month_data(month, source):
+    # source: 파티션이 더 넓은 파일로 바뀌면 다시 읽도록 캐시 키로만 쓴다
+    return prepare(timeseries_store.load_month("change", month))
+
 
 # 파일 업로드
 uploaded_file = st.file_uploader("📂 CSV 파일을 업로드하세요 (euc-kr 인코딩)", type="csv")
 
-if uploaded_file:
-    try:
-        df = pd.read_csv(uploaded_file, encoding="euc-kr")
-    except UnicodeDecodeError:
-        df = pd.read_csv(uploaded_file, encoding="utf-8")
+# 업로드하지 않으면 저장소에 들어 있는 기본 데이터를 보여 준다 (프로세스마다 한 번만 읽고 파싱)
+data = uploaded_file.getvalue() if uploaded_file is not None else bundled.read("change")
+if uploaded_file is None and data is not None:
+    st.caption(f"ℹ️ 기본 데이터({bundled.name('change')})를 보여 주고 있습니다. 다른 파일을 올리면 그 파일로 바뀝니다.")
 
-    # 콤마 제거 후 숫자형 변환
-    df["증감_계"] = df["2025년06월_인구증감_계"].astype(str).str.replace(",", "").astype(int)
-    df["증감_남"] = df["2025년06월_인구증감_남자인구수"].astype(str).str.replace(",", "").astype(int)
-    df["증감_여"] = df["2025년06월_인구증감_여자인구수"].astype(str).str.replace(",", "").astype(int)
+if data is not None:
+    df, tree, rollup = load_data(data)
+    uploaded_month = population.month_of(df.columns)
 
-    # 도/시/구 분리
-    df["도"] = df["법정구역"].str.extract(r"^([가-힣]+[도시특별시광역시자치시특별자치도]+)")
-    df["시"] = df["법정구역"].str.extract(r"^.+? ([가-힣]+[시군구])")
-    df["구"] = df["법정구역"].str.extract(r"^.+? .+? ([가-힣]+동|[가-힣]+면|[가-힣]+리)?")
+    # 📅 저장소에 여러 달이 쌓여 있으면 기준 월을 고를 수 있다 (지금 보는 파일의 달도 같이 넣는다)
+    if uploaded_file is None:
+        ingest_months(data)
+    elif st.sidebar.button("📥 이 파일을 월별 저장소에 추가"):
+        add_to_store(data)
+    stored_months = timeseries_store.months("change")
+    if uploaded_month:
+        stored_months = sorted(set(stored_months) | {uploaded_month})
+    if len(stored_months) > 1:
+        selected_month = st.sidebar.select_slider(
+            "📅 기준 월", stored_months,
+            value=uploaded_month or stored_months[-1],
+            format_func=timeseries_store.month_label
+        )
+        if selected_month != uploaded_month:
+            df, tree, rollup = load_month_data(selected_month, timeseries_store.source_of("change", selected_month))
 
-    # 사이드바 필터링
+    # 사이드바 필터링 (행정코드 트리에서 자식만 꺼내 쓴다)
     st.sidebar.header("🔍 지역 선택")
 
-    selected_dos = st.sidebar.multiselect("도 선택", sorted(df["도"].dropna().unique()))
-    filtered_df = df[df["도"].isin(selected_dos)] if selected_dos else df.copy()
+    selected_dos = st.sidebar.multiselect("도 선택", tree.children_of(ROOT), format_func=tree.name)
+    selected_codes = selected_dos
 
-    selected_sis = st.sidebar.multiselect("시 선택", sorted(filtered_df["시"].dropna().unique()))
-    filtered_df = filtered_df[filtered_df["시"].isin(selected_sis)] if selected_sis else filtered_df
+    si_options, si_format = tree.child_options(selected_dos)
+    selected_sis = st.sidebar.multiselect("시 선택", si_options, format_func=si_format)
+    selected_codes = selected_sis or selected_codes
 
-    gu_options = sorted(filtered_df["구"].dropna().unique())
-    selected_gus = st.sidebar.multiselect("구/동 선택", ["전체"] + gu_options)
+    gu_options, gu_format = tree.child_options(selected_sis)
+    selected_gus = st.sidebar.multiselect(
+        "구/동 선택", ["전체"] + gu_options,
+        format_func=lambda code: code if code == "전체" else gu_format(code)
+    )
     if selected_gus and "전체" not in selected_gus:
-        filtered_df = filtered_df[filtered_df["구"].isin(selected_gus)]
+        selected_codes = selected_gus
+
+    # 선택한 지역 아래 행만 꺼낸다 (아무것도 고르지 않으면 전체)
+    with run.stage("filter") as entry:
+        filtered_df = df.iloc[tree.subtree_rows(selected_codes)] if selected_codes else df
+        entry["rows"] = len(filtered_df)
 
     # 성별 선택
     st.sidebar.header("👥 성별 선택")
@@ -60,19 +127,103 @@ if uploaded_file:
         y_column = "증감_여"
         title = "📈 여자 인구 증감"
 
-    # Plotly 막대그래프
-    fig = px.bar(
-        filtered_df,
-        x="법정구역",
-        y=y_column,
-        color=y_column,
-        color_continuous_scale="RdBu",
-        title=title,
-        labels={y_column: "인구 증감 수", "법정구역": "지역"},
+    # 🧮 브라우저로 보낼 행 줄이기 (행 수와 상관없이 그림 크기가 일정하도록)
+    st.sidebar.header("🧮 표시 방식")
+    view_mode = st.sidebar.radio(
+        "그래프 표시 방식", ["현재 단계 합계", "계층 펼쳐 보기", "증가·감소 상위 N", "전체 (페이지 나눔)"]
     )
 
-    fig.update_layout(xaxis_tickangle=-45, height=700)
-    st.plotly_chart(fig, use_container_width=True)
+    if view_mode in ("증가·감소 상위 N", "전체 (페이지 나눔)"):
+        # 소계 행과 섞이지 않도록 말단(동/리) 행끼리만 비교한다
+        leaf_codes = [leaf for code in (selected_codes or [ROOT]) for leaf in tree.leaves(code)]
+        leaf_df = df.iloc[tree.subtree_rows(leaf_codes)]
+
+    if view_mode == "증가·감소 상위 N":
+        top_n = st.sidebar.slider("상위/하위 개수", 5, 50, 20)
+    elif view_mode == "전체 (페이지 나눔)":
+        page_size = st.sidebar.selectbox("페이지 크기", [100, 500, 2000])
+        pages = change_chart.page_count(len(leaf_df), page_size)
+        page_no = st.sidebar.number_input(f"페이지 (전체 {pages}쪽)", min_value=1, max_value=pages, value=1)
+        st.caption(f"동/리 {len(leaf_df):,}곳 중 {page_no}/{pages}쪽")
+    elif view_mode == "계층 펼쳐 보기":
+        chart_kind = st.sidebar.radio(
+            "그림 종류", ["treemap", "sunburst"], format_func={"treemap": "트리맵", "sunburst": "선버스트"}.get
+        )
+
+        # 지금 펼친 지역 (사이드바에서 지역을 고르면 거기서 시작). 그 지역의 바로 아래 단계만 그린다.
+        start = selected_codes[0] if len(selected_codes) == 1 else ROOT
+        if st.session_state.get("drill_start") != start or st.session_state.get("drill_code") not in rollup:
+            st.session_state.drill_start = start
+            st.session_state.drill_code = start
+
+        def drill_to(code):
+            st.session_state.drill_code = code
+
+        def drill_into():
+            if st.session_state.drill_child is not None:
+                st.session_state.drill_code = st.session_state.drill_child
+                st.session_state.drill_child = None
+
+        drill_code = st.session_state.drill_code
+        crumbs = st.columns(len(rollup.path(drill_code)) + 1)
+        for col, code in zip(crumbs, [ROOT] + rollup.path(drill_code)):
+            col.button(rollup.name(code), key=f"crumb_{code}", on_click=drill_to, args=(code,),
+                       disabled=code == drill_code)
+        expandable = [code for code in rollup.children_of(drill_code) if rollup.children_of(code)]
+        if expandable:
+            st.selectbox(
+                "🔽 펼칠 지역", [None] + expandable, key="drill_child", on_change=drill_into,
+                format_func=lambda code: "(선택)" if code is None else rollup.name(code)
+            )
+
+    with run.stage("aggregate") as entry:
+        if view_mode == "현재 단계 합계":
+            # 선택한 지역의 바로 아래 단계만 (아무것도 안 고르면 시도별). 합계는 말단 행을 더한 값
+            chart_df = rollup.frame(change_chart.level_codes(rollup, selected_codes, ROOT))
+        elif view_mode == "계층 펼쳐 보기":
+            chart_df = rollup.frame([drill_code] + rollup.children_of(drill_code))
+        elif view_mode == "증가·감소 상위 N":
+            chart_df = change_chart.top_bottom(leaf_df, y_column, top_n)
+        else:
+            chart_df = change_chart.page(leaf_df, page_no, page_size)
+        entry["rows"] = len(chart_df)
+
+    with run.stage("figure"):
+        if view_mode == "계층 펼쳐 보기":
+            fig = change_chart.hierarchy_figure(
+                rollup, drill_code, y_column, f"{title} - {rollup.full_name(drill_code)} (넓이: 인구)", chart_kind
+            )
+        else:
+            fig = change_chart.change_figure(chart_df, y_column, title)
+    run.plotly_chart(fig, use_container_width=True)
+
+    # 🧮 말단 합계와 파일 소계 비교
+    with st.expander("🧮 소계 검증 (동/리 행을 더한 값 vs 파일의 소계 행)"):
+        check = rollup.check()
+        st.caption(
+            f"소계 행 {len(check):,}개 중 {int(check['일치'].sum()):,}개 일치 · 동/리 {rollup.leaf_count:,}곳"
+            + (f" · 읍면 행이 없어 리 코드로 만든 읍면 {len(rollup.virtual):,}곳" if rollup.virtual else "")
+        )
+        st.dataframe(check[~check["일치"]].drop(columns="일치"))
+
+    # 📅 선택 지역의 월별 추이 (저장소에서 해당 지역 행만 읽어온다)
+    trend_codes = selected_codes[:10]
+    if len(stored_months) > 1 and trend_codes:
+        measure = {"증감_계": "인구증감_계", "증감_남": "인구증감_남자인구수", "증감_여": "인구증감_여자인구수"}[y_column]
+        with run.stage("filter", rows=len(trend_codes)):
+            trend_df = timeseries_store.trend("change", trend_codes, [measure])
+        trend_df["지역"] = trend_df["code"].map(lambda code: tree.full_name(code) if code in tree else code)
+        trend_df["기준 월"] = trend_df["month"].map(timeseries_store.month_label)
+        import plotly.express as px  # 월별 추이를 그릴 때만 필요
+
+        trend_fig = px.line(
+            trend_df, x="기준 월", y="value", color="지역", markers=True,
+            title=f"{title} - 월별 추이",
+            labels={"value": "인구 증감 수"},
+        )
+        run.plotly_chart(trend_fig, use_container_width=True)
 
 else:
     st.info("📁 좌측 사이드바에서 CSV 파일을 업로드해주세요.")
+
+run.finish()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import boundaries
+import bundled
+import region_join
+import spatial_index
+import timing
+
+st.set_page_config(page_title="지역 지도", layout="wide")
+st.title("🗺️ 지역 지도 (평균연령 · 인구 · 인구 증감)")
+run = timing.start("tlrkrghkqjwjssix")
+
+MAP_CENTER = [36.3, 127.8]
+MAP_ZOOM = 7
+
+# 지표 -> (컬럼, 색, 0 을 가운데로 나눌지, 표시 형식)
+METRICS = {
+    "평균연령 (연령 분포로 계산)": ("평균연령_계산", boundaries.SEQUENTIAL, False, "{:,.1f}세"),
+    "인구": ("인구", boundaries.SEQUENTIAL, False, "{:,.0f}명"),
+    "인구 증감 (법정동 기준)": ("증감_계", boundaries.DIVERGING, True, "{:+,.0f}명"),
+}
+
+
+@st.cache_resource
+def load_boundaries():
+    # 미리 단순화해 둔 경계는 프로세스에 하나만 두고 모든 세션이 같이 읽는다
+    return boundaries.BoundarySet.load()
+
+
+@st.cache_resource(max_entries=region_join.CACHE_ENTRIES, show_spinner="🎨 지역별 색 구간 계산 중...")
+def load_colors(age_data, avg_data, change_data):
+    # 데이터가 같으면 지표 x 단계마다 색 구간과 지역별 색을 한 번만 정해 둔다 (지도를 움직일 때는 꺼내 쓰기만)
+    # 세 파일을 이은 표는 한눈에 보기 페이지와 같은 캐시에서 꺼낸다
+    regions = region_join.load(age_data, avg_data, change_data)
+    frame, tree = regions.frame, regions.tree
+    frame = frame[frame.index != ""]
+    levels = np.array([boundaries.level_of(code) for code in frame.index])
+    tables = {}
+    for label, (column, colors, diverging, fmt) in METRICS.items():
+        if column not in frame:
+            continue
+        for level in boundaries.LEVEL_NAMES:
+            part = frame.loc[levels == level, column]
+            edges, index = boundaries.color_bins(part.to_numpy(dtype=np.float64), colors, diverging)
+            properties = {
+                code: {
+                    "name": tree.full_name(code),
+                    "value": fmt.format(value) if pd.notna(value) else "자료 없음",
+                    "fill": colors[idx] if idx >= 0 else boundaries.NO_DATA,
+                }
+                for code, value, idx in zip(part.index, part.to_numpy(), index)
+            }
+            tables[label, level] = (properties, boundaries.legend(edges, colors, fmt))
+    return tables
+
+
+boundary_set = load_boundaries()
+
+with st.expander("📂 파일 바꾸기 (올리지 않으면 저장소에 들어 있는 기본 데이터)"):
+    age_file = st.file_uploader("연령별 인구현황 CSV", type=["csv"], key="age_file")
+    avg_file = st.file_uploader("평균연령 CSV", type=["csv"], key="avg_file")
+    change_file = st.file_uploader("법정동별 인구증감 CSV", type=["csv"], key="change_file")
+
+
+def pick(uploaded, kind):
+    return uploaded.getvalue() if uploaded is not None else bundled.read(kind)
+
+
+def data_key(*files):
+    # 색 표는 캐시에서 밀려나면 새로 만들어지므로 id() 대신 파일 내용으로 지난번 지도와 비교한다
+    digest = hashlib.sha256()
+    for data in files:
+        digest.update(b"-" if data is None else b"+%d:" % len(data))
+        digest.update(data or b"")
+    return digest.hexdigest()
+
+
+age_data = pick(age_file, "age")
+
+if boundary_set is None:
+    st.info(
+        "🗺️ 지도에 쓸 경계 파일이 아직 없습니다. 행정동 경계 GeoJSON(행정코드 속성 adm_cd2)을 받아 "
+        "`python boundaries.py 행정동경계.geojson` 로 한 번 전처리하면 boundary_data/ 에 만들어집니다. "
+        "시군구/시도 경계 파일이 있으면 `--sigungu`, `--sido` 로 같이 넘기세요."
+    )
+elif age_data is not None:
+    try:
+        import folium
+        from streamlit_folium import st_folium
+
+        avg_data, change_data = pick(avg_file, "avg_age"), pick(change_file, "change")
+        tables = load_colors(age_data, avg_data, change_data)
+        tables_key = data_key(age_data, avg_data, change_data)
+        metric = st.selectbox("지표", [label for label in METRICS if (label, "시도") in tables])
+
+        # 지난번 화면(없으면 처음 중심/확대 수준) 기준으로 단계와 단순화 수준을 고르고, 그 근처 지역만 보낸다.
+        # 같은 단계에서 가져온 범위 안에서 움직이면 같은 경계를 그대로 다시 쓴다.
+        zoom = st.session_state.get("choropleth_zoom", MAP_ZOOM)
+        view = st.session_state.get("choropleth_view") or spatial_index.view_bbox(MAP_CENTER, zoom)
+        level = boundary_set.level_for_zoom(zoom)
+        resolution = boundaries.resolution_for_zoom(level, zoom)
+        fetched = st.session_state.get("choropleth_fetch")
+        if fetched is None or fetched[0] != (level, resolution) or not fetched[1].contains(view):
+            fetched = ((level, resolution), view.padded())
+            st.session_state.choropleth_fetch = fetched
+        fetch_box = fetched[1]
+        properties, legend = tables[metric, level]
+
+        layer_key = (tables_key, metric, level, resolution, fetch_box.as_tuple())
+        cached = st.session_state.get("choropleth_payload")
+        with run.stage("aggregate") as entry:
+            if cached is not None and cached[0] == layer_key:
+                geojson = cached[1]
+            else:
+                geojson = boundary_set.features(level, zoom, fetch_box, properties)
+                st.session_state.choropleth_payload = (layer_key, geojson)
+            entry["rows"] = len(geojson["features"])
+        if run.detail:
+            entry["payload_bytes"] = len(json.dumps(geojson, ensure_ascii=False).encode())
+
+        with run.stage("figure"):
+            # 하위 단계를 묶어 만든 경계는 안쪽 선이 남아 있으므로 선 없이 칠한다
+            weight = 0 if boundary_set.derived(level) else 0.5
+            layer = folium.FeatureGroup(name="지역")
+            folium.GeoJson(
+                geojson,
+                style_function=lambda feature: {
+                    "fillColor": feature["properties"]["fill"], "fillOpacity": 0.75,
+                    "color": "white", "weight": weight,
+                },
+                tooltip=folium.GeoJsonTooltip(fields=["name", "value"], aliases=["지역", metric]),
+            ).add_to(layer)
+            m = folium.Map(location=MAP_CENTER, zoom_start=MAP_ZOOM, tiles="cartodbpositron")
+
+        st.caption(f"📐 {level} 단위 · 화면 근처 {len(geojson['features']):,}곳 (확대하면 더 작은 단위로 바뀝니다)")
+        with run.stage("render"):
+            result = st_folium(
+                m, key="choropleth_map", height=600, use_container_width=True,
+                feature_group_to_add=layer, returned_objects=["bounds", "zoom"]
+            )
+        st.markdown(
+            " ".join(
+                f"<span style='background:{color};padding:0 0.6em;border:1px solid #999'>&nbsp;</span> {text}"
+                for color, text in legend
+            ),
+            unsafe_allow_html=True,
+        )
+
+        # 단계나 단순화 수준이 바뀌었거나 가져온 범위를 벗어났으면 그 화면 기준으로 다시 그린다
+        new_view = spatial_index.bbox_from_folium((result or {}).get("bounds"))
+        new_zoom = (result or {}).get("zoom") or zoom
+        if new_view is not None:
+            new_level = boundary_set.level_for_zoom(new_zoom)
+            changed = (new_level, boundaries.resolution_for_zoom(new_level, new_zoom)) != (level, resolution)
+            st.session_state.choropleth_view = new_view
+            st.session_state.choropleth_zoom = new_zoom
+            if changed or not fetch_box.contains(new_view):
+                st.rerun()
+
+    except Exception as e:
+        st.error(f"❌ 오류 발생: {e}")
+else:
+    st.info("📂 위에서 연령별 인구 CSV 파일을 올려 주세요.")
+
+run.finish()
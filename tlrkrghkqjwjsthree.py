@@ -1,81 +1,100 @@
 import streamlit as st
-import pandas as pd
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import bundled
+import timing
+import weather
 
 st.set_page_config(page_title="기상 통계 시각화", layout="wide")
 st.title("🌡️ 지점별 기상 통계 시계열 그래프")
+run = timing.start("tlrkrghkqjwjsthree")
 
-uploaded_file = st.file_uploader("📂 기상 통계 CSV 파일을 업로드하세요", type=["csv"])
 
-if uploaded_file:
-    try:
-        # 파일 읽기
-        df = pd.read_csv(uploaded_file, encoding="utf-8")
+@st.cache_resource(show_spinner="📦 CSV 분석 중...")
+def load_weather(data):
+    # 파일 내용이 같으면 다시 파싱하지 않고 같은 배열을 돌려쓴다 (읽기 전용)
+    return weather.parse_weather_csv(data)
 
-        # 첫 행을 컬럼으로
-        df.columns = df.iloc[0]
-        df = df[1:].copy()
-        df.columns.name = None
-        df.reset_index(drop=True, inplace=True)
-        df.rename(columns={"관측지점별(1)": "지점"}, inplace=True)
-        df.columns = df.columns.str.strip()
 
-        # ---------- 항목(변수) 선택 ----------
-        variable_row = df[df["지점"] == "지점"]  # 1행 아래 항목 정보 있는 행
-        df = df[df["지점"] != "지점"]  # 실제 데이터만 남김
-        variable_row = variable_row.iloc[0]  # 시리즈로
+@st.cache_resource
+def derived_values(data, method, window):
+    # 이동평균/편차는 모든 지점을 한 번에 계산해 둔다
+    cube = load_weather(data)
+    if method == "이동평균":
+        return weather.rolling_mean(cube.values, window)
+    return weather.climatology_anomaly(cube.values, cube.months)
 
-        # 날짜 컬럼 중 시계열에 해당하는 열 추출
-        date_columns = [col for col in df.columns if "." in col and col.count(".") == 2]
 
-        # 날짜별 항목 리스트 추출
-        available_metrics = sorted(set([variable_row[col] for col in date_columns if variable_row[col] != "-"]))
+uploaded_file = st.file_uploader("📂 기상 통계 CSV 파일을 업로드하세요", type=["csv"])
 
-        selected_metric = st.selectbox("📈 시각화할 항목을 선택하세요:", available_metrics)
+# 업로드하지 않으면 저장소에 들어 있는 기본 데이터를 보여 준다 (프로세스마다 한 번만 읽고 파싱)
+data = uploaded_file.getvalue() if uploaded_file is not None else bundled.read("weather")
+if uploaded_file is None and data is not None:
+    st.caption(f"ℹ️ 기본 데이터({bundled.name('weather')})를 보여 주고 있습니다. 다른 파일을 올리면 그 파일로 바뀝니다.")
 
-        # ---------- 지점 선택 ----------
-        unique_stations = df["지점"].unique().tolist()
-        selected_stations = st.multiselect("📍 시각화할 지점을 선택하세요:", unique_stations, default=unique_stations[:3])
+if data is not None:
+    try:
+        cube = load_weather(data)
+
+        # ---------- 항목(변수) 선택 ----------
+        selected_metrics = st.multiselect(
+            "📈 시각화할 항목을 선택하세요 (여러 개 선택하면 나란히 비교):",
+            cube.metrics, default=cube.metrics[:1]
+        )
 
-        if not selected_stations:
-            st.warning("⚠️ 최소 하나 이상의 지점을 선택해주세요.")
+        # ---------- 지점 선택 ----------
+        selected_stations = st.multiselect(
+            "📍 시각화할 지점을 선택하세요:", cube.stations, default=cube.stations[:3]
+        )
+
+        # ---------- 계산 방식 ----------
+        method = st.radio("🧮 값 계산 방식", ["원값", "이동평균", "평년 대비 편차"], horizontal=True)
+        window = 3
+        if method == "이동평균":
+            window = st.slider("이동평균 기간 (개월)", 2, 12, 3)
+
+        if not selected_stations or not selected_metrics:
+            st.warning("⚠️ 최소 하나 이상의 지점과 항목을 선택해주세요.")
         else:
-            # 선택한 항목에 해당하는 날짜 컬럼만 선택
-            selected_date_cols = [col for col in date_columns if variable_row[col] == selected_metric]
-
-            fig = go.Figure()
-
-            for station in selected_stations:
-                row = df[df["지점"] == station].iloc[0]
-                y = []
-                x = []
-
-                for date_col in selected_date_cols:
-                    try:
-                        y_val = float(row[date_col])
-                        y.append(y_val)
-                        x.append(date_col)
-                    except:
-                        continue
-
-                fig.add_trace(go.Scatter(
-                    x=x,
-                    y=y,
-                    mode="lines+markers",
-                    name=station
-                ))
-
-            fig.update_layout(
-                title=f"{selected_metric} - 지점별 시계열 변화",
-                xaxis_title="날짜",
-                yaxis_title=selected_metric,
-                template="plotly_white",
-                height=600
-            )
-
-            st.plotly_chart(fig, use_container_width=True)
+            with run.stage("aggregate"):
+                values = cube.values if method == "원값" else derived_values(data, method, window)
+
+            # (지점, 월, 항목) 조각을 한 번에 꺼낸다
+            with run.stage("filter", rows=len(selected_stations)):
+                block = cube.select(selected_stations, selected_metrics, values)
+
+            with run.stage("figure"):
+                fig = make_subplots(
+                    rows=len(selected_metrics), cols=1, shared_xaxes=True,
+                    subplot_titles=selected_metrics, vertical_spacing=0.08
+                )
+                for m_idx, metric in enumerate(selected_metrics):
+                    for s_idx, station in enumerate(selected_stations):
+                        fig.add_trace(go.Scatter(
+                            x=cube.months,
+                            y=block[s_idx, :, m_idx],
+                            mode="lines+markers",
+                            name=station,
+                            legendgroup=station,
+                            showlegend=m_idx == 0
+                        ), row=m_idx + 1, col=1)
+                    fig.update_yaxes(title_text=metric, row=m_idx + 1, col=1)
+
+                suffix = {"원값": "", "이동평균": f" ({window}개월 이동평균)", "평년 대비 편차": " (평년 대비 편차)"}[method]
+                fig.update_layout(
+                    title=f"{', '.join(selected_metrics)}{suffix} - 지점별 시계열 변화",
+                    xaxis_title="날짜",
+                    template="plotly_white",
+                    height=max(600, 350 * len(selected_metrics))
+                )
+                fig.update_xaxes(type="category")
+
+            run.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
         st.error(f"❌ 파일 처리 중 오류: {e}")
 else:
     st.info("좌측에서 CSV 파일을 업로드하면 자동으로 시각화됩니다.")
+
+run.finish()
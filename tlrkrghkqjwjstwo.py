@@ -2,67 +2,121 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import re
+
+import bundled
+import population
+import region_join
+import timing
+from regions import ROOT, RegionTree, split_label
 
 st.set_page_config(page_title="📊 평균연령 시각화", layout="wide")
 st.title("📊 2025년 6월 지역별 평균연령 (남녀 비교)")
+run = timing.start("tlrkrghkqjwjstwo")
 
-uploaded_file = st.file_uploader("📂 CSV 파일 업로드 (euc-kr 인코딩)", type=["csv"])
-
-if uploaded_file is not None:
-    try:
-        df = pd.read_csv(uploaded_file, encoding="cp949")
 
-        # 도, 시, 구(면읍동) 분리
-        df["도"] = df["행정구역"].str.extract(r"^([가-힣]+[도시특별시광역시자치시특별자치도]+)")
-        df["시"] = df["행정구역"].str.extract(r"^.+? ([가-힣]+[시군구])")
-        df["구"] = df["행정구역"].str.extract(r"^.+? [가-힣]+[시군구] ([가-힣0-9]+)")[0]
-        df["행정구역명"] = df["행정구역"].str.replace(r"\s*\(.*\)", "", regex=True)
+@st.cache_resource(show_spinner="📦 CSV 분석 중...")
+def load_data(data):
+    # 파일 내용이 같으면 다시 파싱하지 않는다 (읽기 전용으로 사용)
+    df = population.read_mois_csv(data)
+    with timing.stage("split", rows=len(df)):
+        df["행정구역명"] = [split_label(label)[0] for label in df["행정구역"]]
 
         # 평균연령 숫자형 변환
-        df["남자 평균연령"] = pd.to_numeric(df["2025년06월_남자 평균연령"], errors="coerce")
-        df["여자 평균연령"] = pd.to_numeric(df["2025년06월_여자 평균연령"], errors="coerce")
+        male_col = next(col for col in df.columns if col.endswith("남자 평균연령"))
+        female_col = next(col for col in df.columns if col.endswith("여자 평균연령"))
+        df["남자 평균연령"] = pd.to_numeric(df[male_col], errors="coerce")
+        df["여자 평균연령"] = pd.to_numeric(df[female_col], errors="coerce")
+        return df, RegionTree(df["행정구역"])
+
+
+uploaded_file = st.file_uploader("📂 CSV 파일 업로드 (euc-kr 인코딩)", type=["csv"])
+
+# 업로드하지 않으면 저장소에 들어 있는 기본 데이터를 보여 준다 (프로세스마다 한 번만 읽고 파싱)
+data = uploaded_file.getvalue() if uploaded_file is not None else bundled.read("avg_age")
+if uploaded_file is None and data is not None:
+    st.caption(f"ℹ️ 기본 데이터({bundled.name('avg_age')})를 보여 주고 있습니다. 다른 파일을 올리면 그 파일로 바뀝니다.")
+
+if data is not None:
+    try:
+        df, tree = load_data(data)
 
         # 1. 도 선택
-        selected_do = st.selectbox("📍 도 선택", sorted(df["도"].dropna().unique()))
+        selected_do = st.selectbox("📍 도 선택", tree.children_of(ROOT), format_func=tree.name)
 
         # 2. 시 선택
-        filtered_si = df[df["도"] == selected_do]["시"].dropna().unique()
-        selected_si = st.selectbox("🏙️ 시/군/구 선택", sorted(filtered_si))
+        si_options = tree.children_of(selected_do) or [selected_do]
+        selected_si = st.selectbox("🏙️ 시/군/구 선택", si_options, format_func=tree.name)
 
         # 3. 구 선택 (선택적으로)
-        filtered_gu = df[(df["도"] == selected_do) & (df["시"] == selected_si)]["구"].dropna().unique()
-        selected_gu = st.selectbox("🏘️ 구/동/면 선택 (선택)", ["전체"] + sorted(filtered_gu))
+        selected_gu = st.selectbox(
+            "🏘️ 구/동/면 선택 (선택)", ["전체"] + tree.children_of(selected_si),
+            format_func=lambda code: code if code == "전체" else tree.name(code)
+        )
 
-        # 필터링
-        if selected_gu == "전체":
-            df_selected = df[(df["도"] == selected_do) & (df["시"] == selected_si)]
-        else:
-            df_selected = df[(df["도"] == selected_do) & (df["시"] == selected_si) & (df["구"] == selected_gu)]
+        # 4. 연령별 인구 분포로 계산한 평균과 비교 (저장소의 연령별 인구 파일을 행정코드로 이어 붙인다)
+        compare_computed = st.checkbox("📐 연령별 인구 분포로 계산한 평균연령도 함께 보기")
+
+        # 필터링: 선택한 지역 아래 행만 꺼낸다
+        with run.stage("filter") as entry:
+            if selected_gu == "전체":
+                df_selected = df.iloc[tree.subtree_rows([selected_si])]
+            else:
+                df_selected = df.iloc[tree.subtree_rows([selected_gu])]
+            entry["rows"] = len(df_selected)
 
         if df_selected.empty:
             st.warning("선택한 지역에 해당하는 데이터가 없습니다.")
         else:
+            value_vars = ["남자 평균연령", "여자 평균연령"]
+            age_data = bundled.read("age")
+            if compare_computed and age_data is None:
+                st.warning("연령별 인구 파일이 없어 계산한 평균연령을 표시할 수 없습니다.")
+            elif compare_computed:
+                # 행정코드로 이어 붙인 표 (같은 파일 조합이면 다시 잇지 않는다)
+                regions = region_join.load(age_data, data)
+                age_month, avg_month = regions.cube.month, population.month_of(df.columns)
+                if age_month and avg_month and age_month != avg_month:
+                    # 다른 달의 평균과 견주면 맞지 않는 게 당연하므로 비교하지 않는다
+                    st.info(
+                        f"ℹ️ 연령별 인구 파일({age_month[:4]}년 {age_month[4:]}월)과 평균연령 파일"
+                        f"({avg_month[:4]}년 {avg_month[4:]}월)의 기준 월이 달라 계산한 평균연령은 표시하지 않습니다."
+                    )
+                else:
+                    codes = [region_join.admin_code(split_label(label)[1]) for label in df_selected["행정구역"]]
+                    checked = regions.frame.reindex(codes)
+                    df_selected = df_selected.assign(**{"계산 평균연령(전체)": checked["평균연령_계산"].to_numpy()})
+                    value_vars.append("계산 평균연령(전체)")
+                    mismatched = checked[checked["평균연령_검증"] == "불일치"]
+                    if len(mismatched):
+                        st.warning(f"⚠️ 계산한 평균이 파일의 남/여 평균 범위를 벗어난 지역 {len(mismatched)}곳: "
+                                   + ", ".join(mismatched["지역"].head(10)))
+                    else:
+                        st.caption(f"✅ 선택한 {len(checked)}곳 모두 계산한 평균이 파일의 남/여 평균과 맞습니다.")
+
             # Melt for Plotly
-            df_melted = df_selected.melt(
-                id_vars="행정구역명",
-                value_vars=["남자 평균연령", "여자 평균연령"],
-                var_name="성별", value_name="평균연령"
-            )
-
-            fig = px.bar(
-                df_melted,
-                x="행정구역명",
-                y="평균연령",
-                color="성별",
-                barmode="group",
-                title=f"{selected_do} {selected_si} {'' if selected_gu == '전체' else selected_gu} 평균 연령 비교",
-                labels={"행정구역명": "지역", "평균연령": "평균 연령 (세)"}
-            )
-            fig.update_layout(xaxis_tickangle=-45, height=600)
-            st.plotly_chart(fig, use_container_width=True)
+            with run.stage("aggregate", rows=len(df_selected)):
+                df_melted = df_selected.melt(
+                    id_vars="행정구역명",
+                    value_vars=value_vars,
+                    var_name="성별", value_name="평균연령"
+                )
+
+            with run.stage("figure"):
+                fig = px.bar(
+                    df_melted,
+                    x="행정구역명",
+                    y="평균연령",
+                    color="성별",
+                    barmode="group",
+                    title=f"{tree.full_name(selected_si if selected_gu == '전체' else selected_gu)} 평균 연령 비교",
+                    labels={"행정구역명": "지역", "평균연령": "평균 연령 (세)"}
+                )
+                fig.update_layout(xaxis_tickangle=-45, height=600)
+            run.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
         st.error(f"❌ 오류 발생: {e}")
 else:
     st.info("좌측 사이드바 또는 위에서 CSV 파일을 업로드해주세요.")
+
+run.finish()
@@ -0,0 +1,91 @@
+import io
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import timing
+
+# 기상청 종관기상 지점별 월 통계 CSV -> (지점, 월, 항목) 숫자 배열
+# CSV 모양: 1행 = 연월(2023.10 ...), 2행 = 항목(평균기온 (℃) ...), 3행부터 지점별 값
+# '-' 나 날짜(최고기온일자 등)는 숫자가 아니므로 NaN 이 되고, 값이 하나도 없는 항목은 뺀다.
+
+
+class WeatherCube:
+    """values[지점, 월, 항목] (float64, 결측은 NaN). 한 번 만들고 읽기 전용으로 쓴다."""
+
+    def __init__(self, stations, months, metrics, values):
+        self.stations = list(stations)
+        self.months = list(months)
+        self.metrics = list(metrics)
+        self.values = values
+        self.station_index = {name: i for i, name in enumerate(self.stations)}
+        self.metric_index = {name: i for i, name in enumerate(self.metrics)}
+
+    def select(self, stations, metrics, values=None):
+        """(선택 지점 수, 월 수, 선택 항목 수) 조각. values 로 이동평균 등 같은 모양의 배열을 줄 수 있다."""
+        values = self.values if values is None else values
+        s = np.array([self.station_index[name] for name in stations], dtype=np.intp)
+        m = np.array([self.metric_index[name] for name in metrics], dtype=np.intp)
+        return values[s][:, :, m]
+
+
+def parse_weather_csv(data):
+    with timing.stage("decode", nbytes=len(data)) as entry:
+        cube = _parse_weather_csv(data)
+        entry["rows"] = len(cube.stations)
+    return cube
+
+
+def _parse_weather_csv(data):
+    raw = pd.read_csv(io.BytesIO(data), header=None, dtype=str, encoding="utf-8-sig")
+    month_row = raw.iloc[0, 1:].str.strip().to_numpy()
+    metric_row = raw.iloc[1, 1:].str.strip().to_numpy()
+    body = raw.iloc[2:]
+
+    stations = body.iloc[:, 0].str.strip().to_numpy()
+    # 모든 칸을 한 번에 숫자로: '-' 와 날짜는 NaN
+    flat = pd.to_numeric(pd.Series(body.iloc[:, 1:].to_numpy().ravel()), errors="coerce")
+    numbers = flat.to_numpy(dtype=np.float64).reshape(len(body), -1)
+
+    months = sorted(set(month_row))
+    metrics = list(dict.fromkeys(metric_row))
+    month_idx = np.searchsorted(months, month_row)
+    metric_idx = np.array([metrics.index(metric) for metric in metric_row], dtype=np.intp)
+
+    values = np.full((len(stations), len(months), len(metrics)), np.nan)
+    values[:, month_idx, metric_idx] = numbers
+
+    numeric = ~np.isnan(values).all(axis=(0, 1))
+    metrics = [metric for metric, keep in zip(metrics, numeric) if keep]
+    return WeatherCube(stations, months, metrics, values[:, :, numeric])
+
+
+def rolling_mean(values, window):
+    """월 축(axis=1) 이동평균. NaN 은 빼고 평균내며 창 전체가 NaN 이면 NaN."""
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+
+    def windowed(a):
+        cum = np.cumsum(a, axis=1)
+        out = cum.copy()
+        out[:, window:] = cum[:, window:] - cum[:, :-window]
+        return out
+
+    total = windowed(filled)
+    count = windowed(valid.astype(np.float64))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def climatology_anomaly(values, months):
+    """같은 달(1월~12월)끼리의 지점별 평균(평년값)을 빼서 편차를 구한다."""
+    calendar = np.array([int(month.split(".")[1]) for month in months])
+    anomaly = np.full_like(values, np.nan)
+    for month_of_year in np.unique(calendar):
+        cols = calendar == month_of_year
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # 값이 모두 NaN 인 지점
+            mean = np.nanmean(values[:, cols], axis=1, keepdims=True)
+        anomaly[:, cols] = values[:, cols] - mean
+    return anomaly